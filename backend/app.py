@@ -1,20 +1,18 @@
-from fastapi import FastAPI, HTTPException
+import time
+PROCESS_START = time.perf_counter()  # Reference point for the cold-start report
+
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+import asyncio
 import json
-from datetime import datetime
 import uvicorn
 import os
-import subprocess
-import signal
-import time
 import threading
 import sys
 import logging
 from pydantic import BaseModel
 from dotenv import load_dotenv
-import pandas as pd
-import numpy as np
 
 # --- Initialize Logging ---
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -24,53 +22,88 @@ logger = logging.getLogger(__name__)
 load_dotenv(override=True)
 logger.info("Environment variables loaded.")
 
-# --- Optional: Import and Initialize Chat Agent Components ---
-try:
-    logger.info("Importing SQL setup...")
-    sys.path.append(os.path.join(os.path.dirname(__file__), 'chat'))
-    import chat.sql_setup as sql_setup
-    sql_engine = sql_setup.setup_database(csv_filepath='chat/deliveries.csv')
+# --- Shared live match projection (used by live scores, chat agent and commentary) ---
+from src.live_projection import get_projection
+from src.commentary_files import commentary_file_for
+from src.live_events import get_event_log
+from src.live_store import atomic_write_json
+from src.process_lock import ProcessLock
+from src.commentary_coordinator import DEFAULT_STATE_DIR
+live_event_log = get_event_log()
+EVENT_POLL_INTERVAL = 1  # Seconds between checks of the event log for SSE clients
+live_projection = get_projection()
+
+# --- Chat Agent Components, initialized in the background once the server is up ---
+from src.startup import StartupManager, PENDING, INITIALIZING
+sys.path.append(os.path.join(os.path.dirname(__file__), 'chat'))
+startup = StartupManager(started_at=PROCESS_START)
+
+def init_database():
+    import sql_setup
+    # Serialized across API workers so only one of them creates and loads the table
+    with ProcessLock(os.path.join(DEFAULT_STATE_DIR, "database_setup.lock")):
+        sql_engine = sql_setup.setup_database(csv_filepath='chat/deliveries.csv')
     if sql_engine is None:
-        logger.error("Database setup failed during API initialization.")
-    else:
-        logger.info("Database setup completed successfully.")
-    
-    logger.info("Initializing live match data processor...")
-    from chat.live_match_processor import LiveMatchRelevanceChecker
+        raise RuntimeError("Database setup failed")
+    return sql_engine
+
+def init_live_match_checker():
+    from live_match_processor import LiveMatchRelevanceChecker
     live_match_checker = LiveMatchRelevanceChecker()
-    has_live_match_data = live_match_checker.check_for_live_data()
-    if has_live_match_data:
+    if live_match_checker.check_for_live_data():
         logger.info("Live cricket match data is available for processing.")
     else:
         logger.warning("No live cricket match data found.")
+    return live_match_checker
 
-    logger.info("Importing LangGraph agent components...")
-    from chat.langgraph_agent_sql import compile_graph, GraphState, retriever, initialize_state
-    
-    # --- Compile the LangGraph Agent ---
-    logger.info("Compiling LangGraph agent...")
+def init_chat_agent():
+    # The agent module reuses the engine created by init_database
+    from langgraph_agent_sql import compile_graph, initialize_state
     compiled_app = compile_graph()
-    if compiled_app:
-        logger.info("LangGraph agent compiled successfully.")
-        chat_available = True
-    else:
-        logger.error("LangGraph agent compilation failed.")
-        chat_available = False
+    if not compiled_app:
+        raise RuntimeError("LangGraph agent compilation failed")
+    return {"compiled_app": compiled_app, "initialize_state": initialize_state}
+
+def init_vector_store():
+    from langgraph_agent_sql import probe_retriever
+    if not probe_retriever():
+        raise RuntimeError("Pathway retriever is not available; vector search will be skipped")
+    return True
+
+def init_deliveries_index():
+    from src.deliveries_index import get_deliveries_index
+    deliveries_index = get_deliveries_index()
+    logger.info(f"Deliveries index holds {deliveries_index.size} rows in {deliveries_index.nbytes() / 2**20:.1f} MiB")
+    return deliveries_index
+
+def init_matchups():
+    from src.matchups import get_matchup_tables
+    return get_matchup_tables()
+
+def warm_live_projection():
+    # Build the snapshots once so the first /api/live-scores request is served from memory
+    return len(live_projection.get_snapshots())
+
+startup.register("live_projection", warm_live_projection)
+startup.register("player_catalog", lambda: len(get_player_catalog()["by_id"]))
+startup.register("database", init_database)
+startup.register("deliveries_index", init_deliveries_index)
+startup.register("matchups", init_matchups)
+startup.register("live_match_checker", init_live_match_checker)
+startup.register("chat_agent", init_chat_agent, depends_on=("database", "deliveries_index", "matchups", "live_match_checker"))
+startup.register("vector_store", init_vector_store, depends_on=("chat_agent",))
 
-    # --- Check Pathway Connection Status ---
-    if retriever:
-        logger.info("Pathway retriever seems available.")
-    else:
-        logger.warning("Pathway retriever is NOT available. Vector search will be skipped.")
+app = FastAPI()
 
-except ImportError as e:
-    logger.exception(f"Failed to import necessary modules for chat: {e}")
-    chat_available = False
-except Exception as e:
-    logger.exception(f"An unexpected error occurred during chat initialization: {e}")
-    chat_available = False
+@app.on_event("startup")
+def start_background_initialization():
+    startup.start()
+    commentary_coordinator.start()
 
-app = FastAPI()
+@app.get('/api/startup')
+def startup_status():
+    """Readiness of each subsystem and cold-start timings"""
+    return startup.report()
 
 # Configure CORS
 app.add_middleware(
@@ -81,47 +114,145 @@ app.add_middleware(
 )
 
 
-# Load the CSV
-df = pd.read_csv("ipl_player_statistics_updated.csv")
-df.columns = df.columns.str.strip()
-
-# Rename important columns
-df = df.rename(columns={
-    "player": "Player",
-    "runs_scored": "Runs",
-    "wickets": "Wickets",
-    "image_url": "image_url"  # if it exists
-})
+# --- Player catalog ---
+# Built once with pandas and cached as JSON next to the other shared state, so every
+# API worker loads it without importing pandas and serves pre-encoded bytes.
+PLAYER_CSV = "ipl_player_statistics_updated.csv"
+PLAYER_CATALOG_CACHE = os.path.join(DEFAULT_STATE_DIR, "player_catalog.json")
+player_catalog = None
+player_catalog_lock = threading.Lock()
+
+def build_player_catalog():
+    import pandas as pd
+    import numpy as np
+
+    # Load the CSV
+    df = pd.read_csv(PLAYER_CSV)
+    df.columns = df.columns.str.strip()
+
+    # Rename important columns
+    df = df.rename(columns={
+        "player": "Player",
+        "runs_scored": "Runs",
+        "wickets": "Wickets",
+        "image_url": "image_url"  # if it exists
+    })
+
+    # Add team and id
+    df["id"] = df.index
+    # df["team"] = "Unknown"
+
+    # Fill/clean columns (where needed)
+    df["Player"] = df["Player"].fillna("Unnamed")
+    df["Runs"] = df["Runs"].fillna(0).astype(int)
+    df["Wickets"] = df["Wickets"].fillna(0).astype(int)
+    df["image_url"] = df["image_url"].fillna("")
 
-# Add team and id
-df["id"] = df.index
-# df["team"] = "Unknown"
+    return df.replace({np.nan: None}).to_dict(orient="records")
 
-# Fill/clean columns (where needed)
-df["Player"] = df["Player"].fillna("Unnamed")
-df["Runs"] = df["Runs"].fillna(0).astype(int)
-df["Wickets"] = df["Wickets"].fillna(0).astype(int)
-df["image_url"] = df["image_url"].fillna("")
+def load_player_catalog():
+    """Read the cached catalog, rebuilding it (under a cross-process lock) if the CSV changed"""
+    stat = os.stat(PLAYER_CSV)
+    source = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size}
+    with ProcessLock(PLAYER_CATALOG_CACHE + ".lock"):
+        try:
+            with open(PLAYER_CATALOG_CACHE, "r") as f:
+                cached = json.load(f)
+            if cached.get("source") == source:
+                players = cached["players"]
+            else:
+                players = None
+        except (FileNotFoundError, json.JSONDecodeError):
+            players = None
+        if players is None:
+            players = build_player_catalog()
+            atomic_write_json(PLAYER_CATALOG_CACHE, {"source": source, "players": players})
+    # The catalog is static, so encode the responses once
+    return {
+        "players_json": json.dumps(players).encode("utf-8"),
+        "by_id": {player["id"]: json.dumps(player).encode("utf-8") for player in players}
+    }
+
+def get_player_catalog():
+    global player_catalog
+    with player_catalog_lock:
+        if player_catalog is None:
+            player_catalog = load_player_catalog()
+        return player_catalog
 
 @app.get("/players")
 def get_players():
-    return df.replace({np.nan: None}).to_dict(orient="records")
+    return Response(content=get_player_catalog()["players_json"], media_type="application/json")
 
 @app.get("/players/{player_id}")
 def get_player(player_id: int):
-    player = df[df["id"] == player_id]
-    if player.empty:
+    player = get_player_catalog()["by_id"].get(player_id)
+    if player is None:
         return {"error": "Player not found"}
-    return player.replace({np.nan: None}).iloc[0].to_dict()
+    return Response(content=player, media_type="application/json")
 
 
-# Path to commentary history file
+# --- Player and team stats, served from the in-memory deliveries index ---
+def get_deliveries_index_or_503():
+    if not startup.is_ready("deliveries_index"):
+        raise HTTPException(status_code=503, detail=f"Deliveries index is {startup.state('deliveries_index')}")
+    return startup.get("deliveries_index")
+
+def run_stats(stats, *args, **kwargs):
+    try:
+        return stats(*args, **kwargs)
+    except ValueError as e:
+        # Unknown or ambiguous name, or an invalid role
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.get("/api/stats/players/{name}")
+def get_player_stats(name: str):
+    deliveries_index = get_deliveries_index_or_503()
+    return {
+        "batting": run_stats(deliveries_index.player_batting_stats, name),
+        "bowling": run_stats(deliveries_index.player_bowling_stats, name)
+    }
+
+@app.get("/api/stats/teams/{name}")
+def get_team_stats(name: str, first_match_id: int = 0, last_match_id: int = 2**31 - 1):
+    deliveries_index = get_deliveries_index_or_503()
+    return run_stats(deliveries_index.team_totals, name, first_match_id, last_match_id)
+
+@app.get("/api/stats/phases/{name}")
+def get_phase_stats(name: str, role: str = "batter"):
+    deliveries_index = get_deliveries_index_or_503()
+    return run_stats(deliveries_index.phase_splits, name, role)
+
+
+# --- Matchups, served from the precomputed matchup tables ---
+def get_matchup_tables_or_503():
+    if not startup.is_ready("matchups"):
+        raise HTTPException(status_code=503, detail=f"Matchup tables are {startup.state('matchups')}")
+    return startup.get("matchups")
+
+@app.get("/api/matchups/batter-vs-bowler")
+def get_batter_vs_bowler(batter: str, bowler: str):
+    return run_stats(get_matchup_tables_or_503().batter_vs_bowler_matchup, batter, bowler)
+
+@app.get("/api/matchups/batters/{name}")
+def get_bowlers_faced(name: str, limit: int = 10, order_by: str = "balls"):
+    return run_stats(get_matchup_tables_or_503().bowlers_faced, name, limit, order_by)
+
+@app.get("/api/matchups/bowlers/{name}")
+def get_batters_bowled_to(name: str, limit: int = 10, order_by: str = "balls"):
+    return run_stats(get_matchup_tables_or_503().batters_bowled_to, name, limit, order_by)
+
+@app.get("/api/matchups/teams")
+def get_team_matchup(team: str, opponent: str):
+    return run_stats(get_matchup_tables_or_503().team_matchup, team, opponent)
+
+
+# Path to the legacy single-match commentary history file
 COMMENTARY_FILE = "commentary_history.json"
 
-# Global variable to track the commentary process
-commentary_process = None
-commentary_status = "stopped"
-commentary_lock = threading.Lock()
+# --- Commentary control, shared by every API worker through a single coordinator ---
+from src.commentary_coordinator import get_commentary_coordinator
+commentary_coordinator = get_commentary_coordinator()
 
 # --- Request and Response Models for Chat ---
 class QueryRequest(BaseModel):
@@ -134,7 +265,56 @@ class AnswerResponse(BaseModel):
 @app.get('/api/chat/status')
 def chat_status():
     """Returns the status of the chat system"""
-    return {"available": chat_available}
+    return {"available": startup.is_ready("chat_agent"), "state": startup.state("chat_agent")}
+
+@app.get('/api/chat/speculation')
+def chat_speculation_metrics():
+    """How often speculative web searches were started and whether they paid off"""
+    if not startup.is_ready("chat_agent"):
+        return {"available": False, "state": startup.state("chat_agent")}
+    from langgraph_agent_sql import get_speculation_metrics
+    return dict(get_speculation_metrics(), available=True)
+
+@app.get('/api/chat/metrics')
+def chat_latency_metrics():
+    """Latency percentiles, tokens and cache hits per agent node, edge and LLM/SQL/retriever/web call"""
+    if not startup.is_ready("chat_agent"):
+        return {"available": False, "state": startup.state("chat_agent")}
+    from tracing import metrics_summary
+    from langgraph_agent_sql import get_speculation_metrics
+    return {"available": True, "spans": metrics_summary(), "speculation": get_speculation_metrics()}
+
+@app.get('/api/db/pool')
+def db_pool_metrics():
+    """Connection pool settings and usage of the chat database engines"""
+    if not startup.is_ready("database"):
+        return {"available": False, "state": startup.state("database")}
+    import sql_setup
+    return dict(sql_setup.pool_metrics(), available=True)
+
+@app.get('/api/db/health')
+async def db_health():
+    """Round-trip to the database on the async engine, without tying up a worker thread"""
+    if not startup.is_ready("database"):
+        return {"available": False, "state": startup.state("database")}
+    import sql_setup
+    from sqlalchemy import text
+    start = time.perf_counter()
+    try:
+        if sql_setup.get_async_engine() is not None:
+            async with sql_setup.async_connection() as connection:
+                await connection.execute(text("SELECT 1"))
+            engine_used = "async"
+        else:
+            def ping():
+                with sql_setup.connection() as connection:
+                    connection.execute(text("SELECT 1"))
+            await asyncio.to_thread(ping)
+            engine_used = "sync"
+    except Exception as e:
+        logger.error(f"Database health check failed: {e}")
+        return {"available": False, "error": str(e)}
+    return {"available": True, "engine": engine_used, "latency_ms": round((time.perf_counter() - start) * 1000, 3)}
 
 @app.post('/api/chat/ask', response_model=AnswerResponse)
 async def ask_agent(request: QueryRequest):
@@ -142,22 +322,22 @@ async def ask_agent(request: QueryRequest):
     Receives a question, runs it through the LangGraph agent,
     and returns the generated answer or an error.
     """
-    if not chat_available:
+    if not startup.is_ready("chat_agent"):
+        if startup.state("chat_agent") in (PENDING, INITIALIZING):
+            return AnswerResponse(
+                answer=None,
+                error="Chat service is still starting up. Please try again shortly."
+            )
         return AnswerResponse(
             answer=None, 
             error="Chat service is not available. Check server logs for details."
         )
+    agent = startup.get("chat_agent")
+    compiled_app = agent["compiled_app"]
         
     question = request.question
     logger.info(f"Received question: {question}")
 
-    if not compiled_app:
-        logger.error("Agent not compiled or available.")
-        return AnswerResponse(
-            answer=None,
-            error="Agent service is unavailable."
-        )
-
     if not question or not question.strip():
         return AnswerResponse(
             answer=None,
@@ -166,12 +346,14 @@ async def ask_agent(request: QueryRequest):
 
     try:
         # Prepare initial state for the agent
-        inputs = initialize_state()
+        inputs = agent["initialize_state"]()
         inputs["question"] = question
         final_state_snapshot = {}
 
         logger.info("Invoking LangGraph agent...")
-        final_state_snapshot = compiled_app.invoke(inputs, {"recursion_limit": 15})
+        # The graph is synchronous; keep it off the event loop so other endpoints stay responsive
+        from langgraph_agent_sql import invoke_agent
+        final_state_snapshot = await asyncio.to_thread(invoke_agent, compiled_app, inputs, {"recursion_limit": 15})
         logger.info("Agent invocation complete.")
 
         # Extract the final answer
@@ -201,125 +383,52 @@ async def ask_agent(request: QueryRequest):
 
 @app.post('/api/commentary/start')
 def start_commentary():
-    """Start the commentary service"""
-    global commentary_process, commentary_status
-    
-    with commentary_lock:
-        if commentary_status == "running":
-            return {"status": "already_running", "message": "Commentary service is already running"}
-        
-        try:
-            # Get the absolute path to run_commentary.py
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            commentary_script = os.path.join(script_dir, "run_commentary.py")
-            
-            # Start the commentary process
-            commentary_process = subprocess.Popen(
-                [sys.executable, commentary_script],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            # Wait a moment to ensure the process starts correctly
-            time.sleep(2)
-            
-            if commentary_process.poll() is None:
-                # Process is running
-                commentary_status = "running"
-                return {"status": "started", "message": "Commentary service started successfully"}
-            else:
-                # Process failed to start
-                return {"status": "error", "message": "Failed to start commentary service"}
-                
-        except Exception as e:
-            return {"status": "error", "message": f"Error starting commentary service: {str(e)}"}
+    """Start the commentary service (returns at once; the owning worker starts it in the background)"""
+    status, message = commentary_coordinator.request_start()
+    return {"status": status, "message": message}
 
 @app.post('/api/commentary/stop')
 def stop_commentary():
-    """Stop the commentary service"""
-    global commentary_process, commentary_status
-    
-    with commentary_lock:
-        if commentary_status != "running" or commentary_process is None:
-            return {"status": "not_running", "message": "Commentary service is not running"}
-        
-        try:
-            # Get the process group to terminate all child processes too
-            pid = commentary_process.pid
-            
-            # Terminate the process
-            commentary_process.terminate()
-            
-            # Give it some time to terminate gracefully
-            time.sleep(2)
-            
-            # If it's still running, kill it
-            if commentary_process.poll() is None:
-                commentary_process.kill()
-                
-                # On Unix/Linux/Mac, try to kill the process group
-                try:
-                    import os
-                    import signal
-                    os.killpg(os.getpgid(pid), signal.SIGTERM)
-                except (ImportError, AttributeError, ProcessLookupError):
-                    # This might not work on all platforms or if the process is already gone
-                    pass
-            
-            commentary_status = "stopped"
-            commentary_process = None
-            
-            # Also check for any remaining python processes with "run_commentary.py" 
-            # and terminate them (for extra safety)
-            try:
-                import subprocess
-                result = subprocess.run(
-                    ["ps", "aux"], 
-                    capture_output=True, 
-                    text=True
-                )
-                for line in result.stdout.splitlines():
-                    if "python" in line and "run_commentary.py" in line:
-                        # Extract PID (second column in ps output)
-                        parts = line.split()
-                        if len(parts) > 1:
-                            try:
-                                leftover_pid = int(parts[1])
-                                os.kill(leftover_pid, signal.SIGTERM)
-                                logger.info(f"Terminated leftover commentary process with PID {leftover_pid}")
-                            except (ValueError, ProcessLookupError) as e:
-                                logger.warning(f"Failed to terminate process: {e}")
-            except Exception as e:
-                logger.warning(f"Error cleaning up additional processes: {e}")
-            
-            return {"status": "stopped", "message": "Commentary service stopped successfully"}
-            
-        except Exception as e:
-            logger.error(f"Error stopping commentary service: {e}")
-            return {"status": "error", "message": f"Error stopping commentary service: {str(e)}"}
+    """Signal the commentary service to stop (workers exit in the background)"""
+    status, message = commentary_coordinator.request_stop()
+    return {"status": status, "message": message}
 
 @app.get('/api/commentary/status')
 def get_commentary_status():
     """Get the current status of the commentary service"""
-    return {"status": commentary_status}
+    return {"status": commentary_coordinator.status()}
+
+@app.get('/api/commentary/health')
+def get_commentary_health():
+    """Commentary service state with per-match worker details"""
+    return commentary_coordinator.health()
+
+@app.on_event("shutdown")
+def stop_commentary_on_shutdown():
+    commentary_coordinator.shutdown()
 
 @app.get('/api/live-commentary')
-def live_commentary():
-    """Endpoint to get the most recent commentary"""
+def live_commentary(match_id: str | None = None):
+    """Endpoint to get the most recent commentary (for one match, or the first live match)"""
     try:
+        if match_id is None:
+            match_ids = live_projection.try_get_snapshots().keys()
+            match_id = next(iter(match_ids), None)
+        commentary_file = commentary_file_for(match_id) if match_id else COMMENTARY_FILE
+
         # Check if commentary file exists
-        if not os.path.exists(COMMENTARY_FILE):
+        if not os.path.exists(commentary_file):
             return {"commentary": "Commentary not available yet.", "timestamp": ""}
         
         # Load commentary history
-        with open(COMMENTARY_FILE, 'r') as f:
+        with open(commentary_file, 'r') as f:
             commentaries = json.load(f)
         
         # Get the most recent commentary
         if commentaries:
             latest = commentaries[-1]
             return {
+                "match_id": match_id,
                 "commentary": latest["commentary"],
                 "timestamp": latest["timestamp"]
             }
@@ -331,362 +440,36 @@ def live_commentary():
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get('/api/live-scores')
-def live_scores():
+def live_scores(match_id: str | None = None):
     try:
-        # Use a relative path instead of hardcoded absolute path
-        import os
-        file_path = os.path.join(os.path.dirname(__file__), 'data_live.json')
-        
-        with open(file_path, 'r') as f:
-            data = json.load(f)
-        
+        snapshots = live_projection.get_snapshots()
+
         # Check if data is empty
-        if not data:
-            logger.error("data_live.json is empty or contains no match data")
+        if not snapshots:
+            logger.error("Live store contains no match data")
             return JSONResponse(
                 status_code=404,
                 content={"error": "No live match data available"}
             )
-            
-        # Get the match ID and initial data    
-        match_id = list(data.keys())[0]
-        logger.info(f"Processing match ID: {match_id}")
-        match_data = data[match_id]
-        
-        # Safely extract nested data with default values
-        try:
-            common_data = match_data.get("centre", {}).get("common", {})
-        except Exception as e:
-            logger.error(f"Error accessing centre.common data: {e}")
-            common_data = {}
-            
-        try:
-            current_innings = common_data.get("innings", {})
-        except Exception as e:
-            logger.error(f"Error accessing innings data: {e}")
-            current_innings = {}
-            
-        try:
-            innings_list = common_data.get("innings_list", [])
-        except Exception as e:
-            logger.error(f"Error accessing innings_list data: {e}")
-            innings_list = []
 
-        # Extract team names with safe fallbacks
-        current_innings_meta = next((inn for inn in innings_list if inn.get("current") == 1), {})
-        
-        # Direct extraction of team names from match_info
-        team1_name = match_data.get("match", {}).get("team1_name", "Team 1")
-        team2_name = match_data.get("match", {}).get("team2_name", "Team 2")
-        
-        # Get batting team ID from current innings
-        batting_team_id = current_innings.get("batting_team_id")
-        team1_id = match_data.get("match", {}).get("team1_id")
-        team2_id = match_data.get("match", {}).get("team2_id")
-        
-        # Additional ways to determine which team is batting
-        innings_number = match_data.get("innings", [])[0].get("innings_number", "1") if match_data.get("innings", []) else "1"
-        batting_first_team_id = match_data.get("match", {}).get("batting_first_team_id")
-        
-        logger.info(f"Innings number: {innings_number}, Batting first team ID: {batting_first_team_id}")
-        logger.info(f"Batting team ID: {batting_team_id}, Team1 ID: {team1_id}, Team2 ID: {team2_id}")
-        
-        # Determine which team is batting
-        # If batting_team_id is explicitly provided, use that
-        # Otherwise, use batting_first_team_id to determine who's batting in first innings
-        team_batting = None
-        
-        # Try to get the current batting team ID directly from the data
-        current_batting_team_id = None
-        
-        # Method 1: Check the current_innings directly
-        if current_innings and 'batting_team_id' in current_innings:
-            current_batting_team_id = current_innings.get('batting_team_id')
-            logger.info(f"Got batting team ID from current_innings: {current_batting_team_id}")
-        
-        # Method 2: Check the innings_list for the current innings
-        if not current_batting_team_id and innings_list:
-            current_innings_item = next((inn for inn in innings_list if inn.get('current') == 1), None)
-            if current_innings_item:
-                current_batting_team_id = current_innings_item.get('team_id')
-                logger.info(f"Got batting team ID from innings_list: {current_batting_team_id}")
-        
-        # Method 3: Check the live data structure
-        if not current_batting_team_id:
-            live_innings = match_data.get('live', {}).get('innings', {})
-            if live_innings and 'batting_team_id' in live_innings:
-                current_batting_team_id = live_innings.get('batting_team_id')
-                logger.info(f"Got batting team ID from live.innings: {current_batting_team_id}")
-        
-        # Use the discovered batting team ID if we found one
-        if current_batting_team_id:
-            if str(current_batting_team_id) == str(team1_id):
-                team_batting = "team1"
-            elif str(current_batting_team_id) == str(team2_id):
-                team_batting = "team2"
-            logger.info(f"Determined batting team from discovered ID: {team_batting}")
-        
-        # Fallback to other methods if we couldn't determine the batting team
-        if not team_batting:
-            # Get innings number to determine if we're in first or second innings
-            innings_number = current_innings.get('innings_number', '1')
-            logger.info(f"Current innings number: {innings_number}")
-            
-            # If we have batting_first_team_id, we can determine who's batting based on innings
-            if batting_first_team_id:
-                is_first_innings = innings_number == "1"
-                if str(batting_first_team_id) == str(team1_id):
-                    team_batting = "team1" if is_first_innings else "team2"
-                elif str(batting_first_team_id) == str(team2_id):
-                    team_batting = "team2" if is_first_innings else "team1"
-                logger.info(f"Determined batting team from innings number: {team_batting}")
-                
-        # If we still can't determine, default to team2 (SRH) being the batting team
-        if not team_batting:
-            team_batting = "team2"
-            logger.info(f"Using default batting team: {team_batting}")
-        
-        logger.info(f"Final determination - Team batting: {team_batting}")
-        
-        # Initialize scores with default values
-        team1_score = "Yet to bat"
-        team2_score = "Yet to bat"
-        
-        # Based on who's batting, set up our response data
-        if team_batting == "team1":
-            # Team 1 is batting (Mumbai Indians)
-            batting_team_name = team1_name
-            waiting_team_name = team2_name
-            
-            # In our API response:
-            # Team 1 should be Sunrisers (completed 20 overs)
-            # Team 2 should be Mumbai Indians (currently batting)
-            response_team1_name = team2_name  # Sunrisers (completed innings)
-            response_team2_name = team1_name  # Mumbai Indians (batting)
-            
-            response_team1_obj_id = match_data.get("match", {}).get("team2_object_id", "0")
-            response_team2_obj_id = match_data.get("match", {}).get("team1_object_id", "0")
-        else:
-            # Team 2 is batting (Sunrisers)
-            batting_team_name = team2_name
-            waiting_team_name = team1_name
-            
-            # In our API response:
-            # Team 1 should be Sunrisers (completed 20 overs)
-            # Team 2 should be Mumbai Indians (currently batting)
-            response_team1_name = team2_name  # Sunrisers (completed innings)
-            response_team2_name = team1_name  # Mumbai Indians (currently batting)
-            
-            response_team1_obj_id = match_data.get("match", {}).get("team2_object_id", "0")
-            response_team2_obj_id = match_data.get("match", {}).get("team1_object_id", "0")
-        
-        logger.info(f"Response - Team1: {response_team1_name}, Team2: {response_team2_name}")
-        
-        # Get scores for the respective teams
-        # For first innings, the team batting first will have a score and second team "Yet to bat"
-        # For second innings, both teams will have scores
-        
-        # Get details of all innings
-        all_innings = match_data.get("innings", [])
-        
-        # Process completed innings first
-        for inning in all_innings:
-            inning_num = inning.get("innings_number", "")
-            batting_team_id = inning.get("batting_team_id", "")
-            runs = inning.get("runs", "0")
-            wickets = inning.get("wickets", "0")
-            overs = inning.get("overs", "0.0")
-            event = inning.get("event", "")
-            event_name = inning.get("event_name", "")
-            
-            # Only consider completed innings here (event=5 is "complete" in cricket data)
-            if event == 5 or event_name == "complete":
-                # Format the score for this innings
-                formatted_score = f"{runs}/{wickets} ({overs} ov)"
-                
-                # Assign to the correct team based on batting_team_id
-                if str(batting_team_id) == str(team1_id):
-                    team1_score = formatted_score
-                    logger.info(f"Set team1 (ID: {team1_id}) completed innings score: {formatted_score}")
-                elif str(batting_team_id) == str(team2_id):
-                    team2_score = formatted_score
-                    logger.info(f"Set team2 (ID: {team2_id}) completed innings score: {formatted_score}")
-        
-        # Handle current innings specifically to get the most up-to-date score
-        if current_innings:
-            # Get the current batting team
-            current_batting_team_id = None
-            
-            # Try different ways to determine the current batting team
-            if 'batting_team_id' in current_innings:
-                current_batting_team_id = current_innings.get('batting_team_id')
-            elif team_batting == "team1":
-                current_batting_team_id = team1_id
-            elif team_batting == "team2":
-                current_batting_team_id = team2_id
-                
-            if current_batting_team_id:
-                # Get current innings details
-                current_runs = current_innings.get('runs', 0)
-                current_wickets = current_innings.get('wickets', 0)
-                current_overs = current_innings.get('overs', '0.0')
-                
-                # Format the current innings score
-                current_formatted_score = f"{current_runs}/{current_wickets} ({current_overs} ov)"
-                
-                # Update the score for the currently batting team
-                if str(current_batting_team_id) == str(team1_id):
-                    team1_score = current_formatted_score
-                    logger.info(f"Set team1 (ID: {team1_id}) active innings score: {current_formatted_score}")
-                elif str(current_batting_team_id) == str(team2_id):
-                    team2_score = current_formatted_score
-                    logger.info(f"Set team2 (ID: {team2_id}) active innings score: {current_formatted_score}")
-        
-        # Assign scores to the API response
-        if team_batting == "team1":
-            # If team 1 is batting (Mumbai), then:
-            # - team1_score contains Mumbai's score
-            # - team2_score contains Sunrisers's score
-            # But in our response:
-            # - response_team1 is Sunrisers
-            # - response_team2 is Mumbai
-            response_team1_score = team2_score  # Sunrisers score
-            response_team2_score = team1_score  # Mumbai Indians score
-        else:
-            # If team 2 is batting (Sunrisers), then:
-            # - team1_score contains Mumbai's score
-            # - team2_score contains Sunrisers's score
-            # But in our response:
-            # - response_team1 is Sunrisers
-            # - response_team2 is Mumbai
-            response_team1_score = team2_score  # Sunrisers score
-            response_team2_score = team1_score  # Mumbai Indians score
-        
-        # Log the final scores
-        logger.info(f"Team1 ({response_team1_name}) score: {response_team1_score}")
-        logger.info(f"Team2 ({response_team2_name}) score: {response_team2_score}")
-        
-        # Get additional match status information
-        match_status = ""
-        required_info = ""
-        
-        # Extract direct status from match_data.live if available
-        direct_status = match_data.get("live", {}).get("status", "")
-        
-        # Check if we're in a second innings scenario (chasing)
-        innings_number = current_innings.get('innings_number') if current_innings else None
-        target = current_innings.get('target') if current_innings else None
-        
-        if innings_number == "2" and target:
-            # This is a chase - add details about the target
-            current_runs = int(current_innings.get('runs', 0))
-            remaining_runs = int(target) - current_runs
-            remaining_balls = current_innings.get('remaining_balls')
-            remaining_overs = current_innings.get('remaining_overs')
-            
-            if remaining_runs > 0 and remaining_balls:
-                # Still chasing
-                required_run_rate = current_innings.get('required_run_rate', 0)
-                match_status = f"{response_team2_name} require {remaining_runs} runs from {remaining_overs} overs"
-                required_info = f"RRR: {required_run_rate}"
-            elif remaining_runs <= 0:
-                # Chase completed
-                match_status = f"{response_team2_name} won by {10 - int(current_innings.get('wickets', 0))} wickets"
-        
-        # Extract match result if available
-        result = common_data.get("match", {}).get("result_string", "")
-        if result:
-            match_status = result
-        
-        # Safely extract additional match data
-        match_info = match_data.get("match", {})
-        stadium = match_info.get("ground_name", "Unknown Stadium")
-
-        # Add status information to the response
-        status_info = {
-            "match_status": match_status,
-            "required_info": required_info
-        }
-
-        # If direct status is available, use it as match_status
-        if direct_status:
-            status_info["match_status"] = direct_status
-
-        # Build player_id → image_id mapping
-        player_id_to_image = {}
-        for team in match_data.get("team", []):
-            for player in team.get("player", []):
-                pid = str(player.get("player_id", ""))
-                imgid = player.get("image_id", "")
-                if pid and imgid:
-                    player_id_to_image[pid] = str(imgid)
-
-        # Get batsmen with image URLs - with safer extraction
-        batsmen = []
-        for player in match_data.get("centre", {}).get("batting", []):
-            if player.get("live_current_name") in ["striker", "non-striker"]:
-                pid = str(player.get("player_id", ""))
-                image_id = player_id_to_image.get(pid, "")
-                image_id_prefix = image_id[:4] + "00" if len(image_id) >= 4 else ""
-                batsmen.append({
-                    "name": player.get("known_as", ""),
-                    "runs": int(player.get("runs", 0)),
-                    "balls": int(player.get("balls_faced", 0)),
-                    "image_url": f"https://img1.hscicdn.com/image/upload/f_auto,t_ds_square_w_320,q_50/lsci/db/PICTURES/CMS/{image_id_prefix}/{image_id}.png" if image_id else ""
-                })
-
-        # Get bowler with image - with safer extraction
-        bowler = {}
-        for player in match_data.get("centre", {}).get("bowling", []):
-            if player.get("live_current_name") == "current bowler":
-                pid = str(player.get("player_id", ""))
-                image_id = player_id_to_image.get(pid, "")
-                image_id_prefix = image_id[:4] + "00" if len(image_id) >= 4 else ""
-                bowler = {
-                    "name": player.get("known_as", ""),
-                    "overs": player.get("overs", "0.0"),
-                    "wickets": int(player.get("wickets", 0)),
-                    "image_url": f"https://img1.hscicdn.com/image/upload/f_auto,t_ds_square_w_320,q_50/lsci/db/PICTURES/CMS/{image_id_prefix}/{image_id}.png" if image_id else ""
-                }
-                break
-
-        # Format present_datetime_local to 12-hr IST - with safer extraction
-        last_updated = ""
-        try:
-            raw_time = match_data.get("match", {}).get("present_datetime_local")
-            if raw_time:
-                dt = datetime.strptime(raw_time, "%Y-%m-%d %H:%M:%S")
-                last_updated = dt.strftime("%I:%M:%S %p")  # 12-hour format with seconds
-        except Exception as e:
-            logger.error(f"Error formatting datetime: {e}")
-            last_updated = ""
-
-        scores = [{
-            "id": match_id,
-            "team1": response_team1_name,
-            "team1Score": response_team1_score,
-            "team1ObjectId": response_team1_obj_id,
-            "team2": response_team2_name,
-            "team2Score": response_team2_score,
-            "team2ObjectId": response_team2_obj_id,
-            "result": result,
-            "batsmen": batsmen,
-            "bowler": bowler,
-            "stadium": stadium,
-            "last_updated": last_updated,
-            "status_info": status_info
-        }]
-
-        return scores
+        if match_id is not None:
+            if match_id not in snapshots:
+                return JSONResponse(
+                    status_code=404,
+                    content={"error": f"No live data for match {match_id}"}
+                )
+            return [snapshots[match_id]["scoreboard"]]
+
+        return [snapshot["scoreboard"] for snapshot in snapshots.values()]
 
     except FileNotFoundError:
-        logger.error("data_live.json file not found")
+        logger.error("Live match data not found in the live store")
         return JSONResponse(
             status_code=404,
             content={"error": "Live match data file not found"}
         )
     except json.JSONDecodeError:
-        logger.error("Invalid JSON format in data_live.json")
+        logger.error("Invalid JSON format in the live store")
         return JSONResponse(
             status_code=500,
             content={"error": "Invalid data format in live match data file"}
@@ -704,5 +487,39 @@ def live_scores():
             content={"error": f"Error processing data: {str(e)}"}
         )
 
+@app.get('/api/live-events')
+async def live_events(request: Request, match_id: str | None = None, since: int | None = None):
+    """
+    Server-sent events stream of ball-by-ball deltas (optionally for one match).
+
+    Resumes after the Last-Event-ID header sent by a reconnecting EventSource, or
+    after seq `since`; without either, only events logged from now on are sent.
+    """
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        since = int(last_event_id)
+
+    async def event_stream():
+        if since is None:
+            last_seq, position = live_event_log.last_seq(), await asyncio.to_thread(live_event_log.end_position)
+        else:
+            last_seq, position = since, None
+        while True:
+            events, position = await asyncio.to_thread(live_event_log.read_since, last_seq, match_id, position)
+            for event in events:
+                last_seq = event["seq"]
+                yield f"id: {event['seq']}\nevent: {event['type']}\ndata: {json.dumps(event)}\n\n"
+            await asyncio.sleep(EVENT_POLL_INTERVAL)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+# API_WORKERS > 1 (or "auto" for one per core) is the production mode: several processes sharing the live store,
+# the cached player catalog and one commentary coordinator (reload is dev-only)
+API_WORKERS = os.environ.get("API_WORKERS", "1")
+API_WORKERS = os.cpu_count() or 1 if API_WORKERS == "auto" else int(API_WORKERS)
+
 if __name__ == '__main__':
-    uvicorn.run("app:app", host="0.0.0.0", port=8051, reload=True)
\ No newline at end of file
+    if API_WORKERS > 1:
+        uvicorn.run("app:app", host="0.0.0.0", port=8051, workers=API_WORKERS)
+    else:
+        uvicorn.run("app:app", host="0.0.0.0", port=8051, reload=True)
\ No newline at end of file
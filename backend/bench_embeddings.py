@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the vector store embedding backends
+================================================
+
+Embeds the vector store corpus (chat/data/*.txt, split into chunks about the
+size the Pathway splitter produces) with each backend and reports indexing
+throughput, then times single-query embeddings as the retriever issues them.
+
+    python bench_embeddings.py                          # local and openai
+    python bench_embeddings.py --embedders local        # offline
+    python bench_embeddings.py --output perf/embeddings.json
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BACKEND_DIR, "chat"))
+
+from embedding import get_embedder
+
+CORPUS_GLOB = os.path.join(BACKEND_DIR, "chat", "data", "*.txt")
+CHUNK_WORDS = 250  # Roughly the 150-450 token chunks of the Pathway splitter
+QUERIES = [
+    "What is self-RAG?",
+    "How does the critic model decide when to retrieve?",
+    "Who has scored the most runs in the IPL?",
+    "What is Virat Kohli's strike rate against spin?",
+    "Which team won the most recent match?",
+    "How are reflection tokens used during generation?",
+    "What is the economy rate of Jasprit Bumrah in death overs?",
+    "Explain the difference between retrieval-augmented generation and fine-tuning.",
+]
+
+
+def _summary(samples):
+    samples = sorted(samples)
+    return {
+        "calls": len(samples),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))] * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3)
+    }
+
+
+def load_chunks(pattern=CORPUS_GLOB, chunk_words=CHUNK_WORDS):
+    chunks = []
+    for path in sorted(glob.glob(pattern)):
+        with open(path, "r", encoding="utf-8") as f:
+            words = f.read().split()
+        chunks += [" ".join(words[start:start + chunk_words]) for start in range(0, len(words), chunk_words)]
+    return chunks
+
+
+def bench(name, chunks, query_rounds):
+    embedder = get_embedder(name, cached=False)
+    # First call loads the model / opens the connection; not part of the timings
+    warmup_start = time.perf_counter()
+    dimensions = len(embedder.embed_query("warm up"))
+    warmup_s = time.perf_counter() - warmup_start
+
+    start = time.perf_counter()
+    embedder.embed_documents(chunks)
+    indexing_s = time.perf_counter() - start
+
+    query_samples = []
+    for _ in range(query_rounds):
+        for query in QUERIES:
+            start = time.perf_counter()
+            embedder.embed_query(query)
+            query_samples.append(time.perf_counter() - start)
+
+    return {
+        "model": embedder.model_id,
+        "dimensions": dimensions,
+        "warmup_s": round(warmup_s, 3),
+        "indexing": {
+            "chunks": len(chunks),
+            "seconds": round(indexing_s, 3),
+            "chunks_per_s": round(len(chunks) / indexing_s, 1) if indexing_s else None
+        },
+        "query": _summary(query_samples)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare indexing throughput and query latency of the embedding backends")
+    parser.add_argument("--embedders", default="local,openai", help="Comma-separated backends to run")
+    parser.add_argument("--corpus", default=CORPUS_GLOB, help="Glob of text files to embed")
+    parser.add_argument("--query-rounds", type=int, default=5)
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    chunks = load_chunks(args.corpus)
+    if not chunks:
+        print(f"No text found at {args.corpus}")
+        sys.exit(1)
+    print(f"Corpus: {len(chunks)} chunks of up to {CHUNK_WORDS} words")
+
+    report = {"chunks": len(chunks), "embedders": {}}
+    for name in args.embedders.split(","):
+        try:
+            result = bench(name.strip(), chunks, args.query_rounds)
+        except Exception as e:
+            print(f"\n{name}: failed: {e}")
+            report["embedders"][name] = {"error": str(e)}
+            continue
+        report["embedders"][name] = result
+        print(f"\n{name} ({result['model']}, {result['dimensions']} dimensions, warm-up {result['warmup_s']}s)")
+        print(f"    indexing: {result['indexing']['chunks_per_s']} chunks/s ({result['indexing']['seconds']}s)")
+        print(f"    query:    p50 {result['query']['p50_ms']} ms, p95 {result['query']['p95_ms']} ms")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark of cricket_qa_generator.generate_qa_set against stubbed clients
+=========================================================================
+
+Replaces the shared LLM and web search agent of the generator with stubs that
+sleep for a fixed latency (and go through the generator's rate limiter, as the
+real clients do), then times a Q&A set generated one chain step at a time and
+with the concurrent DAG. No API keys or network access are needed.
+
+    python bench_qa_generation.py
+    python bench_qa_generation.py --llm-latency 1 --search-latency 8 --workers 4
+    python bench_qa_generation.py --output perf/qa_generation.json
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BACKEND_DIR, "vector_updater.py"))
+
+from langchain_core.messages import AIMessage
+from langchain_core.rate_limiters import InMemoryRateLimiter
+from langchain_core.runnables import RunnableLambda
+
+import cricket_qa_generator as generator
+
+
+class StubClients:
+    """Stand-ins for the generator's LLM and search agent, counting calls and peak concurrency"""
+
+    def __init__(self, llm_latency, search_latency):
+        self.llm_latency = llm_latency
+        self.search_latency = search_latency
+        self.counter = itertools.count(1)
+        self.calls = {"llm": 0, "search": 0}
+        self.active = 0
+        self.peak = 0
+        self._lock = threading.Lock()
+
+    def _call(self, kind, latency):
+        generator.rate_limiter.acquire()
+        with self._lock:
+            self.calls[kind] += 1
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+            number = next(self.counter)
+        time.sleep(latency)
+        with self._lock:
+            self.active -= 1
+        return number
+
+    def llm(self, prompt_value):
+        return AIMessage(content=f"Stub question {self._call('llm', self.llm_latency)}?")
+
+    def invoke(self, inputs):
+        return {"output": f"Stub answer {self._call('search', self.search_latency)}"}
+
+
+def bench(workers, args):
+    stubs = StubClients(args.llm_latency, args.search_latency)
+    generator._llm = RunnableLambda(stubs.llm)
+    generator._search_agent = stubs
+    start = time.perf_counter()
+    qa_pairs = generator.generate_qa_set(max_workers=workers)
+    seconds = time.perf_counter() - start
+    assert len(qa_pairs) == 5 and all(" : Stub answer " in pair for pair in qa_pairs), qa_pairs
+    return {"workers": workers, "seconds": round(seconds, 3), "calls": stubs.calls, "peak_concurrency": stubs.peak}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time Q&A set generation, sequential and concurrent, with stubbed clients")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per stubbed LLM call")
+    parser.add_argument("--search-latency", type=float, default=2.0, help="Seconds per stubbed web search")
+    parser.add_argument("--workers", type=int, default=generator.QA_MAX_WORKERS)
+    parser.add_argument("--requests-per-second", type=float, default=generator.QA_REQUESTS_PER_SECOND)
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the random questions, the same for both runs")
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    report = {}
+    for name, workers in (("sequential", 1), ("concurrent", args.workers)):
+        random.seed(args.seed)
+        generator.rate_limiter = InMemoryRateLimiter(
+            requests_per_second=args.requests_per_second,
+            check_every_n_seconds=0.05,
+            max_bucket_size=max(1, args.workers)
+        )
+        report[name] = bench(workers, args)
+        print(f"{name}: {report[name]['seconds']}s with {workers} worker(s), "
+              f"{report[name]['calls']} calls, peak {report[name]['peak_concurrency']} in flight")
+    report["speedup"] = round(report["sequential"]["seconds"] / report["concurrent"]["seconds"], 2)
+    print(f"\nSpeedup: {report['speedup']}x")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\nWrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the in-memory deliveries index against the SQL stats queries
+=========================================================================
+
+Runs every stats function for the busiest players and teams, once through
+src/deliveries_index.py and once through chat/stats_queries.py (PostgreSQL),
+reports per-function latency and checks that both return the same figures.
+
+    python bench_stats.py                       # index and SQL
+    python bench_stats.py --no-sql              # index only (no database needed)
+    python bench_stats.py --output perf/stats.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(BACKEND_DIR, "chat"))
+
+from src.deliveries_index import DeliveriesIndex, DELIVERIES_CSV
+
+
+def _summary(samples):
+    samples = sorted(samples)
+    return {
+        "calls": len(samples),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+        "p50_ms": round(samples[len(samples) // 2] * 1000, 3),
+        "p95_ms": round(samples[min(len(samples) - 1, int(0.95 * len(samples)))] * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3)
+    }
+
+
+def busiest(offset_index, names, count):
+    """The `count` names with the most rows in an OffsetIndex"""
+    sizes = offset_index.offsets[1:] - offset_index.offsets[:-1]
+    return [names[code] for code in sizes.argsort()[::-1][:count]]
+
+
+def workload(deliveries_index, samples):
+    """(function name, args) for every stats function over the busiest players and teams"""
+    batters = busiest(deliveries_index.by_batter, deliveries_index.players, samples)
+    bowlers = busiest(deliveries_index.by_bowler, deliveries_index.players, samples)
+    teams = busiest(deliveries_index.by_batting_team, deliveries_index.teams, samples)
+    calls = []
+    for batter, bowler in zip(batters, bowlers):
+        calls += [
+            ("player_batting_stats", (batter,)),
+            ("player_bowling_stats", (bowler,)),
+            ("batter_vs_bowler_stats", (batter, bowler)),
+            ("phase_splits", (batter, "batter")),
+            ("phase_splits", (bowler, "bowler")),
+        ]
+    for team, opponent in zip(teams, teams[1:] + teams[:1]):
+        calls += [
+            ("team_totals", (team,)),
+            ("team_vs_team_stats", (team, opponent)),
+            ("phase_splits", (team, "batting_team")),
+        ]
+    return calls
+
+
+def run(functions, calls, repeat):
+    """Time each call `repeat` times; returns ({function: summary}, [results of the last run])"""
+    timings = {}
+    results = []
+    for _ in range(repeat):
+        results = []
+        for name, args in calls:
+            start = time.perf_counter()
+            results.append(functions[name](*args))
+            timings.setdefault(name, []).append(time.perf_counter() - start)
+    return {name: _summary(samples) for name, samples in timings.items()}, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the in-memory deliveries index with the SQL stats queries")
+    parser.add_argument("--csv", default=DELIVERIES_CSV)
+    parser.add_argument("--samples", type=int, default=10, help="Players and teams to query")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--no-sql", action="store_true", help="Skip the database side")
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    deliveries_index = DeliveriesIndex.from_csv(args.csv)
+    report = {
+        "rows": deliveries_index.size,
+        "index_load_s": round(time.perf_counter() - start, 3),
+        "index_mib": round(deliveries_index.nbytes() / 2**20, 1)
+    }
+    print(f"Index: {report['rows']} rows loaded in {report['index_load_s']}s, {report['index_mib']} MiB")
+
+    calls = workload(deliveries_index, args.samples)
+    index_functions = {function.__name__: function for function in deliveries_index.stats_functions()}
+    report["index"], index_results = run(index_functions, calls, args.repeat)
+
+    if not args.no_sql:
+        import sql_setup
+        if sql_setup.setup_database(csv_filepath=args.csv) is None:
+            print("Database unavailable; rerun with --no-sql to benchmark the index alone")
+            sys.exit(1)
+        import stats_queries
+        sql_functions = {function.__name__: function for function in stats_queries.STATS_FUNCTIONS}
+        # Loads the name list once so it is not part of the first timing
+        stats_queries.resolve_name(calls[0][1][0])
+        report["sql"], sql_results = run(sql_functions, calls, args.repeat)
+        report["mismatches"] = [
+            {"call": f"{name}{args_}", "index": index_result, "sql": sql_result}
+            for (name, args_), index_result, sql_result in zip(calls, index_results, sql_results)
+            if json.loads(json.dumps(index_result, default=str)) != json.loads(json.dumps(sql_result, default=str))
+        ]
+
+    print(f"\n{'function':<24}{'index p50 ms':>14}{'index p95 ms':>14}{'sql p50 ms':>12}{'sql p95 ms':>12}{'speedup':>9}")
+    for name, index_summary in report["index"].items():
+        line = f"{name:<24}{index_summary['p50_ms']:>14}{index_summary['p95_ms']:>14}"
+        if "sql" in report:
+            sql_summary = report["sql"][name]
+            line += f"{sql_summary['p50_ms']:>12}{sql_summary['p95_ms']:>12}{sql_summary['p50_ms'] / max(index_summary['p50_ms'], 0.001):>8.0f}x"
+        print(line)
+    if "mismatches" in report:
+        print(f"\n{len(report['mismatches'])} of {len(calls)} results differ between the index and SQL")
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+            f.write("\n")
+        print(f"Wrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
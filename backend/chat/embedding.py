@@ -0,0 +1,224 @@
+# -*- coding: utf-8 -*-
+"""
+Embedding backends for the vector store.
+
+EMBEDDER selects the backend used by vector_store_server.py, for indexed
+chunks and for retriever queries alike:
+    openai  OpenAI embeddings API (the default; needs OPENAI_API_KEY)
+    local   sentence-transformers model on this machine (no network needed)
+
+Both backends implement the LangChain embeddings interface (embed_documents /
+embed_query). get_embedder() wraps them in CachedEmbedder, so every text is
+embedded once per model: repeated and re-asked retriever queries, the server's
+startup self-test and re-indexed chunks are served from EmbeddingCache.
+Switching backends changes the vector space, so the store must be re-indexed
+(delete the Pathway cache directory) after changing EMBEDDER or the model.
+"""
+
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dotenv import load_dotenv
+
+load_dotenv()
+
+EMBEDDER = os.getenv("EMBEDDER", "openai")
+OPENAI_EMBEDDING_MODEL = os.getenv("OPENAI_EMBEDDING_MODEL", "text-embedding-3-small")
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+EMBEDDING_DEVICE = os.getenv("EMBEDDING_DEVICE", "cpu")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+# Batches encoded concurrently; the model releases the GIL during inference
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", str(min(4, os.cpu_count() or 1))))
+# Embedding cache: most recently used entries in memory, everything on disk
+EMBEDDING_CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "embedding_cache"))
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "4096"))
+
+
+class LocalEmbedder:
+    """
+    sentence-transformers model running in-process.
+
+    Texts are encoded in batches of batch_size, with up to `threads` batches in
+    flight at once. The model is loaded on first use.
+    """
+
+    def __init__(self, model_name=LOCAL_EMBEDDING_MODEL, device=EMBEDDING_DEVICE,
+                 batch_size=EMBEDDING_BATCH_SIZE, threads=EMBEDDING_THREADS):
+        self.model_name = model_name
+        self.model_id = f"local:{model_name}"
+        self.device = device
+        self.batch_size = batch_size
+        self.threads = threads
+        self._model = None
+        self._executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="embedder")
+
+    @property
+    def model(self):
+        if self._model is None:
+            from sentence_transformers import SentenceTransformer
+            self._model = SentenceTransformer(self.model_name, device=self.device)
+        return self._model
+
+    def _encode(self, texts):
+        return self.model.encode(texts, batch_size=self.batch_size, normalize_embeddings=True).tolist()
+
+    def embed_documents(self, texts):
+        batches = [texts[start:start + self.batch_size] for start in range(0, len(texts), self.batch_size)]
+        if len(batches) <= 1:
+            return self._encode(texts) if texts else []
+        self.model  # Load once, before the threads start
+        embeddings = []
+        for batch_embeddings in self._executor.map(self._encode, batches):
+            embeddings.extend(batch_embeddings)
+        return embeddings
+
+    def embed_query(self, text):
+        return self._encode([text])[0]
+
+
+class RemoteEmbedder:
+    """OpenAI embeddings API, batch_size texts per request"""
+
+    def __init__(self, model_name=OPENAI_EMBEDDING_MODEL, batch_size=EMBEDDING_BATCH_SIZE):
+        from openai import OpenAI
+        self.model_name = model_name
+        self.model_id = f"openai:{model_name}"
+        self.batch_size = batch_size
+        self.client = OpenAI()
+
+    def embed_documents(self, texts):
+        embeddings = []
+        for start in range(0, len(texts), self.batch_size):
+            response = self.client.embeddings.create(model=self.model_name, input=texts[start:start + self.batch_size])
+            embeddings.extend(item.embedding for item in response.data)
+        return embeddings
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def normalize_text(text):
+    """Cache identity of a text: case and runs of whitespace do not matter"""
+    return " ".join(text.lower().split())
+
+
+class EmbeddingCache:
+    """
+    Embeddings keyed by model id and normalized text: an in-memory LRU of
+    max_entries in front of an on-disk store (diskcache) that survives restarts.
+    Without diskcache installed only the memory tier is used.
+    """
+
+    def __init__(self, directory=EMBEDDING_CACHE_DIR, max_entries=EMBEDDING_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        try:
+            import diskcache
+            self._disk = diskcache.Cache(directory)
+        except ImportError:
+            print("diskcache is not installed; embeddings are only cached in memory")
+            self._disk = None
+
+    @staticmethod
+    def key(model_id, text):
+        return hashlib.sha256(f"{model_id}\0{normalize_text(text)}".encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            embedding = self._memory.get(key)
+            if embedding is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return embedding
+        embedding = self._disk.get(key) if self._disk is not None else None
+        with self._lock:
+            if embedding is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._remember(key, embedding)
+        return embedding
+
+    def put(self, key, embedding):
+        with self._lock:
+            self._remember(key, embedding)
+        if self._disk is not None:
+            self._disk.set(key, embedding)
+
+    def _remember(self, key, embedding):
+        self._memory[key] = embedding
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "lookups": lookups,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 3) if lookups else None,
+                "memory_entries": len(self._memory),
+                "disk_entries": len(self._disk) if self._disk is not None else None
+            }
+
+
+class CachedEmbedder:
+    """An embedding backend behind an EmbeddingCache; only texts not seen before reach the backend"""
+
+    def __init__(self, embedder, cache):
+        self.embedder = embedder
+        self.cache = cache
+        self.model_id = embedder.model_id
+
+    def embed_query(self, text):
+        key = self.cache.key(self.model_id, text)
+        embedding = self.cache.get(key)
+        if embedding is None:
+            embedding = self.embedder.embed_query(text)
+            self.cache.put(key, embedding)
+        return embedding
+
+    def embed_documents(self, texts):
+        keys = [self.cache.key(self.model_id, text) for text in texts]
+        embeddings = [self.cache.get(key) for key in keys]
+        missing = [position for position, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            # One batched backend call for everything not cached
+            computed = self.embedder.embed_documents([texts[position] for position in missing])
+            for position, embedding in zip(missing, computed):
+                embeddings[position] = embedding
+                self.cache.put(keys[position], embedding)
+        return embeddings
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache():
+    """The process-wide embedding cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = EmbeddingCache()
+        return _cache
+
+
+def get_embedder(name=EMBEDDER, cached=True):
+    """Embedding backend by name ("local" or "openai"), behind the shared cache unless cached is False"""
+    if name == "local":
+        embedder = LocalEmbedder()
+    elif name == "openai":
+        embedder = RemoteEmbedder()
+    else:
+        raise ValueError(f"Unknown embedder '{name}'; use 'local' or 'openai'")
+    return CachedEmbedder(embedder, get_embedding_cache()) if cached else embedder
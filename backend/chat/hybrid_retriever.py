@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+"""
+Hybrid retrieval for the chat agent: BM25 + vector search, fused and reranked.
+
+BM25Index keeps an in-process keyword index over the same ./data corpus the
+Pathway vector store indexes (rebuilt when files there change). HybridRetriever
+runs both searches, merges them with reciprocal rank fusion and reorders the
+fused candidates with a cross-encoder, whose score lets the agent accept or
+drop documents without an LLM grading call for each.
+"""
+
+import glob
+import json
+import math
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import NamedTuple
+from langchain_core.documents import Document
+from tracing import span
+
+DATA_PATH = "./data"
+CHUNK_WORDS = 250  # Roughly the 150-450 token chunks of the Pathway splitter
+CHUNK_OVERLAP = 50
+BM25_K1 = 1.5
+BM25_B = 0.75
+RRF_K = 60  # Reciprocal rank fusion constant
+CANDIDATES = 20  # Documents taken from each search before fusion
+TOP_K = 4  # Documents returned after reranking
+CORPUS_CHECK_INTERVAL = 10  # Seconds between checks of ./data for changed files
+RERANKER_MODEL = os.getenv("RERANKER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2")
+RERANK_MAX_FAILURES = 3  # Consecutive reranking errors before the reranker is switched off
+
+TOKEN_PATTERN = re.compile(r"\w+")
+STOPWORDS = frozenset(
+    "a an and are as at be by for from has have how i in is it its of on or that the this to was were what when where "
+    "which who why will with".split()
+)
+
+
+def tokenize(text):
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def chunk_text(text, chunk_words=CHUNK_WORDS, overlap=CHUNK_OVERLAP):
+    words = text.split()
+    step = chunk_words - overlap
+    return [" ".join(words[start:start + chunk_words]) for start in range(0, max(len(words) - overlap, 1), step)]
+
+
+class BM25Snapshot(NamedTuple):
+    """One build of the BM25 index; replaced as a whole, never modified"""
+    chunks: tuple
+    postings: dict
+    lengths: tuple
+    average_length: float
+
+
+class BM25Index:
+    """
+    Okapi BM25 over word chunks of the text files in data_path, plus one
+    document per Q&A pair in its qa_shards/*.jsonl.
+
+    Postings map each term to (chunk, term frequency) pairs, so a query only
+    touches the chunks that contain one of its terms. A rebuild publishes a new
+    BM25Snapshot in one assignment, so a concurrent search never mixes the
+    postings of one build with the chunk lengths of another.
+    """
+
+    def __init__(self, data_path=DATA_PATH):
+        self.data_path = data_path
+        self.snapshot = BM25Snapshot((), {}, (), 0)
+        self._file_state = None
+        self._checked_at = 0
+        self._lock = threading.Lock()
+
+    def _files(self):
+        paths = sorted(glob.glob(os.path.join(self.data_path, "*.txt")))
+        paths += sorted(glob.glob(os.path.join(self.data_path, "qa_shards", "*.jsonl")))
+        return paths, tuple((path, os.stat(path).st_mtime_ns) for path in paths)
+
+    @staticmethod
+    def _passages(path):
+        """Chunks of a text file, or the documents of a Q&A shard (one JSON record per line)"""
+        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+            if path.endswith(".jsonl"):
+                return [json.loads(line)["text"] for line in f if line.strip()]
+            return chunk_text(f.read())
+
+    def refresh(self):
+        """Rebuild the index if files were added, removed or changed; returns True if it was rebuilt"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            paths, file_state = self._files()
+            if file_state == self._file_state:
+                return False
+            chunks, postings, lengths = [], {}, []
+            for path in paths:
+                for position, text in enumerate(self._passages(path)):
+                    terms = Counter(tokenize(text))
+                    chunk_id = len(chunks)
+                    for term, frequency in terms.items():
+                        postings.setdefault(term, []).append((chunk_id, frequency))
+                    chunks.append(Document(page_content=text, metadata={"path": path, "chunk": position}))
+                    lengths.append(sum(terms.values()))
+            average_length = sum(lengths) / len(lengths) if lengths else 0
+            self.snapshot = BM25Snapshot(tuple(chunks), postings, tuple(lengths), average_length)
+            self._file_state = file_state
+        print(f"BM25 index built over {len(chunks)} chunks from {len(paths)} files in {self.data_path}")
+        return True
+
+    def search(self, query, k=CANDIDATES):
+        """Top k chunks for the query as (Document, score), best first"""
+        if time.monotonic() - self._checked_at >= CORPUS_CHECK_INTERVAL:
+            self.refresh()
+        chunks, postings, lengths, average_length = self.snapshot
+        scores = Counter()
+        for term in set(tokenize(query)):
+            matches = postings.get(term)
+            if not matches:
+                continue
+            idf = math.log(1 + (len(chunks) - len(matches) + 0.5) / (len(matches) + 0.5))
+            for chunk_id, frequency in matches:
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * lengths[chunk_id] / average_length)
+                scores[chunk_id] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        return [(chunks[chunk_id], score) for chunk_id, score in scores.most_common(k)]
+
+
+def document_key(document):
+    """Identity of a chunk across retrievers (they split the same files differently, so by text)"""
+    return " ".join(document.page_content.split())[:500]
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """Merge ranked document lists: score = sum of 1 / (k + rank) over the lists a document is in"""
+    fused = {}
+    for name, documents in rankings.items():
+        for rank, document in enumerate(documents, start=1):
+            key = document_key(document)
+            if key not in fused:
+                fused[key] = {"document": document, "score": 0.0, "retrievers": []}
+            elif name in fused[key]["retrievers"]:
+                continue  # Same text twice in one list (e.g. duplicate files) counts once
+            fused[key]["score"] += 1 / (k + rank)
+            fused[key]["retrievers"].append(name)
+    return sorted(fused.values(), key=lambda entry: entry["score"], reverse=True)
+
+
+class CrossEncoderReranker:
+    """Scores (question, passage) pairs with a local cross-encoder; loaded on first use"""
+
+    def __init__(self, model_name=RERANKER_MODEL):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        with self._lock:
+            if self._model is None:
+                from sentence_transformers import CrossEncoder
+                self._model = CrossEncoder(self.model_name)
+            return self._model
+
+    def score(self, question, documents):
+        return [float(score) for score in self.model.predict([(question, document.page_content) for document in documents])]
+
+
+class HybridRetriever:
+    """
+    BM25 and vector search fused with RRF, then reranked.
+
+    Either side may be missing or fail (no Pathway server, or no text files
+    yet); the other still answers. Without a usable reranker the fused order is
+    kept and documents carry no rerank_score. A reranking error only affects
+    that call; the reranker is switched off when its model cannot be loaded or
+    after RERANK_MAX_FAILURES consecutive errors.
+    """
+
+    def __init__(self, vector_retriever=None, bm25_index=None, reranker=None, top_k=TOP_K, candidates=CANDIDATES):
+        self.vector_retriever = vector_retriever
+        self.bm25_index = bm25_index
+        self.reranker = reranker
+        self.top_k = top_k
+        self.candidates = candidates
+        self.rerank_failures = 0
+
+    def invoke(self, question):
+        rankings = {}
+        if self.vector_retriever is not None:
+            try:
+                with span("retriever:vector", "retriever") as vector_span:
+                    rankings["vector"] = self.vector_retriever.invoke(question)
+                    vector_span.set(documents=len(rankings["vector"]))
+            except Exception as e:
+                print(f"Error during vector retrieval: {e}")
+        if self.bm25_index is not None:
+            try:
+                with span("retriever:bm25", "retriever") as bm25_span:
+                    rankings["bm25"] = [document for document, _ in self.bm25_index.search(question, self.candidates)]
+                    bm25_span.set(documents=len(rankings["bm25"]))
+            except Exception as e:
+                print(f"Error during BM25 retrieval: {e}")
+
+        fused = reciprocal_rank_fusion(rankings)[:self.candidates]
+        documents = []
+        for entry in fused:
+            metadata = dict(entry["document"].metadata, retrievers=entry["retrievers"], rrf_score=round(entry["score"], 5))
+            documents.append(Document(page_content=entry["document"].page_content, metadata=metadata))
+
+        if self.reranker is not None and documents:
+            try:
+                with span("retriever:rerank", "retriever", documents=len(documents)):
+                    scores = self.reranker.score(question, documents)
+            except (ImportError, OSError) as e:
+                # sentence-transformers missing or the model could not be loaded: no point retrying
+                print(f"Reranker unavailable, keeping fused order from now on: {e}")
+                self.reranker = None
+            except Exception as e:
+                self.rerank_failures += 1
+                print(f"Reranking failed ({self.rerank_failures} in a row), keeping fused order: {e}")
+                if self.rerank_failures >= RERANK_MAX_FAILURES:
+                    print("Switching the reranker off")
+                    self.reranker = None
+            else:
+                self.rerank_failures = 0
+                for document, score in zip(documents, scores):
+                    document.metadata["rerank_score"] = score
+                documents.sort(key=lambda document: document.metadata["rerank_score"], reverse=True)
+        return documents[:self.top_k]
@@ -247,7 +247,7 @@
 #      Based on the user's question, determine if accessing current live cricket match data
 #      would provide relevant information to help answer the question.
 
-#      Live Match Data Description: The data contains real-time information about an ongoing cricket match including:
+#      Live Match Data Description: The data contains real-time information about the ongoing cricket match(es) including:
 #      - Current score, run rate, wickets, and overs
 #      - Details about current batsmen (runs, balls faced, strike rate)
 #      - Details about current bowlers (wickets, economy, overs)
@@ -758,6 +758,10 @@ and combines results with vector retrieval for the LLM generation.
 import os
 import time
 import sys
+import json
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 # Use Pydantic V1 specifically if needed, or just BaseModel if V2 is okay
 from pydantic.v1 import BaseModel as PydanticBaseModelV1, Field
@@ -772,8 +776,8 @@ from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.pydantic_v1 import BaseModel as LangchainBaseModelV1
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.documents import Document # Ensure Document is imported
+from langchain_core.tools import StructuredTool
 from langchain_openai import ChatOpenAI
-from langchain import hub
 from langgraph.graph import END, StateGraph, START
 from typing_extensions import TypedDict
 
@@ -785,6 +789,9 @@ from websearch import web_search
 
 # SQL Database Setup Import
 import sql_setup # Import the setup script
+import stats_queries # Prepared stats queries offered as tools
+from hybrid_retriever import HybridRetriever, BM25Index, CrossEncoderReranker, CANDIDATES, tokenize
+from tracing import span, traced, traced_invoke, llm_tracing_handler
 
 # Live Cricket Match Data Import
 from live_match_processor import LiveMatchRelevanceChecker, is_query_about_live_match
@@ -816,7 +823,8 @@ DB_NAME = os.getenv("DB_NAME", "quicksell_rag")
 # === Initialize Database ===
 print("Initializing PostgreSQL database connection...")
 # The setup_database function returns the engine
-sql_engine = sql_setup.setup_database(csv_filepath='deliveries.csv')
+# Reuse the engine if the API (or anything else in this process) already set the database up
+sql_engine = sql_setup.engine or sql_setup.setup_database(csv_filepath='deliveries.csv')
 if sql_engine is None:
     print("FATAL: Database setup failed. Exiting.")
     sys.exit(1)
@@ -828,30 +836,38 @@ print("-" * 30)
 # === Pathway Client and Retriever Setup ===
 
 print("Setting up Pathway client and LangChain retriever...")
-print(f"Attempting to connect to Pathway server at {PATHWAY_HOST}:{PATHWAY_PORT}...")
-
-# Allow a moment for the server to potentially be ready if just started
-time.sleep(5)
-
-retriever = None # Initialize retriever
+vector_retriever = None # Initialize retriever
 try:
-    # Create LangChain retriever via PathwayVectorClient
+    # Create LangChain retriever via PathwayVectorClient (no request is made until it is used)
     vectorstore_client_lc = PathwayVectorClient(PATHWAY_HOST, PATHWAY_PORT)
-    retriever = vectorstore_client_lc.as_retriever()
+    vector_retriever = vectorstore_client_lc.as_retriever(search_kwargs={"k": CANDIDATES})
     print("LangChain Pathway retriever created.")
-
-    # Test the retriever (optional check)
-    test_question = "self-RAG"
-    print(f"\nTesting Pathway retriever with question: '{test_question}'")
-    relevant_docs_vector = retriever.invoke(test_question) # Use invoke for LCEL compatibility
-    print(f"Retrieved {len(relevant_docs_vector)} documents from Pathway for test question.")
-
 except Exception as e:
     print(f"\n--- WARNING ---")
-    print(f"Error connecting to or interacting with Pathway server at {PATHWAY_HOST}:{PATHWAY_PORT}: {e}")
+    print(f"Error creating Pathway client for {PATHWAY_HOST}:{PATHWAY_PORT}: {e}")
     print("Pathway Vector Store retrieval will be unavailable.")
-    # Allow continuation without vector store if needed, or exit:
-    # sys.exit(1)
+
+# Keyword search over the same corpus fused with the vector results, then reranked
+retriever = HybridRetriever(
+    vector_retriever=vector_retriever,
+    bm25_index=BM25Index(os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")),
+    reranker=CrossEncoderReranker()
+)
+
+def probe_retriever(test_question="self-RAG"):
+    """Check that the Pathway server answers; returns True if a test query succeeds"""
+    if vector_retriever is None:
+        return False
+    print(f"Testing Pathway retriever at {PATHWAY_HOST}:{PATHWAY_PORT} with question: '{test_question}'")
+    try:
+        relevant_docs_vector = vector_retriever.invoke(test_question) # Use invoke for LCEL compatibility
+        print(f"Retrieved {len(relevant_docs_vector)} documents from Pathway for test question.")
+        return True
+    except Exception as e:
+        print(f"\n--- WARNING ---")
+        print(f"Error interacting with Pathway server at {PATHWAY_HOST}:{PATHWAY_PORT}: {e}")
+        print("Pathway Vector Store retrieval will be unavailable.")
+        return False
 
 print("-" * 30)
 
@@ -873,11 +889,12 @@ print("Defining LangGraph components (Graders, Generators, Rewriter, SQL Helpers
 
 # --- LLM Instances ---
 # Use consistent models where appropriate
-llm_grader = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-llm_sql_helper = ChatOpenAI(model="gpt-4o-mini", temperature=0)
-llm_rewrite = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+# Every call is recorded as a span of the question's trace (see tracing.py)
+llm_grader = ChatOpenAI(model="gpt-4o-mini", temperature=0, callbacks=[llm_tracing_handler])
+llm_sql_helper = ChatOpenAI(model="gpt-4o-mini", temperature=0, callbacks=[llm_tracing_handler])
+llm_rewrite = ChatOpenAI(model="gpt-4o-mini", temperature=0, callbacks=[llm_tracing_handler])
 # Keep potentially different model for main generation if intended
-llm_generate = ChatOpenAI(model_name="gpt-3.5-turbo", temperature=0)
+llm_generate = ChatOpenAI(model_name="gpt-3.5-turbo", temperature=0, callbacks=[llm_tracing_handler])
 
 # --- Grade Documents (Vector Store Relevance) ---
 class GradeDocuments(LangchainBaseModelV1):
@@ -895,7 +912,12 @@ grade_prompt = ChatPromptTemplate.from_messages(
 retrieval_grader = grade_prompt | structured_llm_grader_docs
 
 # --- Generate Answer ---
-prompt_generate = hub.pull("rlm/rag-prompt")
+# Vendored copy of the "rlm/rag-prompt" hub prompt, so startup needs no network round trip
+RAG_PROMPT_TEMPLATE = """You are an assistant for question-answering tasks. Use the following pieces of retrieved context to answer the question. If you don't know the answer, just say that you don't know. Use three sentences maximum and keep the answer concise.
+Question: {question} 
+Context: {context} 
+Answer:"""
+prompt_generate = ChatPromptTemplate.from_messages([("human", RAG_PROMPT_TEMPLATE)])
 def format_docs(docs: List[Document]) -> str:
     return "\n\n".join(doc.page_content for doc in docs if hasattr(doc, 'page_content') and doc.page_content)
 rag_chain = prompt_generate | llm_generate | StrOutputParser()
@@ -984,6 +1006,53 @@ sql_query_generator_prompt = ChatPromptTemplate.from_messages(
 )
 sql_query_generator = sql_query_generator_prompt | llm_sql_helper | StrOutputParser()
 
+# --- Prepared Stats Tools (tried before SQL generation) ---
+stats_tool_router_system = """You answer IPL cricket statistics questions by calling tools that run prepared queries on ball-by-ball data.
+     Call the tool (or tools) that exactly answer the question, passing player and team names as the user wrote them.
+     If no tool covers the question (for example it asks for rankings, specific matches or anything other than
+     the records the tools return), do not call any tool and reply with 'none'.
+     """
+stats_tool_router_prompt = ChatPromptTemplate.from_messages(
+    [("system", stats_tool_router_system), ("human", "User question: \n\n {question}")]
+)
+_stats_tools = None
+_stats_tools_lock = threading.Lock()
+
+
+def get_stats_tools():
+    """
+    Return (router, tools by name), built on first use.
+
+    Stats are answered in memory from the columnar deliveries index when it loads,
+    otherwise by the database; head-to-head questions go to the precomputed matchup
+    tables, which include over-phase splits. Both are process-wide singletons the API
+    loads at startup, so building the tools here reuses them rather than reading
+    deliveries.csv again when this module is imported.
+    """
+    global _stats_tools
+    with _stats_tools_lock:
+        if _stats_tools is None:
+            try:
+                from src.deliveries_index import get_deliveries_index
+                stats_functions = get_deliveries_index().stats_functions()
+                print("Stats tools use the in-memory deliveries index.")
+            except Exception as e:
+                print(f"Deliveries index unavailable ({e}); stats tools query the database.")
+                stats_functions = stats_queries.STATS_FUNCTIONS
+            try:
+                from src.matchups import get_matchup_tables
+                matchup_functions = get_matchup_tables().matchup_functions()
+                stats_functions = [
+                    func for func in stats_functions if func.__name__ not in ("batter_vs_bowler_stats", "team_vs_team_stats")
+                ] + list(matchup_functions)
+                print("Matchup tools use the precomputed matchup tables.")
+            except Exception as e:
+                print(f"Matchup tables unavailable ({e}); head-to-head questions use the stats queries.")
+            stats_tools = [StructuredTool.from_function(func) for func in stats_functions]
+            router = stats_tool_router_prompt | llm_sql_helper.bind_tools(stats_tools)
+            _stats_tools = (router, {tool.name: tool for tool in stats_tools})
+        return _stats_tools
+
 # --- Live Match Data Relevance Checker ---
 class GradeMatchDataRelevance(LangchainBaseModelV1):
     """Binary score to assess if the live match data would be relevant for answering a question."""
@@ -995,7 +1064,7 @@ match_relevance_checker_system = """You are an expert at determining whether liv
      Based on the user's question, determine if accessing current live cricket match data
      would provide relevant information to help answer the question.
 
-     Live Match Data Description: The data contains real-time information about an ongoing cricket match including:
+     Live Match Data Description: The data contains real-time information about the ongoing cricket match(es) including:
      - Current score, run rate, wickets, and overs
      - Details about current batsmen (runs, balls faced, strike rate)
      - Details about current bowlers (wickets, economy, overs)
@@ -1036,6 +1105,8 @@ class GraphState(TypedDict):
         live_match_relevant: Boolean flag indicating if live match data is relevant.
         tried_web_search: Boolean flag indicating if web search has been attempted.
         search_results: Dictionary containing web search results information.
+        speculative_search: SpeculativeSearch started alongside retrieval, if any.
+        web_searches: Number of web searches started for this question (speculative ones included).
     """
     question: str
     generation: str
@@ -1044,9 +1115,189 @@ class GraphState(TypedDict):
     live_match_relevant: bool
     tried_web_search: bool
     search_results: Dict[str, Any]
+    speculative_search: Any
+    web_searches: int
+
+# --- Speculative Web Search ---
+
+# When local sources look unlikely to answer, start the web search alongside
+# retrieval instead of after grading and generation have failed
+SPECULATIVE_WEB_SEARCH = os.getenv("SPECULATIVE_WEB_SEARCH", "false").lower() == "true"
+# Top BM25 score over the local corpus at which local sources count as likely to answer
+SPECULATION_BM25_SCORE = float(os.getenv("SPECULATION_BM25_SCORE", "8"))
+# Web searches (speculative or fallback) allowed per question
+WEB_SEARCH_MAX_PER_QUESTION = int(os.getenv("WEB_SEARCH_MAX_PER_QUESTION", "2"))
+
+speculation_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="speculative-search")
+
+
+class SpeculationMetrics:
+    """How often speculative web searches are started, used or cancelled"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {"started": 0, "skipped_confident": 0, "skipped_budget": 0, "used": 0, "cancelled": 0, "abandoned": 0}
+        self.head_start_s = 0.0
+
+    def record(self, outcome, head_start_s=0.0):
+        with self._lock:
+            self.counts[outcome] += 1
+            self.head_start_s += head_start_s
+
+    def snapshot(self):
+        with self._lock:
+            resolved = self.counts["used"] + self.counts["cancelled"] + self.counts["abandoned"]
+            return dict(
+                self.counts,
+                enabled=SPECULATIVE_WEB_SEARCH,
+                payoff_rate=round(self.counts["used"] / resolved, 3) if resolved else None,
+                # Search time already done when the answer needed it, summed over used speculations
+                head_start_s=round(self.head_start_s, 3)
+            )
+
+
+speculation_metrics = SpeculationMetrics()
+
+
+def get_speculation_metrics():
+    return speculation_metrics.snapshot()
+
+
+# Speculative searches started by the graph run in this context (see invoke_agent)
+_run_speculations = contextvars.ContextVar("run_speculations", default=None)
+
+
+class SpeculativeSearch:
+    """
+    A web search running on speculation_executor, used by web_search_node or
+    cancelled once local documents pass grading. invoke_agent abandons one the
+    run ended without resolving (another route to an answer, an error).
+    """
+
+    def __init__(self, question):
+        self.question = question
+        self.cancel_event = threading.Event()
+        self.resolved = False
+        self.started_at = time.perf_counter()
+        self.finished_at = None
+        # Run in a copy of this context, so the search shows up as a span of the question's trace
+        self.future = speculation_executor.submit(contextvars.copy_context().run, self._run)
+        started = _run_speculations.get()
+        if started is not None:
+            started.append(self)
+
+    def _run(self):
+        try:
+            with span("web:speculative_search", "web"):
+                return web_search({"question": self.question, "documents": []}, self.cancel_event)
+        finally:
+            self.finished_at = time.perf_counter()
+
+    def use(self):
+        """Wait for the search and return its result"""
+        needed_at = time.perf_counter()
+        result = self.future.result()
+        self.resolved = True
+        speculation_metrics.record("used", min(needed_at, self.finished_at) - self.started_at)
+        print(f"Using speculative web search started {needed_at - self.started_at:.2f}s before it was needed")
+        return result
+
+    def cancel(self):
+        """Drop the search: never started if still queued, otherwise stopped at its next Tavily call"""
+        self._stop("cancelled")
+
+    def abandon(self):
+        """Stop the search if the run ended without using or cancelling it"""
+        if not self.resolved:
+            print("Graph run ended with the speculative web search unresolved; cancelling it")
+            self._stop("abandoned")
+
+    def _stop(self, outcome):
+        self.cancel_event.set()
+        self.future.cancel()
+        self.resolved = True
+        speculation_metrics.record(outcome)
+
+
+_name_tokens = None
+
+
+def local_name_tokens():
+    """Words of the player and team names in the database, e.g. "kohli" or "indians" (empty without a database)"""
+    global _name_tokens
+    if _name_tokens is None:
+        try:
+            names = stats_queries.known_names()
+            _name_tokens = {token for name in names["player"] + names["team"] for token in tokenize(name) if len(token) >= 4}
+        except Exception as e:
+            print(f"Player and team names unavailable for speculation: {e}")
+            _name_tokens = set()
+    return _name_tokens
+
+
+def local_sources_likely(question):
+    """Cheap guess, without an LLM call, at whether local sources can answer: names from the database or a strong BM25 match"""
+    if set(tokenize(question)) & local_name_tokens():
+        return True
+    if retriever.bm25_index is None:
+        return False
+    hits = retriever.bm25_index.search(question, 1)
+    return bool(hits) and hits[0][1] >= SPECULATION_BM25_SCORE
+
+
+def maybe_start_speculative_search(state):
+    """Start a speculative web search for the question if enabled, not yet done and local sources look weak; returns the state updates"""
+    if not SPECULATIVE_WEB_SEARCH or state.get("speculative_search") is not None or state.get("tried_web_search"):
+        return {}
+    question = state["question"]
+    if local_sources_likely(question):
+        speculation_metrics.record("skipped_confident")
+        return {}
+    web_searches = state.get("web_searches", 0)
+    if web_searches >= WEB_SEARCH_MAX_PER_QUESTION:
+        speculation_metrics.record("skipped_budget")
+        return {}
+    print("Local sources look unlikely to answer; starting a speculative web search")
+    speculation_metrics.record("started")
+    return {"speculative_search": SpeculativeSearch(question), "web_searches": web_searches + 1}
 
 # --- Node Functions ---
 
+def run_stats_tools(question: str):
+    """
+    Answer a stats question with the prepared query tools.
+
+    Returns a Document with the tool results, or None if no tool fits the
+    question or every tool call failed (the caller then falls back to SQL generation).
+    """
+    try:
+        stats_tool_router, stats_tools_by_name = get_stats_tools()
+        message = stats_tool_router.invoke({"question": question})
+    except Exception as e:
+        print(f"Error choosing a stats tool: {e}")
+        return None
+
+    results = []
+    for call in message.tool_calls:
+        tool = stats_tools_by_name.get(call["name"])
+        if tool is None:
+            continue
+        try:
+            with span(f"sql:{call['name']}", "sql", args=json.dumps(call["args"])):
+                output = tool.invoke(call["args"])
+        except Exception as e:
+            print(f"Stats tool {call['name']} failed: {e}")
+            continue
+        results.append(f"{call['name']}({json.dumps(call['args'])}):\n{json.dumps(output, indent=2, default=str)}")
+    if not results:
+        return None
+
+    print(f"Answered from prepared stats queries: {[call['name'] for call in message.tool_calls]}")
+    return Document(
+        page_content=f"Answer to your question {question}:\nStatistics from the deliveries database:\n\n" + "\n\n".join(results),
+        metadata={"source": "sql_database", "tools": [call["name"] for call in message.tool_calls]}
+    )
+
 def retrieve_node(state: GraphState) -> Dict[str, Any]:
     """
     Retrieve documents from retriever, SQL DB (if relevant), and live match data (if relevant).
@@ -1059,25 +1310,26 @@ def retrieve_node(state: GraphState) -> Dict[str, Any]:
     print("---NODE: RETRIEVE---")
     question = state["question"]
     documents = []
+    speculation = maybe_start_speculative_search(state)
     
-    # Check if live match data is relevant
-    if has_live_match_data:
+    # Check if live match data is relevant (matches come and go, so check on every question)
+    if live_match_checker.check_for_live_data():
         # First check if query seems to be about live matches (quick check)
         if is_query_about_live_match(question, llm_grader):
             print("Query appears to be about live cricket. Getting match data...")
-            match_doc = live_match_checker.get_match_data_document()
-            if match_doc:
-                documents.append(match_doc)
-                return {"documents": documents, "live_match_relevant": True}
+            match_docs = live_match_checker.get_match_data_documents()
+            if match_docs:
+                documents.extend(match_docs)
+                return {"documents": documents, "live_match_relevant": True, **speculation}
         
         # If not obvious, use more advanced classifier
         match_relevance = match_relevance_checker.invoke({"question": question})
         if match_relevance.binary_score.lower() == "yes":
             print(f"Live match data relevant: {match_relevance.explanation}")
-            match_doc = live_match_checker.get_match_data_document()
-            if match_doc:
-                documents.append(match_doc)
-                return {"documents": documents, "live_match_relevant": True}
+            match_docs = live_match_checker.get_match_data_documents()
+            if match_docs:
+                documents.extend(match_docs)
+                return {"documents": documents, "live_match_relevant": True, **speculation}
     
     # SQL DB Relevance check
     if sql_engine is not None:
@@ -1085,50 +1337,53 @@ def retrieve_node(state: GraphState) -> Dict[str, Any]:
         if db_relevance.binary_score.lower() == "yes":
             print(f"SQL DB relevant: {db_relevance.explanation}")
             
-            # Generate and execute SQL query
-            sql_query = sql_query_generator.invoke({"question": question})
-            print(f"Generated SQL Query: {sql_query}")
+            # Common stats questions are answered by the prepared queries
+            stats_document = run_stats_tools(question)
+            if stats_document is not None:
+                documents.append(stats_document)
+            else:
+                # Generate and execute SQL query
+                sql_query = sql_query_generator.invoke({"question": question})
+                print(f"Generated SQL Query: {sql_query}")
             
-            try:
-                # Execute the SQL query
-                with sql_engine.connect() as connection:
-                    result = connection.execute(text(sql_query))
-                    column_names = result.keys()
-                    rows = result.fetchall()
+                try:
+                    # Execute the SQL query
+                    with span("sql:generated_query", "sql", query=sql_query) as sql_span, sql_setup.connection() as connection:
+                        result = connection.execute(text(sql_query))
+                        column_names = result.keys()
+                        rows = result.fetchall()
+                        sql_span.set(rows=len(rows))
                 
-                # Format the results as a string
-                result_string = f"Answer to your question {question}:\n"
-                result_string += f"SQL Query Results:\n"
-                result_string += f"Query: {sql_query}\n\n"
+                    # Format the results as a string
+                    result_string = f"Answer to your question {question}:\n"
+                    result_string += f"SQL Query Results:\n"
+                    result_string += f"Query: {sql_query}\n\n"
                 
-                # Add column headers
-                result_string += " | ".join(column_names) + "\n"
-                result_string += "-" * 50 + "\n"
+                    # Add column headers
+                    result_string += " | ".join(column_names) + "\n"
+                    result_string += "-" * 50 + "\n"
                 
-                # Add rows
-                for row in rows:
-                    result_string += " | ".join(str(cell) for cell in row) + "\n"
+                    # Add rows
+                    for row in rows:
+                        result_string += " | ".join(str(cell) for cell in row) + "\n"
                 
-                # Create Document from SQL results
-                sql_document = Document(
-                    page_content=result_string,
-                    metadata={"source": "sql_database", "query": sql_query}
-                )
-                documents.append(sql_document)
+                    # Create Document from SQL results
+                    sql_document = Document(
+                        page_content=result_string,
+                        metadata={"source": "sql_database", "query": sql_query}
+                    )
+                    documents.append(sql_document)
                 
-            except Exception as e:
-                print(f"Error executing SQL query: {e}")
+                except Exception as e:
+                    print(f"Error executing SQL query: {e}")
     
-    # Use vector store retrieval 
-    if retriever is not None:
-        try:
-            # Use vector retrieval for remaining document retrieval
-            vector_docs = retriever.invoke(question)
-            documents.extend(vector_docs)
-        except Exception as e:
-            print(f"Error during vector retrieval: {e}")
+    # Use hybrid (BM25 + vector) retrieval 
+    try:
+        documents.extend(retriever.invoke(question))
+    except Exception as e:
+        print(f"Error during retrieval: {e}")
     
-    return {"documents": documents, "live_match_relevant": False}
+    return {"documents": documents, "live_match_relevant": False, **speculation}
 
 
 def generate_node(state: GraphState) -> Dict[str, Any]:
@@ -1172,6 +1427,12 @@ def generate_node(state: GraphState) -> Dict[str, Any]:
     return {"generation": generation}
 
 
+# Cross-encoder scores (logits) above which a document is kept without grading,
+# and below which it is dropped; at most GRADE_TOP_N scored documents in between are LLM-graded
+RERANK_ACCEPT_SCORE = float(os.getenv("RERANK_ACCEPT_SCORE", "3"))
+RERANK_REJECT_SCORE = float(os.getenv("RERANK_REJECT_SCORE", "-4"))
+GRADE_TOP_N = int(os.getenv("GRADE_TOP_N", "3"))
+
 def grade_documents_node(state: GraphState) -> Dict[str, Any]:
     """
     Grade the retrieved documents and determine relevance.
@@ -1201,9 +1462,31 @@ def grade_documents_node(state: GraphState) -> Dict[str, Any]:
         else:
             docs_to_grade.append(doc)
     
-    # Grade the remaining documents
+    # Reranked documents are accepted or dropped on their score; the uncertain
+    # ones get an LLM grading call, the best GRADE_TOP_N of them only. Unscored
+    # documents (web results, or everything when the reranker is unavailable)
+    # are all graded, as there is no score to cap them by.
     relevant_docs_to_grade = []
+    uncertain_docs = []
+    unscored_docs = []
     for doc in docs_to_grade:
+        score = doc.metadata.get("rerank_score")
+        if score is None:
+            unscored_docs.append(doc)
+        elif score >= RERANK_ACCEPT_SCORE:
+            relevant_docs_to_grade.append(doc)
+        elif score >= RERANK_REJECT_SCORE:
+            uncertain_docs.append(doc)
+    uncertain_docs.sort(key=lambda doc: doc.metadata["rerank_score"], reverse=True)
+    overflow = uncertain_docs[GRADE_TOP_N:]
+    docs_for_llm = uncertain_docs[:GRADE_TOP_N] + unscored_docs
+    rejected = len(docs_to_grade) - len(relevant_docs_to_grade) - len(uncertain_docs) - len(unscored_docs)
+    print(f"Reranker accepted {len(relevant_docs_to_grade)} and rejected {rejected}, grading {len(docs_for_llm)} with the LLM")
+    if overflow:
+        print(f"Dropping {len(overflow)} uncertain documents past GRADE_TOP_N={GRADE_TOP_N} without grading: "
+              f"{[(doc.metadata.get('source'), round(doc.metadata['rerank_score'], 2)) for doc in overflow]}")
+
+    for doc in docs_for_llm:
         grade = retrieval_grader.invoke(
             {"question": question, "document": doc.page_content}
         )
@@ -1213,6 +1496,12 @@ def grade_documents_node(state: GraphState) -> Dict[str, Any]:
     # Combine valid docs (ungraded) with relevant graded docs
     all_relevant_docs = valid_docs + relevant_docs_to_grade
     
+    # Local documents passed grading: a speculative web search is not needed
+    speculation = state.get("speculative_search")
+    if all_relevant_docs and speculation is not None and not speculation.resolved:
+        print("Local documents passed grading; cancelling the speculative web search")
+        speculation.cancel()
+    
     return {"documents": all_relevant_docs}
 
 
@@ -1419,7 +1708,9 @@ def initialize_state():
         "iterations": 0,
         "live_match_relevant": False,
         "tried_web_search": False,
-        "search_results": {}
+        "search_results": {},
+        "speculative_search": None,
+        "web_searches": 0
     }
 
 print("LangGraph state and nodes defined.")
@@ -1432,13 +1723,13 @@ def compile_graph():
     
     workflow = StateGraph(GraphState)
     
-    # Add nodes
-    workflow.add_node("retrieve", retrieve_node)
-    workflow.add_node("grade_documents", grade_documents_node)
-    workflow.add_node("transform_query", transform_query_node)
-    workflow.add_node("generate", generate_node)
-    workflow.add_node("grade_generation", grade_generation_node)
-    workflow.add_node("web_search", web_search_node)  # Add web search node
+    # Add nodes (each one timed as a span, see tracing.py)
+    workflow.add_node("retrieve", traced("node:retrieve", "node", retrieve_node))
+    workflow.add_node("grade_documents", traced("node:grade_documents", "node", grade_documents_node))
+    workflow.add_node("transform_query", traced("node:transform_query", "node", transform_query_node))
+    workflow.add_node("generate", traced("node:generate", "node", generate_node))
+    workflow.add_node("grade_generation", traced("node:grade_generation", "node", grade_generation_node))
+    workflow.add_node("web_search", traced("node:web_search", "node", web_search_node))  # Add web search node
     
     # Define edges
     workflow.set_entry_point("retrieve")
@@ -1447,7 +1738,7 @@ def compile_graph():
     # Add conditional edge for grade_documents
     workflow.add_conditional_edges(
         "grade_documents",
-        decide_to_generate_edge,
+        traced("edge:decide_to_generate", "edge", decide_to_generate_edge),
         {
             "transform_query": "transform_query",
             "generate": "generate",
@@ -1460,7 +1751,7 @@ def compile_graph():
     workflow.add_edge("generate", "grade_generation")
     workflow.add_conditional_edges(
         "grade_generation",
-        grade_generation_edge,
+        traced("edge:grade_generation", "edge", grade_generation_edge),  # Runs the hallucination and answer graders
         {
             "useful": END,
             "generate": "generate",
@@ -1475,19 +1766,37 @@ def compile_graph():
     return app
 
 # === Run the Agent ===
+def invoke_agent(app, inputs, config=None):
+    """
+    Run the compiled graph on inputs inside a trace (see tracing.traced_invoke).
+    Speculative web searches the run leaves unresolved, whichever way it ends,
+    are cancelled so they do not keep running on speculation_executor.
+    """
+    speculations = []
+    token = _run_speculations.set(speculations)
+    try:
+        return traced_invoke(app, inputs, config)
+    finally:
+        _run_speculations.reset(token)
+        for speculation in speculations:
+            speculation.abandon()
+
+
 def run_agent(app, initial_question: str):
     """Run the agent with the compiled graph on an initial question."""
     inputs = initialize_state()
     inputs["question"] = initial_question
     
     # Execute the graph
-    result = app.invoke(inputs)
+    result = invoke_agent(app, inputs)
     
     # Return the final answer
     return result["generation"]
 
 
 if __name__ == "__main__":
+    probe_retriever()
+
     # Ensure database is set up and engine is available
     if not sql_engine:
         print("Cannot proceed without a valid database connection.")
@@ -1561,8 +1870,18 @@ def web_search_node(state: GraphState) -> Dict[str, Any]:
         print("Web search already attempted, skipping to avoid loops.")
         return {}
     
-    # Run web search function from websearch.py
-    search_result = web_search(state)
+    # Use the speculative search started during retrieval, if it is still live
+    speculation = state.get("speculative_search")
+    web_searches = state.get("web_searches", 0)
+    if speculation is not None and not speculation.resolved:
+        search_result = speculation.use()
+    elif web_searches >= WEB_SEARCH_MAX_PER_QUESTION:
+        print(f"Web search budget of {WEB_SEARCH_MAX_PER_QUESTION} per question used up, skipping.")
+        return {"tried_web_search": True}
+    else:
+        # Run web search function from websearch.py
+        search_result = web_search(state)
+        web_searches += 1
     
     # Extract and return the results
     web_documents = search_result.get("documents", [])
@@ -1574,5 +1893,6 @@ def web_search_node(state: GraphState) -> Dict[str, Any]:
     return {
         "documents": web_documents,
         "search_results": web_search_results,
-        "tried_web_search": tried_web_search
+        "tried_web_search": tried_web_search,
+        "web_searches": web_searches
     }
\ No newline at end of file
@@ -43,7 +43,8 @@ try:
 
     logger.info("Importing LangGraph agent components...")
     # This import will define components and might try Pathway connection
-    from langgraph_agent_sql import compile_graph, GraphState, retriever, initialize_state # Import necessary parts
+    from langgraph_agent_sql import compile_graph, GraphState, retriever, initialize_state, invoke_agent # Import necessary parts
+    from tracing import metrics_summary
 
     # --- Compile the LangGraph Agent ---
     logger.info("Compiling LangGraph agent...")
@@ -116,33 +117,15 @@ async def ask_agent(request: QueryRequest):
         final_state_snapshot = {} # To capture the final state pieces
 
         logger.info("Invoking LangGraph agent...")
-        final_state_snapshot = compiled_app.invoke(inputs, {"recursion_limit": 15})
+        final_state_snapshot = invoke_agent(compiled_app, inputs, {"recursion_limit": 15})
         logger.info("Agent invocation complete.")
 
-        # --- Start Debugging Block ---
-        # Log the type and content of the returned state
-        logger.info(f"[DEBUG] Type of final_state_snapshot: {type(final_state_snapshot)}")
+        # A short summary only; spans and timings go to the trace exporter (see tracing.py)
         if isinstance(final_state_snapshot, dict):
-            logger.info(f"[DEBUG] Keys in final_state_snapshot: {list(final_state_snapshot.keys())}")
-            # Attempt to log the full dictionary structure carefully
-            import json
-            try:
-                # Convert Documents to string representations for logging if present
-                loggable_state = {}
-                for key, value in final_state_snapshot.items():
-                    if key == 'documents' and isinstance(value, list):
-                        loggable_state[key] = [f"Document(page_content='{str(doc.page_content)[:100]}...', metadata={doc.metadata})" for doc in value]
-                    else:
-                        loggable_state[key] = value
-
-                logger.info(f"[DEBUG] Full final_state_snapshot (loggable):\n{json.dumps(loggable_state, indent=2, default=str)}")
-            except Exception as log_err:
-                logger.error(f"[DEBUG] Error creating loggable state: {log_err}")
-                logger.info(f"[DEBUG] Raw final_state_snapshot: {final_state_snapshot}") # Log raw as fallback
+            logger.debug(f"Final state keys: {list(final_state_snapshot.keys())}, "
+                         f"documents: {len(final_state_snapshot.get('documents') or [])}")
         else:
-            logger.info(f"[DEBUG] final_state_snapshot is not a dict: {final_state_snapshot}")
-        # --- End Debugging Block ---
-
+            logger.debug(f"Final state is not a dict: {type(final_state_snapshot)}")
 
         # Extract the final answer
         final_answer = None
@@ -168,6 +151,11 @@ async def ask_agent(request: QueryRequest):
         logger.exception(f"Error during agent execution for question '{question}': {e}")
         raise HTTPException(status_code=500, detail=f"An error occurred while processing the question: {str(e)}")
 
+@api.get("/metrics", summary="Agent Latency Metrics")
+async def agent_metrics():
+    """p50/p95 latency, tokens and cache hits per graph node and LLM/SQL/retriever/web call."""
+    return {"spans": metrics_summary()}
+
 # --- Run the API using Uvicorn ---
 if __name__ == "__main__":
     # Use port 8001 to avoid conflict with Pathway (default 8000)
@@ -5,8 +5,11 @@ and loads initial data from deliveries.csv.
 """
 
 import os
+import threading
+from collections import deque
+from contextlib import contextmanager, asynccontextmanager
 import pandas as pd
-from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, MetaData, Table, text
+from sqlalchemy import create_engine, event, exc, Column, Integer, String, Float, Boolean, Index, MetaData, Table, text
 from sqlalchemy.orm import sessionmaker, declarative_base
 from dotenv import load_dotenv
 import psycopg2
@@ -27,8 +30,16 @@ DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "5432")
 DB_NAME = os.getenv("DB_NAME", "quicksell_rag") # Use a distinct name if needed
 
-# Global engine variable
+# Connection pool settings; size the pool to the concurrent chat load using pool_metrics()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))  # Seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))  # Seconds before a connection is replaced
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() in ("1", "true", "yes")
+
+# Global engine variables
 engine = None
+async_engine = None
 metadata = MetaData()
 
 # Define Deliveries table structure (globally accessible)
@@ -55,6 +66,167 @@ deliveries_table = Table(
     Column('fielder', String, nullable=True) # Allow NULLs
 )
 
+# Indexes behind the prepared stats queries in stats_queries.py
+Index('ix_deliveries_batter_bowler', deliveries_table.c.batter, deliveries_table.c.bowler)
+Index('ix_deliveries_bowler', deliveries_table.c.bowler)
+Index('ix_deliveries_batting_team', deliveries_table.c.batting_team)
+Index('ix_deliveries_bowling_team', deliveries_table.c.bowling_team)
+Index('ix_deliveries_player_dismissed', deliveries_table.c.player_dismissed)
+
+
+def pool_options():
+    """Keyword arguments for create_engine / create_async_engine"""
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+class PoolMetrics:
+    """
+    Counters for one engine's connection pool, fed by SQLAlchemy pool events
+    and by connection() / async_connection(), which time each checkout.
+
+    Checkout time includes waiting for a free connection and the pre-ping.
+    """
+
+    def __init__(self, max_samples=1000):
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=max_samples)
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.peak_checked_out = 0
+        self.new_connections = 0
+        self.invalidations = 0
+        self.timeouts = 0
+
+    def attach(self, sync_engine):
+        @event.listens_for(sync_engine, "connect")
+        def on_connect(dbapi_connection, connection_record):
+            with self._lock:
+                self.new_connections += 1
+
+        @event.listens_for(sync_engine, "checkout")
+        def on_checkout(dbapi_connection, connection_record, connection_proxy):
+            pool = sync_engine.pool
+            checked_out = pool.checkedout()
+            with self._lock:
+                self.checkouts += 1
+                self.peak_checked_out = max(self.peak_checked_out, checked_out)
+                if checked_out > pool.size():
+                    self.overflow_checkouts += 1
+
+        @event.listens_for(sync_engine, "invalidate")
+        def on_invalidate(dbapi_connection, connection_record, exception):
+            with self._lock:
+                self.invalidations += 1
+
+    def record_wait(self, seconds):
+        with self._lock:
+            self._waits.append(seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self, sync_engine):
+        pool = sync_engine.pool
+        with self._lock:
+            waits = sorted(self._waits)
+            return {
+                "pool_size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "peak_checked_out": self.peak_checked_out,
+                "checkouts": self.checkouts,
+                "overflow_checkouts": self.overflow_checkouts,
+                "new_connections": self.new_connections,
+                "invalidations": self.invalidations,
+                "timeouts": self.timeouts,
+                "checkout_wait_ms": {
+                    "samples": len(waits),
+                    "mean": round(sum(waits) / len(waits) * 1000, 3) if waits else None,
+                    "p95": round(waits[min(len(waits) - 1, int(0.95 * len(waits)))] * 1000, 3) if waits else None,
+                    "max": round(waits[-1] * 1000, 3) if waits else None
+                }
+            }
+
+
+engine_metrics = PoolMetrics()
+async_engine_metrics = PoolMetrics()
+
+
+@contextmanager
+def connection():
+    """Check a connection out of the shared pool, recording how long the checkout took"""
+    start = time.perf_counter()
+    try:
+        conn = engine.connect()
+    except exc.TimeoutError:
+        engine_metrics.record_timeout()
+        raise
+    engine_metrics.record_wait(time.perf_counter() - start)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def get_async_engine():
+    """
+    Async engine on the same database with the same pool settings (needs asyncpg).
+
+    Returns None if asyncpg is not installed.
+    """
+    global async_engine
+    if async_engine is None:
+        try:
+            from sqlalchemy.ext.asyncio import create_async_engine
+            import asyncpg  # noqa: F401
+        except ImportError as e:
+            print(f"Async database engine unavailable: {e}")
+            return None
+        async_engine = create_async_engine(
+            f"postgresql+asyncpg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}",
+            **pool_options()
+        )
+        async_engine_metrics.attach(async_engine.sync_engine)
+    return async_engine
+
+
+@asynccontextmanager
+async def async_connection():
+    """Async counterpart of connection()"""
+    async_db = get_async_engine()
+    if async_db is None:
+        raise RuntimeError("Async database engine unavailable (install asyncpg)")
+    start = time.perf_counter()
+    try:
+        conn = await async_db.connect()
+    except exc.TimeoutError:
+        async_engine_metrics.record_timeout()
+        raise
+    async_engine_metrics.record_wait(time.perf_counter() - start)
+    try:
+        yield conn
+    finally:
+        await conn.close()
+
+
+def pool_metrics():
+    """Pool metrics of the sync engine and, if it was created, the async engine"""
+    metrics = {
+        "settings": pool_options(),
+        "sync": engine_metrics.snapshot(engine) if engine is not None else None,
+        "async": async_engine_metrics.snapshot(async_engine.sync_engine) if async_engine is not None else None
+    }
+    return metrics
+
+
 def create_database_if_not_exists():
     """Creates the PostgreSQL database if it doesn't exist."""
     max_attempts = 5
@@ -130,7 +302,8 @@ def setup_database(csv_filepath='deliveries.csv'):
 
     try:
         print(f"Connecting to database: {DB_NAME}...")
-        engine = create_engine(DATABASE_URL)
+        engine = create_engine(DATABASE_URL, **pool_options())
+        engine_metrics.attach(engine)
 
         # Test connection
         with engine.connect() as connection:
@@ -194,6 +367,11 @@ def setup_database(csv_filepath='deliveries.csv'):
         finally:
             session.close()
 
+        # Tables created before the indexes were defined get them here
+        for index in deliveries_table.indexes:
+            index.create(engine, checkfirst=True)
+        print(f"Indexes on '{deliveries_table.name}' ensured.")
+
         print("Database setup completed.")
         return engine
 
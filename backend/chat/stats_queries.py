@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+Prepared statistics queries over the 'deliveries' table.
+
+Each query is a parameterized, single-pass aggregate: the rows for one player,
+pairing or team are read once (through the indexes created in sql_setup) and
+every figure is computed in that pass with FILTER clauses. The chat agent calls
+these as structured tools, so common stats questions need no generated SQL.
+"""
+
+import threading
+from sqlalchemy import text
+import sql_setup
+from src.deliveries_index import match_name, rate
+
+# Deliveries that count as a ball faced by the batter / bowled by the bowler
+BALL_FACED = "extras_type IS DISTINCT FROM 'wides'"
+BALL_BOWLED = "(extras_type IS NULL OR extras_type NOT IN ('wides', 'noballs'))"
+# Runs charged to the bowler (byes, leg byes and penalties are not)
+CHARGED_TO_BOWLER = "(extras_type IS NULL OR extras_type NOT IN ('byes', 'legbyes', 'penalty'))"
+# Dismissals credited to the bowler
+BOWLER_WICKET = "is_wicket AND dismissal_kind NOT IN ('run out', 'retired hurt', 'retired out', 'obstructing the field')"
+
+# Overs are 0-based in deliveries.csv: powerplay 1-6, middle 7-15, death 16-20
+PHASE = """CASE WHEN "over" < 6 THEN 'powerplay' WHEN "over" < 15 THEN 'middle' ELSE 'death' END"""
+PHASES = ("powerplay", "middle", "death")
+
+# Match ids increase through the competition, so a season is a range of match ids
+FIRST_MATCH_ID = 0
+LAST_MATCH_ID = 2**31 - 1
+
+# A batter can be dismissed off a ball faced by the partner (run out at the non-striker's
+# end), so dismissals are counted over every row naming the player, not only their balls
+PLAYER_BATTING = text(f"""
+    SELECT
+        COUNT(DISTINCT (match_id, inning)) FILTER (WHERE batter = :player) AS innings,
+        COALESCE(SUM(batsman_runs) FILTER (WHERE batter = :player), 0) AS runs,
+        COUNT(*) FILTER (WHERE batter = :player AND {BALL_FACED}) AS balls,
+        COUNT(*) FILTER (WHERE player_dismissed = :player) AS dismissals,
+        COUNT(*) FILTER (WHERE batter = :player AND batsman_runs = 4) AS fours,
+        COUNT(*) FILTER (WHERE batter = :player AND batsman_runs = 6) AS sixes,
+        COUNT(*) FILTER (WHERE batter = :player AND batsman_runs = 0 AND {BALL_FACED}) AS dot_balls
+    FROM deliveries
+    WHERE batter = :player OR player_dismissed = :player
+""")
+
+PLAYER_BOWLING = text(f"""
+    SELECT
+        COUNT(DISTINCT (match_id, inning)) AS innings,
+        COUNT(*) FILTER (WHERE {BALL_BOWLED}) AS balls,
+        COALESCE(SUM(total_runs) FILTER (WHERE {CHARGED_TO_BOWLER}), 0) AS runs_conceded,
+        COUNT(*) FILTER (WHERE {BOWLER_WICKET}) AS wickets,
+        COUNT(*) FILTER (WHERE total_runs = 0) AS dot_balls,
+        COUNT(*) FILTER (WHERE batsman_runs IN (4, 6)) AS boundaries_conceded
+    FROM deliveries
+    WHERE bowler = :player
+""")
+
+BATTER_VS_BOWLER = text(f"""
+    SELECT
+        COUNT(DISTINCT match_id) AS matches,
+        COALESCE(SUM(batsman_runs), 0) AS runs,
+        COUNT(*) FILTER (WHERE {BALL_FACED}) AS balls,
+        COUNT(*) FILTER (WHERE player_dismissed = :batter AND {BOWLER_WICKET}) AS dismissals,
+        COUNT(*) FILTER (WHERE batsman_runs = 0 AND {BALL_FACED}) AS dot_balls,
+        COUNT(*) FILTER (WHERE batsman_runs = 4) AS fours,
+        COUNT(*) FILTER (WHERE batsman_runs = 6) AS sixes
+    FROM deliveries
+    WHERE batter = :batter AND bowler = :bowler
+""")
+
+TEAM_VS_TEAM = text(f"""
+    SELECT
+        COUNT(DISTINCT match_id) AS matches,
+        COALESCE(SUM(total_runs) FILTER (WHERE batting_team = :team), 0) AS team_runs,
+        COUNT(*) FILTER (WHERE batting_team = :team AND {BALL_BOWLED}) AS team_balls,
+        COUNT(*) FILTER (WHERE batting_team = :team AND is_wicket) AS team_wickets_lost,
+        COALESCE(SUM(total_runs) FILTER (WHERE batting_team = :opponent), 0) AS opponent_runs,
+        COUNT(*) FILTER (WHERE batting_team = :opponent AND {BALL_BOWLED}) AS opponent_balls,
+        COUNT(*) FILTER (WHERE batting_team = :opponent AND is_wicket) AS opponent_wickets_lost
+    FROM deliveries
+    WHERE (batting_team = :team AND bowling_team = :opponent)
+       OR (batting_team = :opponent AND bowling_team = :team)
+""")
+
+TEAM_TOTALS = text(f"""
+    SELECT
+        COUNT(DISTINCT match_id) AS matches,
+        COALESCE(SUM(total_runs) FILTER (WHERE batting_team = :team), 0) AS runs_scored,
+        COUNT(*) FILTER (WHERE batting_team = :team AND {BALL_BOWLED}) AS balls_faced,
+        COUNT(*) FILTER (WHERE batting_team = :team AND is_wicket) AS wickets_lost,
+        COUNT(*) FILTER (WHERE batting_team = :team AND batsman_runs = 4) AS fours,
+        COUNT(*) FILTER (WHERE batting_team = :team AND batsman_runs = 6) AS sixes,
+        COALESCE(SUM(total_runs) FILTER (WHERE bowling_team = :team), 0) AS runs_conceded,
+        COUNT(*) FILTER (WHERE bowling_team = :team AND {BALL_BOWLED}) AS balls_bowled,
+        COUNT(*) FILTER (WHERE bowling_team = :team AND is_wicket) AS wickets_taken
+    FROM deliveries
+    WHERE (batting_team = :team OR bowling_team = :team)
+      AND match_id BETWEEN :first_match_id AND :last_match_id
+""")
+
+
+def _phase_query(column, runs, balls, wickets, wicket_rows=None):
+    """Phase splits of the rows where column = :name; wicket_rows adds rows that only count for wickets"""
+    own = f"{column} = :name"
+    rows = own if wicket_rows is None else f"{own} OR {wicket_rows}"
+    return text(f"""
+        SELECT
+            {PHASE} AS phase,
+            COALESCE(SUM({runs}) FILTER (WHERE {own}), 0) AS runs,
+            COUNT(*) FILTER (WHERE {own} AND {balls}) AS balls,
+            COUNT(*) FILTER (WHERE {wickets}) AS wickets,
+            COUNT(*) FILTER (WHERE {own} AND total_runs = 0 AND {balls}) AS dot_balls,
+            COUNT(*) FILTER (WHERE {own} AND batsman_runs IN (4, 6)) AS boundaries
+        FROM deliveries
+        WHERE {rows}
+        GROUP BY 1
+    """)
+
+
+# Over-phase splits for each role a player or team can play
+PHASE_SPLITS = {
+    "batter": _phase_query("batter", "batsman_runs", BALL_FACED, "player_dismissed = :name", "player_dismissed = :name"),
+    "bowler": _phase_query("bowler", f"total_runs * ({CHARGED_TO_BOWLER})::int", BALL_BOWLED, BOWLER_WICKET),
+    "batting_team": _phase_query("batting_team", "total_runs", BALL_BOWLED, "is_wicket"),
+    "bowling_team": _phase_query("bowling_team", "total_runs", BALL_BOWLED, "is_wicket"),
+}
+
+_names = None
+_names_lock = threading.Lock()
+
+
+def known_names():
+    """Distinct player and team names, read once per process"""
+    global _names
+    with _names_lock:
+        if _names is None:
+            with sql_setup.connection() as connection:
+                players = connection.execute(text(
+                    "SELECT batter FROM deliveries UNION SELECT bowler FROM deliveries"
+                )).scalars().all()
+                teams = connection.execute(text(
+                    "SELECT batting_team FROM deliveries UNION SELECT bowling_team FROM deliveries"
+                )).scalars().all()
+            _names = {
+                "player": sorted(name for name in players if name),
+                "team": sorted(name for name in teams if name),
+            }
+        return _names
+
+
+def resolve_name(name, kind="player"):
+    """Map a name as a user would write it to the name stored in the table (see match_name)"""
+    return match_name(name, known_names()[kind], kind)
+
+
+def _run(query, **params):
+    with sql_setup.connection() as connection:
+        return [dict(row._mapping) for row in connection.execute(query, params)]
+
+
+def player_batting_stats(player: str) -> dict:
+    """Career batting record of a player: innings, runs, balls, dismissals, average, strike rate, fours, sixes and dot ball percentage."""
+    player = resolve_name(player)
+    stats = _run(PLAYER_BATTING, player=player)[0]
+    stats.update(
+        player=player,
+        average=rate(stats["runs"], stats["dismissals"]),
+        strike_rate=rate(stats["runs"], stats["balls"], 100),
+        dot_ball_pct=rate(stats["dot_balls"], stats["balls"], 100)
+    )
+    return stats
+
+
+def player_bowling_stats(player: str) -> dict:
+    """Career bowling record of a player: innings, balls, runs conceded, wickets, economy, average, strike rate and dot ball percentage."""
+    player = resolve_name(player)
+    stats = _run(PLAYER_BOWLING, player=player)[0]
+    stats.update(
+        player=player,
+        overs=f"{stats['balls'] // 6}.{stats['balls'] % 6}",
+        economy=rate(stats["runs_conceded"], stats["balls"], 6),
+        average=rate(stats["runs_conceded"], stats["wickets"]),
+        strike_rate=rate(stats["balls"], stats["wickets"]),
+        dot_ball_pct=rate(stats["dot_balls"], stats["balls"], 100)
+    )
+    return stats
+
+
+def batter_vs_bowler_stats(batter: str, bowler: str) -> dict:
+    """Head-to-head record of a batter against a bowler: runs, balls, dismissals, strike rate, dot ball percentage, fours and sixes."""
+    batter, bowler = resolve_name(batter), resolve_name(bowler)
+    stats = _run(BATTER_VS_BOWLER, batter=batter, bowler=bowler)[0]
+    stats.update(
+        batter=batter,
+        bowler=bowler,
+        strike_rate=rate(stats["runs"], stats["balls"], 100),
+        dot_ball_pct=rate(stats["dot_balls"], stats["balls"], 100)
+    )
+    return stats
+
+
+def team_vs_team_stats(team: str, opponent: str) -> dict:
+    """Head-to-head record between two teams: matches, and runs, balls, wickets lost and run rate for each side."""
+    team, opponent = resolve_name(team, "team"), resolve_name(opponent, "team")
+    stats = _run(TEAM_VS_TEAM, team=team, opponent=opponent)[0]
+    stats.update(
+        team=team,
+        opponent=opponent,
+        team_run_rate=rate(stats["team_runs"], stats["team_balls"], 6),
+        opponent_run_rate=rate(stats["opponent_runs"], stats["opponent_balls"], 6)
+    )
+    return stats
+
+
+def team_totals(team: str, first_match_id: int = FIRST_MATCH_ID, last_match_id: int = LAST_MATCH_ID) -> dict:
+    """Batting and bowling totals of a team, optionally limited to a range of match ids (such as one season): matches, runs scored and conceded, wickets, run rates, fours and sixes."""
+    team = resolve_name(team, "team")
+    stats = _run(TEAM_TOTALS, team=team, first_match_id=first_match_id, last_match_id=last_match_id)[0]
+    stats.update(
+        team=team,
+        run_rate=rate(stats["runs_scored"], stats["balls_faced"], 6),
+        economy=rate(stats["runs_conceded"], stats["balls_bowled"], 6)
+    )
+    return stats
+
+
+def phase_splits(name: str, role: str = "batter") -> dict:
+    """Powerplay (overs 1-6), middle (7-15) and death (16-20) splits for a player or team. role is one of batter, bowler, batting_team, bowling_team."""
+    if role not in PHASE_SPLITS:
+        raise ValueError(f"role must be one of {', '.join(PHASE_SPLITS)}")
+    name = resolve_name(name, "team" if role.endswith("_team") else "player")
+    rows = {row.pop("phase"): row for row in _run(PHASE_SPLITS[role], name=name)}
+    splits = {}
+    for phase in PHASES:
+        row = rows.get(phase, {"runs": 0, "balls": 0, "wickets": 0, "dot_balls": 0, "boundaries": 0})
+        row.update(
+            run_rate=rate(row["runs"], row["balls"], 6),
+            dot_ball_pct=rate(row["dot_balls"], row["balls"], 100)
+        )
+        splits[phase] = row
+    return {"name": name, "role": role, "phases": splits}
+
+
+# The prepared queries offered to the chat agent
+STATS_FUNCTIONS = (
+    player_batting_stats,
+    player_bowling_stats,
+    batter_vs_bowler_stats,
+    team_vs_team_stats,
+    team_totals,
+    phase_splits,
+)
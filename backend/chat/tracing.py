@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+"""
+Tracing for the chat agent.
+
+A trace covers one question. Inside it, span() records a timed span per graph
+node and edge and per retriever, SQL and web search call, and LLMTracingHandler
+records one per LLM call with its model and token counts. Spans nest through a
+context variable, so work started from a node becomes its child (pass
+contextvars.copy_context() along to other threads).
+
+Every finished span feeds LatencyMetrics, which /api/chat/metrics reports as
+p50/p95 per span name. Finished traces are also exported when
+AGENT_TRACE_EXPORTER is set:
+    json  one JSON line per trace appended to AGENT_TRACE_FILE
+    otlp  OpenTelemetry spans over OTLP (configured by the OTEL_* variables)
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+AGENT_TRACE_EXPORTER = os.getenv("AGENT_TRACE_EXPORTER", "none")
+AGENT_TRACE_FILE = os.getenv("AGENT_TRACE_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), "traces", "agent_traces.jsonl"))
+TRACE_SAMPLES = 1000  # Durations kept per span name for the percentiles
+
+_current_span = contextvars.ContextVar("agent_current_span", default=None)
+
+
+class Span:
+    def __init__(self, name, kind, parent=None, attributes=None):
+        self.name = name
+        self.kind = kind
+        self.span_id = uuid.uuid4().hex[:16]
+        self.trace = parent.trace if parent is not None else None
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = dict(attributes or {})
+        self.start = time.time()
+        self._start_perf = time.perf_counter()
+        self.duration_ms = None
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def finish(self, error=None):
+        self.duration_ms = round((time.perf_counter() - self._start_perf) * 1000, 3)
+        if error is not None:
+            self.error = f"{type(error).__name__}: {error}"
+        metrics.record(self)
+        if self.trace is not None and self.trace is not self:
+            self.trace.add(self)
+
+    def to_dict(self):
+        return {
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "kind": self.kind,
+            "start": self.start,
+            "duration_ms": self.duration_ms,
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+
+class Trace(Span):
+    """Root span of one question; collects the spans finished under it (from any thread)"""
+
+    def __init__(self, name, attributes=None):
+        super().__init__(name, "trace", attributes=attributes)
+        self.trace = self
+        self.trace_id = uuid.uuid4().hex
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def finish(self, error=None):
+        super().finish(error)
+        export(self)
+
+    def to_dict(self):
+        with self._lock:
+            spans = [span.to_dict() for span in sorted(self.spans, key=lambda span: span.start)]
+        return dict(super().to_dict(), trace_id=self.trace_id, spans=spans)
+
+
+@contextmanager
+def trace(name, **attributes):
+    """Open a trace; spans opened inside it (in this context) belong to it"""
+    root = Trace(name, attributes)
+    token = _current_span.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.finish(e)
+        raise
+    else:
+        root.finish()
+    finally:
+        _current_span.reset(token)
+
+
+@contextmanager
+def span(name, kind="internal", **attributes):
+    """Time a block as a child of the current span (or on its own, for metrics only)"""
+    current = Span(name, kind, _current_span.get(), attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.finish(e)
+        raise
+    else:
+        current.finish()
+    finally:
+        _current_span.reset(token)
+
+
+def traced(name, kind, function):
+    """function wrapped in a span, e.g. a graph node or edge"""
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        with span(name, kind):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+def traced_invoke(app, inputs, config=None):
+    """Run the compiled graph on inputs inside a trace of the question"""
+    with trace("chat", question=inputs.get("question")) as root:
+        result = app.invoke(inputs, config)
+        if isinstance(result, dict):
+            root.set(documents=len(result.get("documents") or []), answered=bool(result.get("generation")))
+        return result
+
+
+class LLMTracingHandler(BaseCallbackHandler):
+    """LangChain callback recording a span per LLM call: model, tokens in/out and cached prompt tokens"""
+
+    def __init__(self):
+        self._spans = {}
+        self._lock = threading.Lock()
+
+    def _start(self, serialized, run_id, kwargs):
+        params = kwargs.get("invocation_params") or {}
+        model = params.get("model") or params.get("model_name") or ((serialized or {}).get("kwargs") or {}).get("model_name")
+        current = Span(f"llm:{model or 'unknown'}", "llm", _current_span.get(), {"model": model})
+        with self._lock:
+            self._spans[run_id] = current
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(serialized, run_id, kwargs)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(serialized, run_id, kwargs)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            current = self._spans.pop(run_id, None)
+        if current is None:
+            return
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        tokens_in, tokens_out = usage.get("prompt_tokens"), usage.get("completion_tokens")
+        cached = (usage.get("prompt_tokens_details") or {}).get("cached_tokens")
+        if tokens_in is None:
+            # Streaming and some providers only report usage on the message
+            message = getattr(response.generations[0][0], "message", None) if response.generations and response.generations[0] else None
+            usage_metadata = getattr(message, "usage_metadata", None) or {}
+            tokens_in, tokens_out = usage_metadata.get("input_tokens"), usage_metadata.get("output_tokens")
+        current.set(tokens_in=tokens_in, tokens_out=tokens_out, cached_tokens=cached, cache_hit=bool(cached))
+        current.finish()
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            current = self._spans.pop(run_id, None)
+        if current is not None:
+            current.finish(error)
+
+
+llm_tracing_handler = LLMTracingHandler()
+
+
+def _percentile(ordered, fraction):
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class LatencyMetrics:
+    """Recent durations, token and cache counts per span name"""
+
+    def __init__(self, samples=TRACE_SAMPLES):
+        self.samples = samples
+        self._lock = threading.Lock()
+        self._by_name = {}
+
+    def record(self, finished):
+        with self._lock:
+            entry = self._by_name.get(finished.name)
+            if entry is None:
+                entry = self._by_name[finished.name] = {
+                    "kind": finished.kind, "durations": deque(maxlen=self.samples), "count": 0, "errors": 0,
+                    "tokens_in": 0, "tokens_out": 0, "cache_lookups": 0, "cache_hits": 0
+                }
+            entry["durations"].append(finished.duration_ms)
+            entry["count"] += 1
+            entry["errors"] += finished.error is not None
+            entry["tokens_in"] += finished.attributes.get("tokens_in") or 0
+            entry["tokens_out"] += finished.attributes.get("tokens_out") or 0
+            if "cache_hit" in finished.attributes:
+                entry["cache_lookups"] += 1
+                entry["cache_hits"] += bool(finished.attributes["cache_hit"])
+
+    def summary(self):
+        with self._lock:
+            entries = {name: dict(entry, durations=sorted(entry["durations"])) for name, entry in self._by_name.items()}
+        summary = {}
+        for name, entry in sorted(entries.items(), key=lambda item: (item[1]["kind"], item[0])):
+            durations = entry.pop("durations")
+            summary[name] = dict(
+                entry,
+                p50_ms=_percentile(durations, 0.5),
+                p95_ms=_percentile(durations, 0.95),
+                max_ms=durations[-1],
+                cache_hit_ratio=round(entry["cache_hits"] / entry["cache_lookups"], 3) if entry["cache_lookups"] else None
+            )
+        return summary
+
+
+metrics = LatencyMetrics()
+
+
+def metrics_summary():
+    return metrics.summary()
+
+
+_export_lock = threading.Lock()
+_otel_tracer = None
+
+
+def _get_otel_tracer():
+    global _otel_tracer
+    if _otel_tracer is None:
+        from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
+        from opentelemetry.sdk.resources import Resource
+        from opentelemetry.sdk.trace import TracerProvider
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+        provider = TracerProvider(resource=Resource.create({"service.name": "cricket-chat-agent"}))
+        provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+        _otel_tracer = provider.get_tracer("cricket_commentary.chat")
+    return _otel_tracer
+
+
+def _export_otlp(root):
+    from opentelemetry import trace as otel_trace
+    from opentelemetry.trace import Status, StatusCode
+
+    tracer = _get_otel_tracer()
+    record = root.to_dict()
+    opened = {}
+    for item in [record] + record["spans"]:
+        parent = opened.get(item["parent_id"])
+        context = otel_trace.set_span_in_context(parent) if parent is not None else None
+        attributes = {key: value for key, value in item["attributes"].items() if isinstance(value, (str, bool, int, float))}
+        otel_span = tracer.start_span(item["name"], context=context, attributes=dict(attributes, kind=item["kind"]),
+                                      start_time=int(item["start"] * 1e9))
+        if item["error"]:
+            otel_span.set_status(Status(StatusCode.ERROR, item["error"]))
+        otel_span.end(end_time=int((item["start"] + item["duration_ms"] / 1000) * 1e9))
+        opened[item["span_id"]] = otel_span
+
+
+def export(root):
+    """Write a finished trace to the configured exporter; failures are reported, never raised"""
+    if AGENT_TRACE_EXPORTER == "none":
+        return
+    try:
+        if AGENT_TRACE_EXPORTER == "json":
+            line = json.dumps(root.to_dict(), default=str)
+            with _export_lock:
+                os.makedirs(os.path.dirname(AGENT_TRACE_FILE), exist_ok=True)
+                with open(AGENT_TRACE_FILE, "a", encoding="utf-8") as f:
+                    f.write(line + "\n")
+        elif AGENT_TRACE_EXPORTER == "otlp":
+            _export_otlp(root)
+        else:
+            print(f"Unknown AGENT_TRACE_EXPORTER '{AGENT_TRACE_EXPORTER}'; use none, json or otlp")
+    except Exception as e:
+        print(f"Could not export trace {root.trace_id}: {e}")
@@ -8,6 +8,7 @@ It should be run first and kept running in the background
 for the LangGraph agent to connect to.
 """
 
+import asyncio
 import os
 import re
 import time
@@ -27,6 +28,8 @@ from pathway.xpacks.llm import (
     splitters,
 )
 from pathway.udfs import DiskCache
+import numpy as np
+from embedding import get_embedder, get_embedding_cache, EMBEDDING_BATCH_SIZE
 
 # Pretty printing
 from pprint import pprint
@@ -133,6 +136,53 @@ def check_server_running(host: str, port: int) -> bool:
         return False
 
 
+# Batches of chunks embedded at once by the server, and how many may be in flight
+EMBEDDING_CAPACITY = int(os.getenv("EMBEDDING_CAPACITY", "4"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
+
+
+class PathwayEmbedder(embedders.BaseEmbedder):
+    """
+    Pathway embedder over an embedding.py backend.
+
+    The server embeds indexed chunks and incoming queries with this UDF, so both
+    go through the shared embedding cache. Like the built-in Pathway embedders it
+    is asynchronous and batched: Pathway hands it up to batch_size rows at once,
+    which are embedded with one embed_documents call (only the rows missing from
+    the cache reach the backend), with up to `capacity` batches in flight and
+    failed batches retried with exponential backoff.
+    """
+
+    def __init__(self, embedder, batch_size=EMBEDDING_BATCH_SIZE, capacity=EMBEDDING_CAPACITY,
+                 max_retries=EMBEDDING_MAX_RETRIES):
+        super().__init__(
+            executor=pw.udfs.async_executor(
+                capacity=capacity,
+                retry_strategy=pw.udfs.ExponentialBackoffRetryStrategy(max_retries=max_retries)
+            ),
+            deterministic=True,
+            max_batch_size=batch_size,
+        )
+        self.embedder = embedder
+
+    async def __wrapped__(self, inputs: list[str], **kwargs) -> list[np.ndarray]:
+        # The backends are synchronous; keep them off Pathway's event loop
+        embeddings = await asyncio.to_thread(self.embedder.embed_documents, inputs)
+        return [np.array(embedding) for embedding in embeddings]
+
+    def get_embedding_dimension(self, **kwargs):
+        return len(self.embedder.embed_query("."))
+
+
+class QARecordSchema(pw.Schema):
+    """One line of a Q&A shard written by vector_updater.py/cricket_vector_loader.py"""
+    text: str
+    metadata: pw.Json
+
+
+# Seconds between embedding cache reports while the server runs
+CACHE_STATS_INTERVAL = 300
+
 # === Main Execution Block ===
 
 def run_server():
@@ -169,18 +219,30 @@ def run_server():
         print("Please ensure the data directory exists and contains .txt files.")
         return None # Indicate failure
 
+    # Q&A pairs from the cricket_vector_loader.py arrive as JSONL shards, one document per line
+    qa_reader = pw.io.jsonlines.read(
+        path=f"{DATA_PATH}/qa_shards/*.jsonl",
+        schema=QARecordSchema,
+        mode="streaming",
+        refresh_interval=5,
+    )
+    qa_documents = qa_reader.select(
+        data=pw.apply_with_type(lambda text: text.encode("utf-8"), bytes, pw.this.text),
+        _metadata=pw.this.metadata,
+    )
+
     # List of data sources to be indexed
-    sources = [folder_reader]
+    sources = [folder_reader, qa_documents]
 
     # Define the document processing steps
     unstructured_parser = parsers.UnstructuredParser()
     token_splitter = splitters.TokenCountSplitter(min_tokens=150, max_tokens=450)
-    openai_embedder = embedders.OpenAIEmbedder(cache_strategy=DiskCache()) # Add caching
+    embedder = PathwayEmbedder(get_embedder()) # Selected by EMBEDDER, behind the embedding cache (see embedding.py)
 
     # Setup the VectorStoreServer
     vector_server = VectorStoreServer(
         *sources,
-        embedder=openai_embedder,
+        embedder=embedder,
         splitter=token_splitter,
         parser=unstructured_parser,
     )
@@ -209,7 +271,9 @@ if __name__ == "__main__":
         print("\nPathway server is running. Press Ctrl+C to stop.")
         try:
             # Keep the main thread alive to allow the server thread to run
-            server_thread.join()
+            while server_thread.is_alive():
+                server_thread.join(CACHE_STATS_INTERVAL)
+                print(f"Embedding cache: {get_embedding_cache().stats()}")
         except KeyboardInterrupt:
             print("\nStopping Pathway server...")
             # Note: Graceful shutdown of the Pathway server thread might require
@@ -1,24 +1,209 @@
+import contextvars
 import datetime
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
 from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain_core.messages import HumanMessage
 from langchain_core.tools import Tool
 from langchain_core.documents import Document
 from langchain.agents import AgentExecutor, create_openai_tools_agent
-from tavily import TavilyClient
-import os
+from tavily import MissingAPIKeyError
 from dotenv import load_dotenv
+from tracing import span, llm_tracing_handler
 
 # Load environment variables
 load_dotenv(override=True)
 
-# Initialize Tavily client
-tavily_client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+# Tavily responses are reused for this many seconds
+WEB_SEARCH_CACHE_TTL = int(os.getenv("WEB_SEARCH_CACHE_TTL", "900"))
+# Final agent answers are only cached when this is set (seconds; 0 disables)
+WEB_SEARCH_ANSWER_CACHE_TTL = int(os.getenv("WEB_SEARCH_ANSWER_CACHE_TTL", "0"))
+WEB_SEARCH_CACHE_DIR = os.getenv("WEB_SEARCH_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "websearch_cache"))
+# Budget of one search: agent steps (tool calls) and wall-clock seconds
+WEB_SEARCH_MAX_ITERATIONS = int(os.getenv("WEB_SEARCH_MAX_ITERATIONS", "4"))
+WEB_SEARCH_TIMEOUT = float(os.getenv("WEB_SEARCH_TIMEOUT", "30"))
+WEB_SEARCH_HTTP_TIMEOUT = 20  # Seconds per Tavily request
+WEB_SEARCH_POOL_SIZE = 8  # Keep-alive connections to the Tavily API
+WEB_SEARCH_MEMORY_CACHE_SIZE = 512  # Entries kept by the in-memory fallback cache
+# Tavily REST API, as documented at https://docs.tavily.com (Bearer key auth)
+TAVILY_API_URL = os.getenv("TAVILY_API_URL", "https://api.tavily.com")
+# What AgentExecutor answers when it runs out of budget; not worth caching
+BUDGET_EXHAUSTED_OUTPUT = "Agent stopped due to iteration limit or time limit."
+# Questions about what is happening right now; their searches and answers are never cached
+LIVE_QUERY_PATTERN = re.compile(
+    r"\b(now|live|current(ly)?|today|tonight|latest|ongoing|score(card)?|is batting|is bowling|at the crease|this over)\b"
+)
+
+
+class SearchCancelled(Exception):
+    """Raised at the next Tavily call of a search whose cancel event was set"""
+
+
+# Cancel event of the search running in the current context (see web_search)
+_cancel_event = contextvars.ContextVar("web_search_cancel_event", default=None)
+# Set while answering a live question, so its tool calls skip the cache too
+_live_search = contextvars.ContextVar("web_search_live", default=False)
+
+
+def _check_cancelled():
+    event = _cancel_event.get()
+    if event is not None and event.is_set():
+        raise SearchCancelled("Web search cancelled")
+
+
+def normalize_query(query):
+    """Cache identity of a query: case and runs of whitespace do not matter"""
+    return " ".join(str(query).lower().split())
+
+
+def is_live_query(query):
+    """Whether a query asks about the current state of play, which a cached result would get wrong"""
+    return bool(LIVE_QUERY_PATTERN.search(normalize_query(query)))
+
+
+def _use_cache(query):
+    return not _live_search.get() and not is_live_query(query)
+
+
+class WebSearchCache:
+    """
+    Tavily responses (and opted-in agent answers) with a TTL, kept in diskcache so they
+    survive restarts and are shared by worker processes. Without diskcache
+    installed they are only kept in memory, in an LRU of at most max_entries that
+    drops expired entries whenever one is added.
+    """
+
+    def __init__(self, directory=WEB_SEARCH_CACHE_DIR, ttl=WEB_SEARCH_CACHE_TTL, max_entries=WEB_SEARCH_MEMORY_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        try:
+            import diskcache
+            self._disk = diskcache.Cache(directory)
+        except ImportError:
+            print("diskcache is not installed; web search results are only cached in memory")
+            self._disk = None
+
+    def get(self, kind, key):
+        if self._disk is not None:
+            value = self._disk.get((kind, key))
+        else:
+            with self._lock:
+                expires_at, value = self._memory.get((kind, key), (0, None))
+                if expires_at < time.time():
+                    value = None
+                else:
+                    self._memory.move_to_end((kind, key))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, kind, key, value, ttl=None):
+        ttl = ttl or self.ttl
+        if self._disk is not None:
+            self._disk.set((kind, key), value, expire=ttl)
+        else:
+            now = time.time()
+            with self._lock:
+                for expired in [entry for entry, (expires_at, _) in self._memory.items() if expires_at < now]:
+                    del self._memory[expired]
+                self._memory[(kind, key)] = (now + ttl, value)
+                self._memory.move_to_end((kind, key))
+                while len(self._memory) > self.max_entries:
+                    self._memory.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "lookups": lookups,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+                "ttl_s": self.ttl
+            }
+
+
+class PooledTavilyClient:
+    """
+    Tavily search and extract over one requests.Session, so calls reuse
+    keep-alive connections (TavilyClient opens a new connection per request).
+    The URL, headers and proxy variables are those of the public REST API and of
+    TavilyClient's documented environment, not read from a TavilyClient instance.
+    """
+
+    def __init__(self, api_key=None):
+        api_key = api_key or os.getenv("TAVILY_API_KEY")
+        if not api_key:
+            raise MissingAPIKeyError()
+        self.base_url = TAVILY_API_URL
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json", "Authorization": f"Bearer {api_key}"})
+        proxies = {"http": os.getenv("TAVILY_HTTP_PROXY"), "https": os.getenv("TAVILY_HTTPS_PROXY")}
+        self.session.proxies.update({scheme: url for scheme, url in proxies.items() if url})
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=WEB_SEARCH_POOL_SIZE))
+
+    def _post(self, path, data):
+        response = self.session.post(self.base_url + path, json=data, timeout=WEB_SEARCH_HTTP_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
+
+    def search(self, query, max_results=5):
+        return self._post("/search", {"query": query, "search_depth": "basic", "max_results": max_results})
+
+    def extract(self, urls):
+        return self._post("/extract", {"urls": urls})
+
+
+_clients_lock = threading.Lock()
+_tavily_client = None
+_search_cache = None
+_search_agent = None
+
+
+def get_tavily_client():
+    global _tavily_client
+    with _clients_lock:
+        if _tavily_client is None:
+            _tavily_client = PooledTavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+        return _tavily_client
+
+
+def get_search_cache():
+    """The process-wide web search cache"""
+    global _search_cache
+    with _clients_lock:
+        if _search_cache is None:
+            _search_cache = WebSearchCache()
+        return _search_cache
+
 
 # Define Tavily search tool
 def tavily_search(query):
     """Search the web with Tavily Search API."""
-    response = tavily_client.search(query=query)
+    _check_cancelled()
+    cache = get_search_cache() if _use_cache(query) else None
+    key = normalize_query(query)
+    with span("web:tavily_search", "web") as search_span:
+        response = cache.get("search", key) if cache is not None else None
+        if cache is not None:
+            search_span.set(cache_hit=response is not None)
+        if response is None:
+            response = get_tavily_client().search(query)
+            if cache is not None:
+                cache.set("search", key, response)
     return response
 
 tavily_search_tool = Tool(
@@ -30,7 +215,17 @@ tavily_search_tool = Tool(
 # Define Tavily extract tool
 def tavily_extract(url):
     """Extract content from a webpage using Tavily Extract API."""
-    response = tavily_client.extract(urls=[url])
+    _check_cancelled()
+    cache = get_search_cache() if not _live_search.get() else None
+    key = str(url).strip()
+    with span("web:tavily_extract", "web") as extract_span:
+        response = cache.get("extract", key) if cache is not None else None
+        if cache is not None:
+            extract_span.set(cache_hit=response is not None)
+        if response is None:
+            response = get_tavily_client().extract([key])
+            if cache is not None:
+                cache.set("extract", key, response)
     return response
 
 tavily_extract_tool = Tool(
@@ -39,22 +234,22 @@ tavily_extract_tool = Tool(
     func=tavily_extract
 )
 
-def web_search(state):
+
+def get_search_agent():
     """
-    Perform web search using Tavily Search and extract content with Tavily Extract
+    The research agent, built once. Each run is capped at WEB_SEARCH_MAX_ITERATIONS
+    tool steps and WEB_SEARCH_TIMEOUT seconds; the date is filled in per call.
     """
-    print("---PERFORMING WEB SEARCH WITH TAVILY---")
-    question = state["question"]
-    documents = state["documents"]
-
-    try:
+    global _search_agent
+    with _clients_lock:
+        if _search_agent is not None:
+            return _search_agent
         tools = [tavily_search_tool, tavily_extract_tool]
-        agent_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+        agent_llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, callbacks=[llm_tracing_handler])
 
         # Set up Prompt with 'agent_scratchpad'
-        today = datetime.datetime.today().strftime("%B %d, %Y")
         prompt = ChatPromptTemplate.from_messages([
-            ("system", f"""You are a helpful research assistant, you will be given a query and you will need to
+            ("system", """You are a helpful research assistant, you will be given a query and you will need to
             search the web for the most relevant information then extract content to gain more insights.
             The date today is {today}. Keep your searches focused on gathering factual information to answer the query."""),
             MessagesPlaceholder(variable_name="messages"),
@@ -67,16 +262,57 @@ def web_search(state):
             prompt=prompt
         )
 
-        agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
+        _search_agent = AgentExecutor(
+            agent=agent,
+            tools=tools,
+            max_iterations=WEB_SEARCH_MAX_ITERATIONS,
+            max_execution_time=WEB_SEARCH_TIMEOUT,
+            early_stopping_method="force"
+        )
+        return _search_agent
+
+
+def web_search(state, cancel_event=None):
+    """
+    Perform web search using Tavily Search and extract content with Tavily Extract
+
+    Tavily results are cached (see tavily_search). Final answers are only cached
+    with WEB_SEARCH_ANSWER_CACHE_TTL set, per normalized question, so a repeated
+    fallback search skips the agent entirely. Questions about the live state of
+    play (is_live_query) never use the cache. Setting cancel_event stops the
+    search at its next Tavily call (the LLM step in flight finishes).
+    """
+    print("---PERFORMING WEB SEARCH WITH TAVILY---")
+    question = state["question"]
+    documents = state["documents"]
+    live = is_live_query(question)
+    token = _cancel_event.set(cancel_event)
+    live_token = _live_search.set(live)
 
-        response = agent_executor.invoke({"messages": [HumanMessage(content=question)]})
-        print("Agent search completed successfully")
+    try:
+        cache = get_search_cache() if WEB_SEARCH_ANSWER_CACHE_TTL > 0 and not live else None
+        key = normalize_query(question)
+        with span("web:search_agent", "web") as agent_span:
+            output_content = cache.get("answer", key) if cache is not None else None
+            cached = output_content is not None
+            if cache is not None:
+                agent_span.set(cache_hit=cached)
+            if cached:
+                print("Web search answer served from cache")
+            else:
+                _check_cancelled()
+                start = time.perf_counter()
+                today = datetime.datetime.today().strftime("%B %d, %Y")
+                response = get_search_agent().invoke({"messages": [HumanMessage(content=question)], "today": today})
+                print(f"Agent search completed in {time.perf_counter() - start:.2f}s")
 
-        output_content = response.get("output", "")
+                output_content = response.get("output", "")
+                if cache is not None and output_content and output_content != BUDGET_EXHAUSTED_OUTPUT:
+                    cache.set("answer", key, output_content, ttl=WEB_SEARCH_ANSWER_CACHE_TTL)
 
         web_doc = Document(
             page_content=output_content,
-            metadata={"source": "tavily_web_search", "query": question}
+            metadata={"source": "tavily_web_search", "query": question, "cached": cached}
         )
 
 
@@ -106,6 +342,10 @@ def web_search(state):
             "tried_web_search": True
         }
 
+    finally:
+        _live_search.reset(live_token)
+        _cancel_event.reset(token)
+
 # Main function for testing
 def main():
     # Initial state with empty documents
@@ -0,0 +1 @@
+# Lets tests under backend/tests import backend modules (jsonfileupdate, src.*) as the entry points do
@@ -1,78 +1,204 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-import json
-import time
-import requests
-from bs4 import BeautifulSoup
-import json
-
-
-def connect(match_id):
-  options = Options()
-  options.add_argument("--headless")
-  options.add_argument("--disable-gpu")
-  options.add_argument("--no-sandbox")
-  options.add_argument("window-size=1920,1080")
-  options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36")
-
-  driver = webdriver.Chrome(options=options)
-  json_url = "https://www.espncricinfo.com/matches/engine/match/{0}.json".format(match_id)
-  driver.get(json_url)
-  time.sleep(1)
-  raw_json = driver.find_element("tag name", "pre").text
-  driver.quit()
-  data = json.loads(raw_json)
-  return data
-
-def update_live_matches():
-  print(f"Running update at {time.strftime('%Y-%m-%d %H:%M:%S')}")
-  response = requests.request(url="http://static.cricinfo.com/rss/livescores.xml", method="GET")
-  xml = BeautifulSoup(response.text, 'xml')
-  print(xml)
-  
-  live_list_id = []
-  try:
-    xml = BeautifulSoup(response.text, 'xml')
-    matches = [x.link.text.split(".html")[0].split('/')[6] for x in xml.find_all('item')]
-    for j in matches:
-      data = connect(j)
-      if data['series'][0]['series_short_name'] == 'IPL' and data['match']['current_summary'].split()[-2:] != ['Match','over']:
-        live_list_id.append(j)
-    print(f"Live matches found: {live_list_id}")
-  except Exception as e:
-    print(f"Error fetching matches: {e}")
-    return
-
-  try:
-    with open("data_live.json", "r") as file:
-      data = json.load(file)
-  except (FileNotFoundError, json.JSONDecodeError):
-    print("Creating new data_live.json file")
-    data = {}
-
-  keys_to_remove = [i for i in data.keys() if i not in live_list_id]
-
-  for key in keys_to_remove:
-    data.pop(key)
-
-  for j in live_list_id:
-    data[j] = connect(j)
-    
-  with open("data_live.json", "w") as file:
-    json.dump(data, file)
-  
-  print(f"Update completed. Next update in {UPDATE_INTERVAL} seconds.\n")
-
-# Main execution loop
-UPDATE_INTERVAL = 2
-
-if __name__ == "__main__":
-  print("Starting continuous update script. Press Ctrl+C to stop.")
-  try:
-    while True:
-      update_live_matches()
-      time.sleep(UPDATE_INTERVAL)
-  except KeyboardInterrupt:
-    print("\nScript stopped by user. Exiting...")
-  except Exception as e:
-    print(f"\nUnexpected error occurred: {e}")
\ No newline at end of file
+import asyncio
+import json
+import os
+import random
+import time
+from urllib.parse import urlparse
+
+import httpx
+from bs4 import BeautifulSoup
+
+from src.live_store import get_store
+from src.live_events import DeltaFeed, get_event_log
+
+# Feed and match endpoints can be pointed at a local stub server for testing
+RSS_URL = os.environ.get("CRICINFO_RSS_URL", "http://static.cricinfo.com/rss/livescores.xml")
+MATCH_JSON_URL = os.environ.get("CRICINFO_MATCH_URL", "https://www.espncricinfo.com/matches/engine/match/{0}.json")
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/123.0.0.0 Safari/537.36"
+
+UPDATE_INTERVAL = 2
+REQUEST_TIMEOUT = 10
+MAX_CONNECTIONS = 20
+MIN_HOST_INTERVAL = 0.1  # Minimum seconds between requests to the same host
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def http2_available():
+  """HTTP/2 needs the optional h2 package"""
+  try:
+    import h2  # noqa: F401
+    return True
+  except ImportError:
+    return False
+
+
+def create_client():
+  """Pooled keep-alive client shared by every request of the scraper"""
+  return httpx.AsyncClient(
+    http2=http2_available(),
+    timeout=REQUEST_TIMEOUT,
+    follow_redirects=True,
+    headers={"user-agent": USER_AGENT, "accept": "application/json, text/xml, */*"},
+    limits=httpx.Limits(max_connections=MAX_CONNECTIONS, max_keepalive_connections=MAX_CONNECTIONS),
+  )
+
+
+class HostRateLimiter:
+  """Space out requests to each host by at least min_interval seconds"""
+
+  def __init__(self, min_interval=MIN_HOST_INTERVAL):
+    self.min_interval = min_interval
+    self._locks = {}
+    self._next_slot = {}
+
+  async def wait(self, host):
+    lock = self._locks.setdefault(host, asyncio.Lock())
+    async with lock:
+      now = time.monotonic()
+      slot = max(now, self._next_slot.get(host, 0.0))
+      self._next_slot[host] = slot + self.min_interval
+    if slot > now:
+      await asyncio.sleep(slot - now)
+
+
+class ConditionalCache:
+  """Remember ETag / Last-Modified per URL so unchanged documents come back as 304s"""
+
+  def __init__(self):
+    self._entries = {}
+
+  def request_headers(self, url):
+    entry = self._entries.get(url)
+    if not entry:
+      return {}
+    headers = {}
+    if entry["etag"]:
+      headers["if-none-match"] = entry["etag"]
+    if entry["last_modified"]:
+      headers["if-modified-since"] = entry["last_modified"]
+    return headers
+
+  def store(self, url, response):
+    etag = response.headers.get("etag")
+    last_modified = response.headers.get("last-modified")
+    if etag or last_modified:
+      self._entries[url] = {"etag": etag, "last_modified": last_modified, "body": response.text}
+
+  def cached_body(self, url):
+    entry = self._entries.get(url)
+    return entry["body"] if entry else None
+
+
+class LiveScraper:
+  """Fetch the live feed and every candidate match JSON concurrently"""
+
+  def __init__(self, client, rate_limiter=None, cache=None, store=None):
+    self.client = client
+    self.store = store or get_store()
+    self.delta_feed = DeltaFeed(self.store, get_event_log(self.store.root))
+    self.rate_limiter = rate_limiter or HostRateLimiter()
+    self.cache = cache or ConditionalCache()
+
+  async def fetch_text(self, url):
+    """GET a URL with conditional headers, per-host rate limiting and jittered backoff"""
+    host = urlparse(url).netloc
+    for attempt in range(MAX_RETRIES + 1):
+      await self.rate_limiter.wait(host)
+      try:
+        response = await self.client.get(url, headers=self.cache.request_headers(url))
+        if response.status_code == 304:
+          body = self.cache.cached_body(url)
+          if body is not None:
+            return body
+        elif response.status_code not in RETRY_STATUS_CODES:
+          response.raise_for_status()
+          self.cache.store(url, response)
+          return response.text
+        error = f"HTTP {response.status_code}"
+      except httpx.TransportError as e:
+        error = str(e) or type(e).__name__
+      if attempt == MAX_RETRIES:
+        raise RuntimeError(f"Giving up on {url} after {MAX_RETRIES + 1} attempts: {error}")
+      delay = random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt))
+      print(f"Fetch of {url} failed ({error}), retrying in {delay:.2f}s")
+      await asyncio.sleep(delay)
+
+  async def fetch_match_ids(self):
+    """Match ids of everything in the Cricinfo live scores RSS feed"""
+    xml = BeautifulSoup(await self.fetch_text(RSS_URL), 'xml')
+    return [x.link.text.split(".html")[0].split('/')[6] for x in xml.find_all('item')]
+
+  async def fetch_match(self, match_id):
+    return json.loads(await self.fetch_text(MATCH_JSON_URL.format(match_id)))
+
+  async def fetch_live_matches(self):
+    """
+    Return {match_id: match JSON} for every live IPL match.
+
+    A match whose fetch failed keeps its previously stored payload, so a
+    transient error does not drop it from the store; only matches missing
+    from the feed itself go away.
+    """
+    match_ids = await self.fetch_match_ids()
+    results = await asyncio.gather(*(self.fetch_match(j) for j in match_ids), return_exceptions=True)
+    stored_ids = set(self.store.match_ids())
+
+    live_matches = {}
+    for match_id, data in zip(match_ids, results):
+      if isinstance(data, Exception):
+        print(f"Error fetching match {match_id}: {data}")
+        if match_id in stored_ids:
+          try:
+            live_matches[match_id] = self.store.read_match(match_id)
+            print(f"Keeping the last stored data for match {match_id}")
+          except (FileNotFoundError, json.JSONDecodeError) as e:
+            print(f"No stored data to keep for match {match_id}: {e}")
+        continue
+      if data['series'][0]['series_short_name'] == 'IPL' and data['match']['current_summary'].split()[-2:] != ['Match','over']:
+        live_matches[match_id] = data
+    return live_matches
+
+
+async def update_live_matches(scraper):
+  print(f"Running update at {time.strftime('%Y-%m-%d %H:%M:%S')}")
+  try:
+    data = await scraper.fetch_live_matches()
+    print(f"Live matches found: {list(data.keys())}")
+  except Exception as e:
+    print(f"Error fetching matches: {e}")
+    return
+
+  # Diff against the previous scrape before the shards are overwritten
+  events = scraper.delta_feed.process(data)
+  if events:
+    print(f"Logged {len(events)} events: {[e['type'] for e in events]}")
+
+  # One shard per match; only changed matches are rewritten
+  changed = scraper.store.write_matches(data)
+  if changed:
+    print(f"Updated matches: {changed}")
+  else:
+    print("No match changed, live store left untouched")
+
+  print(f"Update completed. Next update in {UPDATE_INTERVAL} seconds.\n")
+
+
+async def run_forever():
+  async with create_client() as client:
+    scraper = LiveScraper(client)
+    while True:
+      await update_live_matches(scraper)
+      await asyncio.sleep(UPDATE_INTERVAL)
+
+
+if __name__ == "__main__":
+  print("Starting continuous update script. Press Ctrl+C to stop.")
+  try:
+    asyncio.run(run_forever())
+  except KeyboardInterrupt:
+    print("\nScript stopped by user. Exiting...")
+  except Exception as e:
+    print(f"\nUnexpected error occurred: {e}")
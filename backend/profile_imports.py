@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+Import-time profile of the backend entry points
+===============================================
+
+Imports each entry point in a fresh interpreter under `python -X importtime`
+and records how long the import took and which top-level packages dominated.
+
+    python profile_imports.py                   # profile and print a table
+    python profile_imports.py --write           # also update perf/import_times.json
+    python profile_imports.py --check           # exit 1 if an entry point got slower
+                                                # than the tracked report allows
+
+The tracked report is perf/import_times.json. Generate it with --write in an
+environment with the backend requirements installed (pip install -r
+requirements.txt), and again after an intentional change to what an entry point
+imports. --write refuses to record entry points that failed to import, and
+--check fails on them, so a baseline from an incomplete environment cannot
+silently pass.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORT_FILE = os.path.join(BACKEND_DIR, "perf", "import_times.json")
+
+# Module imported for each entry point, run from the backend directory
+ENTRY_POINTS = {
+    "api": "app",
+    "commentary": "src.main",
+    "commentary_service": "src.commentary_service",
+    "live_updater": "jsonfileupdate",
+    "replay": "replay",
+}
+TOP_PACKAGES = 10
+RUNS = 3
+# Allowed slowdown against the tracked report before --check fails
+REGRESSION_TOLERANCE = 1.25
+REGRESSION_MIN_MS = 50
+
+
+def parse_importtime(stderr, module):
+    """
+    Parse -X importtime output for `import module`.
+
+    Returns (cumulative microseconds of the module import, {root package: self
+    microseconds}), attributing every submodule to its root package so e.g. all
+    of pandas.* shows up as "pandas".
+    """
+    cumulative_us = 0
+    packages = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative, name = line[len("import time:"):].split("|")
+        # Top-level imports have a single leading space, nested ones are indented
+        if not name.startswith("  ") and name.strip() == module:
+            cumulative_us = int(cumulative)
+        package = name.strip().split(".")[0]
+        packages[package] = packages.get(package, 0) + int(self_us)
+    return cumulative_us, packages
+
+
+def profile_entry_point(module):
+    """Import `module` in a fresh interpreter; returns timing details or an error"""
+    env = dict(os.environ, COMMENTARY_TTS="stub")
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    if result.returncode != 0:
+        error = [line for line in result.stderr.splitlines() if not line.startswith("import time:")]
+        return {"error": error[-1] if error else f"exit code {result.returncode}"}
+    cumulative_us, packages = parse_importtime(result.stderr, module)
+    top = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:TOP_PACKAGES]
+    return {
+        "wall_ms": round(wall_ms, 1),
+        "import_ms": round(cumulative_us / 1000, 1),
+        "top_packages_ms": {name: round(us / 1000, 1) for name, us in top}
+    }
+
+
+def profile(runs=RUNS):
+    """Profile every entry point, keeping the fastest of `runs` runs (least noisy)"""
+    results = {}
+    for name, module in ENTRY_POINTS.items():
+        best = None
+        for _ in range(runs):
+            result = profile_entry_point(module)
+            if "error" in result:
+                best = result
+                break
+            if best is None or result["import_ms"] < best["import_ms"]:
+                best = result
+        results[name] = dict(best, module=module)
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "entry_points": results
+    }
+
+
+def print_report(report):
+    print(f"Python {report['python']} on {report['platform']}")
+    for name, result in report["entry_points"].items():
+        if "error" in result:
+            print(f"\n{name} ({result['module']}): failed to import: {result['error']}")
+            continue
+        print(f"\n{name} ({result['module']}): import {result['import_ms']} ms, process {result['wall_ms']} ms")
+        for package, ms in result["top_packages_ms"].items():
+            print(f"    {ms:>10.1f} ms  {package}")
+
+
+def import_errors(report):
+    """Entry points of a report that failed to import"""
+    return [f"{name}: {result['error']}" for name, result in report["entry_points"].items() if "error" in result]
+
+
+def check_regressions(report, baseline):
+    """Entry points whose import got slower than the tracked report allows, failed, or are not tracked"""
+    regressions = [f"{error} (failed to import)" for error in import_errors(report)]
+    for name, result in report["entry_points"].items():
+        previous = baseline.get("entry_points", {}).get(name, {})
+        if "import_ms" not in result:
+            continue
+        if "import_ms" not in previous:
+            regressions.append(f"{name}: not in the tracked report; regenerate it with --write")
+            continue
+        allowed = max(previous["import_ms"] * REGRESSION_TOLERANCE, previous["import_ms"] + REGRESSION_MIN_MS)
+        if result["import_ms"] > allowed:
+            regressions.append(f"{name}: {result['import_ms']} ms (tracked {previous['import_ms']} ms)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile import time of the backend entry points")
+    parser.add_argument("--write", action="store_true", help=f"Update {os.path.relpath(REPORT_FILE, BACKEND_DIR)}")
+    parser.add_argument("--check", action="store_true", help="Fail if an entry point regressed against the tracked report")
+    parser.add_argument("--runs", type=int, default=RUNS)
+    args = parser.parse_args()
+
+    report = profile(args.runs)
+    print_report(report)
+
+    if args.check:
+        if not os.path.exists(REPORT_FILE):
+            print(f"\nNo tracked report at {REPORT_FILE}")
+            sys.exit(1)
+        with open(REPORT_FILE, "r") as f:
+            regressions = check_regressions(report, json.load(f))
+        if regressions:
+            print("\nImport time regressions:")
+            for regression in regressions:
+                print(f"    {regression}")
+            sys.exit(1)
+        print("\nNo import time regressions.")
+
+    if args.write:
+        errors = import_errors(report)
+        if errors:
+            print("\nNot writing a report with entry points that failed to import "
+                  "(install the backend requirements first):")
+            for error in errors:
+                print(f"    {error}")
+            sys.exit(1)
+        os.makedirs(os.path.dirname(REPORT_FILE), exist_ok=True)
+        with open(REPORT_FILE, "w") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"\nWrote {REPORT_FILE}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Live Match Replay
+=================
+
+Record the live store during a real match and replay it offline.
+
+    python replay.py record recordings/match.jsonl.gz
+        Poll the live store and append a timestamped frame every time it changes.
+
+    python replay.py play recordings/match.jsonl.gz --speed 10 --store-dir live_data_replay
+        Write the frames back through the same path the scraper uses (event diff,
+        then sharded store) at 1x or accelerated speed. Point the API and the
+        commentary generator at it with LIVE_STORE_DIR=live_data_replay and
+        COMMENTARY_PROVIDER=stub COMMENTARY_TTS=stub to run without any network.
+
+    python replay.py bench recordings/match.jsonl.gz
+        Replay every frame into a temporary store and time the live-scores
+        response, one commentary step (stub LLM) and the agent's live-match
+        documents after each one. Frames are applied back to back, so results
+        only depend on the recording.
+
+A recording is JSON lines, one frame per line:
+    {"timestamp": float, "sequence": int, "matches": {match_id: payload}}
+Files ending in .gz are compressed. A plain .json file of {match_id: payload}
+(e.g. data.json or data_live.json) is read as a single-frame recording.
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+import tempfile
+import time
+
+# Same import layout as app.py: backend/ for src.*, chat/ for the agent modules
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.join(BACKEND_DIR, "chat"))
+
+from src.live_store import get_store, DEFAULT_STORE_DIR
+from src.live_events import DeltaFeed, get_event_log
+from src.live_projection import get_projection
+
+RECORD_POLL_INTERVAL = 0.5
+BENCH_READS_PER_FRAME = 20
+
+
+def _open(path, mode):
+    return gzip.open(path, mode + "t", encoding="utf-8") if path.endswith(".gz") else open(path, mode, encoding="utf-8")
+
+
+def load_frames(path):
+    """Yield recorded frames in order"""
+    if path.endswith(".json"):
+        with open(path, "r") as f:
+            yield {"timestamp": 0.0, "sequence": 1, "matches": json.load(f)}
+        return
+    with _open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def record(path, store_dir=DEFAULT_STORE_DIR, interval=RECORD_POLL_INTERVAL):
+    """Append a frame to `path` whenever the live store manifest changes"""
+    store = get_store(store_dir)
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    print(f"Recording {store.root} into {path}. Press Ctrl+C to stop.")
+    last_version = None
+    frames = 0
+    with _open(path, "a") as f:
+        while True:
+            version = store.manifest_version()
+            if version is not None and version != last_version:
+                manifest = store.read_manifest()
+                frame = {"timestamp": time.time(), "sequence": manifest.get("sequence", 0), "matches": store.read_all()}
+                f.write(json.dumps(frame) + "\n")
+                f.flush()
+                last_version = version
+                frames += 1
+                print(f"Frame {frames}: sequence {frame['sequence']}, matches {list(frame['matches'].keys())}")
+            time.sleep(interval)
+
+
+class ReplayPlayer:
+    """Apply recorded frames to a live store exactly like jsonfileupdate.py applies a scrape"""
+
+    def __init__(self, store):
+        self.store = store
+        self.delta_feed = DeltaFeed(store, get_event_log(store.root))
+
+    def apply(self, frame):
+        """Returns (events, changed match ids) for one frame"""
+        events = self.delta_feed.process(frame["matches"])
+        changed = self.store.write_matches(frame["matches"])
+        return events, changed
+
+    def play(self, frames, speed=1.0):
+        """Apply frames keeping their recorded spacing divided by `speed` (0 = no waiting)"""
+        previous_timestamp = None
+        for frame in frames:
+            if speed > 0 and previous_timestamp is not None:
+                time.sleep(max(0.0, frame["timestamp"] - previous_timestamp) / speed)
+            previous_timestamp = frame["timestamp"]
+            events, changed = self.apply(frame)
+            print(f"Sequence {frame['sequence']}: {len(events)} events, changed {changed}")
+
+
+def _summary(samples):
+    """mean/p50/p95/max in milliseconds"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "count": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered) * 1000, 3),
+        "p50_ms": round(pick(0.50) * 1000, 3),
+        "p95_ms": round(pick(0.95) * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3)
+    }
+
+
+def _timed(samples, fn, *args, **kwargs):
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    samples.append(time.perf_counter() - start)
+    return result
+
+
+def _agent_path(store_dir):
+    """The agent's live-match check with a canned LLM, or None if langchain is not installed"""
+    try:
+        from langchain_core.language_models.fake import FakeListLLM
+        from live_match_processor import LiveMatchRelevanceChecker, is_query_about_live_match
+    except ImportError as e:
+        print(f"Skipping the agent live-match path: {e}")
+        return None
+    checker = LiveMatchRelevanceChecker(store_dir=store_dir)
+    llm = FakeListLLM(responses=["yes"])
+
+    def run():
+        if is_query_about_live_match("What is the score right now?", llm) and checker.check_for_live_data():
+            return checker.get_match_data_documents()
+        return []
+    return run
+
+
+def bench(frames, store_dir=None, reads_per_frame=BENCH_READS_PER_FRAME):
+    """Replay frames back to back and time each live consumer after every frame"""
+    # Stub providers must be selected before src.main reads its configuration
+    os.environ["COMMENTARY_PROVIDER"] = "stub"
+    os.environ["COMMENTARY_TTS"] = "stub"
+    from src.main import generate_match_commentary
+    from src.commentary_generator import CommentaryGenerator
+
+    work_dir = tempfile.mkdtemp(prefix="replay_")
+    store_dir = store_dir or os.path.join(work_dir, "live_data")
+    store = get_store(store_dir)
+    player = ReplayPlayer(store)
+    projection = get_projection(store.root)
+    generator = CommentaryGenerator(provider="stub", model_name="stub")
+    agent_path = _agent_path(store.root)
+
+    timings = {"apply_frame": [], "live_scores_refresh": [], "live_scores_cached": [],
+               "commentary_step": [], "agent_live_path": []}
+    frame_count = 0
+    event_count = 0
+    for frame in frames:
+        frame_count += 1
+        events, _ = _timed(timings["apply_frame"], player.apply, frame)
+        event_count += len(events)
+
+        # First read after a change rebuilds the snapshots; the rest are served from memory
+        _timed(timings["live_scores_refresh"], lambda: [s["scoreboard"] for s in projection.get_snapshots().values()])
+        for _ in range(reads_per_frame):
+            _timed(timings["live_scores_cached"], lambda: [s["scoreboard"] for s in projection.get_snapshots().values()])
+
+        for match_id in projection.get_match_ids():
+            commentary_file = os.path.join(work_dir, f"commentary_history_{match_id}.json")
+            _timed(timings["commentary_step"], generate_match_commentary,
+                   match_id, projection, generator, commentary_file, display=False)
+
+        if agent_path:
+            _timed(timings["agent_live_path"], agent_path)
+
+    return {
+        "frames": frame_count,
+        "events": event_count,
+        "store_dir": store.root,
+        "timings": {name: _summary(samples) for name, samples in timings.items() if samples}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record and replay live match data offline")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = subparsers.add_parser("record", help="Record live store changes to a file")
+    record_parser.add_argument("recording")
+    record_parser.add_argument("--store-dir", default=DEFAULT_STORE_DIR)
+    record_parser.add_argument("--interval", type=float, default=RECORD_POLL_INTERVAL)
+
+    play_parser = subparsers.add_parser("play", help="Play a recording into a live store")
+    play_parser.add_argument("recording")
+    play_parser.add_argument("--store-dir", default=os.path.join(BACKEND_DIR, "live_data_replay"))
+    play_parser.add_argument("--speed", type=float, default=1.0, help="Playback speed multiplier, 0 for no waiting")
+
+    bench_parser = subparsers.add_parser("bench", help="Benchmark the live consumers against a recording")
+    bench_parser.add_argument("recording")
+    bench_parser.add_argument("--store-dir", default=None, help="Defaults to a temporary directory")
+    bench_parser.add_argument("--reads", type=int, default=BENCH_READS_PER_FRAME, help="Cached live-scores reads per frame")
+    bench_parser.add_argument("--output", help="Also write the results as JSON to this file")
+
+    args = parser.parse_args()
+    try:
+        if args.command == "record":
+            record(args.recording, args.store_dir, args.interval)
+        elif args.command == "play":
+            ReplayPlayer(get_store(args.store_dir)).play(load_frames(args.recording), args.speed)
+        elif args.command == "bench":
+            results = bench(load_frames(args.recording), args.store_dir, args.reads)
+            print(json.dumps(results, indent=2))
+            if args.output:
+                with open(args.output, "w") as f:
+                    json.dump(results, f, indent=2)
+    except KeyboardInterrupt:
+        print("\nStopped by user.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 import os
+import sys
 import pandas as pd
 from sqlalchemy import create_engine, Column, Integer, String, Float, Boolean, MetaData, Table, text
 from sqlalchemy.ext.declarative import declarative_base
@@ -18,6 +19,10 @@ DB_HOST = os.getenv("DB_HOST", "localhost")
 DB_PORT = os.getenv("DB_PORT", "5432")
 DB_NAME = os.getenv("DB_NAME", "pathway_sql_test")
 
+# Connection pool settings are shared with the chat engine (backend/chat/sql_setup.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "chat"))
+from sql_setup import pool_options
+
 def create_database_if_not_exists():
     """
     Create the PostgreSQL database if it doesn't exist
@@ -94,7 +99,7 @@ def setup_database():
             return False
         
         # Initialize the engine now that we know the database exists
-        engine = create_engine(DATABASE_URL)
+        engine = create_engine(DATABASE_URL, **pool_options())
         
         # Create Base and metadata objects
         Base = declarative_base()
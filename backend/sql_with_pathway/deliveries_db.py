@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, select, func, Integer, text, Table
+from sqlalchemy import create_engine, select, func, or_, Integer, text, Table
 from sqlalchemy.orm import sessionmaker
 import time
 
@@ -34,32 +34,28 @@ def get_team_stats(team_name):
     """
     session = Session()
     try:
-        # Get batting stats
-        batting_query = select(
-            func.sum(deliveries.c.batsman_runs).label('total_runs'),
-            func.count().label('total_balls_faced')
-        ).where(deliveries.c.batting_team == team_name)
+        # Batting and bowling figures in one pass over the team's deliveries
+        batting = deliveries.c.batting_team == team_name
+        bowling = deliveries.c.bowling_team == team_name
+        stats_query = select(
+            func.sum(deliveries.c.batsman_runs).filter(batting).label('total_runs'),
+            func.count().filter(batting).label('total_balls_faced'),
+            func.sum(deliveries.c.total_runs).filter(bowling).label('total_runs_conceded'),
+            func.count().filter(bowling).label('total_balls_bowled'),
+            func.sum(deliveries.c.is_wicket.cast(Integer)).filter(bowling).label('total_wickets')
+        ).where(or_(batting, bowling))
         
-        batting_result = session.execute(batting_query).fetchone()
-        
-        # Get bowling stats
-        bowling_query = select(
-            func.sum(deliveries.c.total_runs).label('total_runs_conceded'),
-            func.count().label('total_balls_bowled'),
-            func.sum(deliveries.c.is_wicket.cast(Integer)).label('total_wickets')
-        ).where(deliveries.c.bowling_team == team_name)
-        
-        bowling_result = session.execute(bowling_query).fetchone()
+        result = session.execute(stats_query).fetchone()
         
         return {
             'batting': {
-                'total_runs': batting_result.total_runs if batting_result.total_runs else 0,
-                'total_balls_faced': batting_result.total_balls_faced
+                'total_runs': result.total_runs if result.total_runs else 0,
+                'total_balls_faced': result.total_balls_faced
             },
             'bowling': {
-                'total_runs_conceded': bowling_result.total_runs_conceded if bowling_result.total_runs_conceded else 0,
-                'total_balls_bowled': bowling_result.total_balls_bowled,
-                'total_wickets': bowling_result.total_wickets if bowling_result.total_wickets else 0
+                'total_runs_conceded': result.total_runs_conceded if result.total_runs_conceded else 0,
+                'total_balls_bowled': result.total_balls_bowled,
+                'total_wickets': result.total_wickets if result.total_wickets else 0
             }
         }
     except Exception as e:
@@ -77,32 +73,28 @@ def get_player_stats(player_name):
     """
     session = Session()
     try:
-        # Get batting stats
-        batting_query = select(
-            func.sum(deliveries.c.batsman_runs).label('total_runs'),
-            func.count().label('total_balls_faced')
-        ).where(deliveries.c.batter == player_name)
-        
-        batting_result = session.execute(batting_query).fetchone()
-        
-        # Get bowling stats
-        bowling_query = select(
-            func.sum(deliveries.c.total_runs).label('total_runs_conceded'),
-            func.count().label('total_balls_bowled'),
-            func.sum(deliveries.c.is_wicket.cast(Integer)).label('total_wickets')
-        ).where(deliveries.c.bowler == player_name)
+        # Batting and bowling figures in one pass over the player's deliveries
+        batting = deliveries.c.batter == player_name
+        bowling = deliveries.c.bowler == player_name
+        stats_query = select(
+            func.sum(deliveries.c.batsman_runs).filter(batting).label('total_runs'),
+            func.count().filter(batting).label('total_balls_faced'),
+            func.sum(deliveries.c.total_runs).filter(bowling).label('total_runs_conceded'),
+            func.count().filter(bowling).label('total_balls_bowled'),
+            func.sum(deliveries.c.is_wicket.cast(Integer)).filter(bowling).label('total_wickets')
+        ).where(or_(batting, bowling))
         
-        bowling_result = session.execute(bowling_query).fetchone()
+        result = session.execute(stats_query).fetchone()
         
         return {
             'batting': {
-                'total_runs': batting_result.total_runs if batting_result.total_runs else 0,
-                'total_balls_faced': batting_result.total_balls_faced
+                'total_runs': result.total_runs if result.total_runs else 0,
+                'total_balls_faced': result.total_balls_faced
             },
             'bowling': {
-                'total_runs_conceded': bowling_result.total_runs_conceded if bowling_result.total_runs_conceded else 0,
-                'total_balls_bowled': bowling_result.total_balls_bowled,
-                'total_wickets': bowling_result.total_wickets if bowling_result.total_wickets else 0
+                'total_runs_conceded': result.total_runs_conceded if result.total_runs_conceded else 0,
+                'total_balls_bowled': result.total_balls_bowled,
+                'total_wickets': result.total_wickets if result.total_wickets else 0
             }
         }
     except Exception as e:
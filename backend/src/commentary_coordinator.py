@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+import json
+import logging
+import os
+import threading
+import time
+
+from src.live_store import BACKEND_DIR, atomic_write_json
+from src.process_lock import ProcessLock
+
+logger = logging.getLogger("cricket_commentary.coordinator")
+
+# Shared by every API worker on the machine
+DEFAULT_STATE_DIR = os.environ.get("COMMENTARY_STATE_DIR", os.path.join(BACKEND_DIR, "run"))
+COORDINATOR_POLL_INTERVAL = 1  # Seconds between leadership/control checks
+HEALTH_STALE_AFTER = 10  # Seconds without a health update before it is reported as stale
+
+# Desired states, and the service states the coordinator acts on
+RUNNING = "running"
+STOPPED = "stopped"
+ERROR = "error"
+
+
+def check_config(provider=None):
+    """
+    Cheap configuration checks, so a start request can fail synchronously in
+    any worker without importing the commentary service
+    """
+    provider = provider or os.environ.get("COMMENTARY_PROVIDER", "openai")
+    if provider == "openai":
+        api_key = os.environ.get("OPENAI_API_KEY")
+        if not api_key or api_key == "your_openai_api_key_here":
+            return "OpenAI API key not properly set in .env file or environment"
+    return None
+
+
+class CommentaryCoordinator:
+    """
+    Keep exactly one commentary service for all API worker processes.
+
+    Any worker handles start/stop by recording the desired state in a control
+    file. Whichever worker holds the coordinator lock owns the CommentaryService:
+    it applies the desired state and publishes the service health to a file that
+    every worker reads for status requests. If the owner exits, the OS releases
+    the lock and another worker takes over within one poll interval.
+
+    A desired "running" only lasts for the server run it was requested in. The
+    worker that takes the lock on its first attempt is the first owner of a new
+    run (a restart, redeploy or recovery from a crash) and resets the desired
+    state to stopped unless the start was requested after it started. Workers
+    that take over later from another owner keep the desired state.
+
+    Files in the state directory:
+        commentary.lock           flock held by the owning worker
+        commentary_control.json   {"desired": "running"|"stopped", "requested_at": float}
+        commentary_health.json    service health plus "owner_pid" and "updated_at"
+    """
+
+    def __init__(self, state_dir=DEFAULT_STATE_DIR, service_factory=None):
+        self.state_dir = state_dir
+        os.makedirs(self.state_dir, exist_ok=True)
+        self.control_path = os.path.join(state_dir, "commentary_control.json")
+        self.health_path = os.path.join(state_dir, "commentary_health.json")
+        self.lock = ProcessLock(os.path.join(state_dir, "commentary.lock"))
+        self._service_factory = service_factory
+        self._service = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._reconcile_lock = threading.Lock()
+        self._applied_request = None
+        self._started_at = None
+
+    def _get_service(self):
+        if self._service is None:
+            if self._service_factory is None:
+                # Imported here: only the owning worker needs the commentary dependencies
+                from src.commentary_service import get_commentary_service
+                self._service_factory = get_commentary_service
+            self._service = self._service_factory()
+        return self._service
+
+    def _read_control(self):
+        try:
+            with open(self.control_path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"desired": STOPPED, "requested_at": None}
+
+    def desired_state(self):
+        return self._read_control().get("desired", STOPPED)
+
+    def _set_desired_state(self, desired):
+        atomic_write_json(self.control_path, {"desired": desired, "requested_at": time.time(), "requested_by": os.getpid()})
+
+    def health(self):
+        """Latest health published by the owning worker"""
+        try:
+            with open(self.health_path, "r") as f:
+                health = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {"status": STOPPED, "error": None, "workers": {}, "desired": self.desired_state()}
+        health["desired"] = self.desired_state()
+        health["stale"] = time.time() - health.get("updated_at", 0) > HEALTH_STALE_AFTER
+        return health
+
+    def status(self):
+        return self.health()["status"]
+
+    def request_start(self):
+        """Ask the owning worker to run commentary; returns (result, message)"""
+        if self.desired_state() == RUNNING and self.status() != ERROR:
+            return "already_running", "Commentary service is already running"
+        # Configuration errors are reported right away rather than through the owner
+        error = check_config()
+        if error:
+            return "error", error
+        self._set_desired_state(RUNNING)
+        self._wake_owner()
+        return "started", "Commentary service starting"
+
+    def request_stop(self):
+        """Ask the owning worker to stop commentary; returns (result, message)"""
+        if self.desired_state() != RUNNING:
+            return "not_running", "Commentary service is not running"
+        self._set_desired_state(STOPPED)
+        self._wake_owner()
+        return "stopped", "Commentary service stopping"
+
+    def _wake_owner(self):
+        # The request landed on the owning worker itself: apply now instead of at the next poll
+        if self.lock.held:
+            self._reconcile()
+
+    def start(self):
+        """Start the background thread that competes for ownership; returns immediately"""
+        if self._thread is None:
+            self._started_at = time.time()
+            self._thread = threading.Thread(target=self._run, name="commentary-coordinator", daemon=True)
+            self._thread.start()
+
+    def shutdown(self):
+        """Stop the service if this worker owns it and hand ownership to another worker"""
+        self._stop_event.set()
+        if self.lock.held:
+            if self._service is not None:
+                self._service.stop()
+            self.lock.release()
+
+    def _run(self):
+        first_attempt = True
+        while not self._stop_event.is_set():
+            try:
+                if self.lock.held:
+                    self._reconcile()
+                elif self.lock.acquire(blocking=False):
+                    if first_attempt:
+                        # No other worker owned the service: this is a new server run
+                        self._reset_previous_run()
+                    self._reconcile()
+            except Exception as e:
+                logger.error(f"Commentary coordinator error: {e}")
+            first_attempt = False
+            self._stop_event.wait(COORDINATOR_POLL_INTERVAL)
+
+    def _reset_previous_run(self):
+        """Drop a desired "running" left by an earlier server run"""
+        control = self._read_control()
+        if control.get("desired") == RUNNING and (control.get("requested_at") or 0) < self._started_at:
+            logger.info(f"Worker {os.getpid()} resetting commentary requested by a previous run (pid {control.get('requested_by')})")
+            self._set_desired_state(STOPPED)
+
+    def _reconcile(self):
+        """Bring the service in line with the desired state and publish its health"""
+        with self._reconcile_lock:
+            control = self._read_control()
+            if control.get("desired") == RUNNING:
+                service = self._get_service()
+                # After a failure, only a new start request triggers another attempt
+                new_request = control.get("requested_at") != self._applied_request
+                if service.status() in (STOPPED, ERROR) and (service.status() == STOPPED or new_request):
+                    logger.info(f"Worker {os.getpid()} starting the commentary service")
+                    service.start()
+            elif self._service is not None and self._service.status() not in (STOPPED, ERROR):
+                logger.info(f"Worker {os.getpid()} stopping the commentary service")
+                self._service.stop()
+            self._applied_request = control.get("requested_at")
+
+            if self._service is not None:
+                health = self._service.health()
+            else:
+                health = {"status": STOPPED, "error": None, "workers": {}}
+            health.update(owner_pid=os.getpid(), updated_at=time.time())
+            atomic_write_json(self.health_path, health, indent=2)
+
+
+_coordinator = None
+_coordinator_lock = threading.Lock()
+
+
+def get_commentary_coordinator(state_dir=DEFAULT_STATE_DIR):
+    """Return this process's coordinator"""
+    global _coordinator
+    with _coordinator_lock:
+        if _coordinator is None:
+            _coordinator = CommentaryCoordinator(state_dir)
+        return _coordinator
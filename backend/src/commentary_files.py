@@ -0,0 +1,9 @@
+#!/usr/bin/env python3
+import os
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def commentary_file_for(match_id):
+    """Path of the commentary history file for one match"""
+    return os.path.join(BACKEND_DIR, f"commentary_history_{match_id}.json")
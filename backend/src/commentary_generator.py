@@ -3,8 +3,6 @@ import json
 import logging
 import os
 from datetime import datetime
-from ollama import Client
-from openai import OpenAI
 
 logger = logging.getLogger("cricket_commentary.generator")
 
@@ -18,7 +16,9 @@ class CommentaryGenerator:
         self.provider = provider
         self.commentary_file = commentary_file
         
+        # Provider SDKs are imported only for the provider actually used
         if provider == "ollama":
+            from ollama import Client
             self.client = Client(host=host)
             # Test connection to Ollama
             try:
@@ -31,6 +31,7 @@ class CommentaryGenerator:
                 logger.error(f"Failed to connect to Ollama at {host}: {e}")
                 logger.info("Make sure Ollama is running and accessible")
         elif provider == "openai":
+            from openai import OpenAI
             if not openai_api_key:
                 openai_api_key = os.environ.get("OPENAI_API_KEY")
                 if not openai_api_key:
@@ -40,12 +41,15 @@ class CommentaryGenerator:
             if model_name == "llama3":
                 self.model_name = "gpt-4o-mini"
                 logger.info(f"Using default OpenAI model: {self.model_name}")
+        elif provider == "stub":
+            # Offline provider for replays and benchmarks: no network, deterministic output
+            self.client = None
         else:
-            raise ValueError(f"Unsupported provider: {provider}. Use 'ollama' or 'openai'.")
+            raise ValueError(f"Unsupported provider: {provider}. Use 'ollama', 'openai' or 'stub'.")
     
-    def generate_commentary(self, prompt_data, max_tokens=250, temperature=0.7):
+    def generate_commentary(self, prompt_data, max_tokens=250, temperature=0.7, commentary_file=None):
         """Generate commentary using the LLM"""
-        prompt = self._build_prompt(prompt_data)
+        prompt = self._build_prompt(prompt_data, commentary_file)
         
         try:
             logger.info(f"Generating commentary with {self.model_name} via {self.provider}...")
@@ -82,6 +86,9 @@ class CommentaryGenerator:
                     temperature=temperature
                 )
                 commentary = response.choices[0].message.content.strip()
+            
+            elif self.provider == "stub":
+                commentary = self._stub_commentary(prompt_data)
                 
             logger.info(f"Generated commentary ({len(commentary.split())} words)")
             return commentary
@@ -89,7 +96,13 @@ class CommentaryGenerator:
             logger.error(f"Error generating commentary: {e}")
             return "Commentary unavailable at this time."
     
-    def _build_prompt(self, data):
+    def _stub_commentary(self, data):
+        """Deterministic stand-in for an LLM response, built from the prompt data"""
+        situation = data.get('match_situation', '').strip().splitlines()
+        description = data.get('match_description') or 'Cricket Match'
+        return f"{description}: {situation[0].rstrip('.') if situation else 'play continues'}."
+    
+    def _build_prompt(self, data, commentary_file=None):
         """Build a prompt for the LLM based on match data"""
         prompt = f"""
 You are an expert cricket commentator. Generate a natural and engaging 1-2 sentences commentary for the current state of the match.
@@ -110,7 +123,7 @@ Recent ball-by-ball commentary:
 {data.get('recent_commentary', 'No recent commentary available')}
 
 Previous commentaries:
-{self._get_recent_commentaries()}
+{self._get_recent_commentaries(commentary_file=commentary_file)}
 
 Instructions:
 1. Create a brief, factual commentary using ONLY the information provided above, maintain continuity of the commentary based on the previous commentaries
@@ -125,13 +138,14 @@ Just provide the commentary text itself, nothing else.
 """
         return prompt
     
-    def save_commentary(self, commentary):
+    def save_commentary(self, commentary, commentary_file=None):
         """Save the generated commentary to history file"""
+        commentary_file = commentary_file or self.commentary_file
         try:
             # Load existing commentaries if file exists
             existing_commentaries = []
-            if os.path.exists(self.commentary_file):
-                with open(self.commentary_file, "r") as f:
+            if os.path.exists(commentary_file):
+                with open(commentary_file, "r") as f:
                     existing_commentaries = json.load(f)
             
             # Add new commentary with timestamp
@@ -141,7 +155,7 @@ Just provide the commentary text itself, nothing else.
             })
             
             # Save back to file
-            with open(self.commentary_file, "w") as f:
+            with open(commentary_file, "w") as f:
                 json.dump(existing_commentaries, f, indent=2)
                 
             logger.info("Commentary saved to history file")
@@ -150,14 +164,15 @@ Just provide the commentary text itself, nothing else.
             logger.error(f"Error saving commentary: {e}")
             return False
     
-    def _get_recent_commentaries(self, limit=5):
+    def _get_recent_commentaries(self, limit=5, commentary_file=None):
         """Load the recent commentary history"""
+        commentary_file = commentary_file or self.commentary_file
         commentary_text = ""
         try:
-            if not os.path.exists(self.commentary_file):
+            if not os.path.exists(commentary_file):
                 return commentary_text
                 
-            with open(self.commentary_file, "r") as f:
+            with open(commentary_file, "r") as f:
                 commentaries = json.load(f)
                 # Get the most recent commentaries up to the limit
                 recent = commentaries[-limit:] if len(commentaries) >= limit else commentaries
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+import logging
+import os
+import threading
+import time
+
+from src.live_projection import get_projection
+from src.commentary_generator import CommentaryGenerator
+from src.commentary_coordinator import check_config
+from src.main import run_match_commentary, PROVIDER, MODEL_NAME, MATCH_POLL_INTERVAL, COMMENTARY_FILE
+
+logger = logging.getLogger("cricket_commentary.service")
+
+# Service states
+STOPPED = "stopped"
+STARTING = "starting"
+RUNNING = "running"
+STOPPING = "stopping"
+ERROR = "error"
+
+
+class CommentaryService:
+    """
+    Run the per-match commentary workers as background threads of the calling process.
+
+    start() and stop() only flip state and signal threads, so they return at once.
+    A supervisor thread creates the generator (once, then shared by every worker
+    and every restart), starts a worker per live match and drops workers whose
+    match has ended. Workers sleep on their stop event, so stop() is observed
+    immediately rather than after the current wait.
+    """
+
+    def __init__(self, projection=None, provider=PROVIDER, model_name=MODEL_NAME):
+        self.projection = projection or get_projection()
+        self.provider = provider
+        self.model_name = model_name
+        self._lock = threading.Lock()
+        self._generator = None
+        self._supervisor = None
+        self._stop_event = None
+        self._workers = {}  # match_id -> (thread, stop_event, stats)
+        self._state = STOPPED
+        self._error = None
+        self._started_at = None
+
+    def check_config(self):
+        """Cheap configuration checks so start() can fail synchronously"""
+        return check_config(self.provider)
+
+    def _get_generator(self):
+        if self._generator is None:
+            self._generator = CommentaryGenerator(
+                model_name=self.model_name,
+                commentary_file=COMMENTARY_FILE,
+                provider=self.provider,
+                openai_api_key=os.environ.get("OPENAI_API_KEY")
+            )
+            logger.info(f"Commentary generator initialized with {self.provider} provider")
+        return self._generator
+
+    def start(self):
+        """Start the supervisor; returns (result, message) with result "started", "already_running" or "error" """
+        with self._lock:
+            if self._supervisor is not None and self._supervisor.is_alive():
+                if self._state == STOPPING:
+                    return "error", "Commentary service is still stopping"
+                return "already_running", "Commentary service is already running"
+
+            error = self.check_config()
+            if error:
+                self._state, self._error = ERROR, error
+                return "error", error
+
+            self._state = STARTING
+            self._error = None
+            self._started_at = time.time()
+            self._stop_event = threading.Event()
+            self._supervisor = threading.Thread(
+                target=self._supervise, args=(self._stop_event,), name="commentary-supervisor", daemon=True
+            )
+            self._supervisor.start()
+            return "started", "Commentary service started"
+
+    def stop(self):
+        """Signal the supervisor and every worker to stop; returns (result, message) with result "stopped" or "not_running" """
+        with self._lock:
+            if self._supervisor is None or not self._supervisor.is_alive():
+                return "not_running", "Commentary service is not running"
+            self._state = STOPPING
+            self._stop_event.set()
+            for _, stop_event, _ in self._workers.values():
+                stop_event.set()
+            return "stopped", "Commentary service stopping"
+
+    def status(self):
+        with self._lock:
+            return self._state
+
+    def health(self):
+        """Service state plus one entry per match worker"""
+        with self._lock:
+            workers = {
+                match_id: dict(stats, alive=thread.is_alive())
+                for match_id, (thread, _, stats) in self._workers.items()
+            }
+            return {
+                "status": self._state,
+                "error": self._error,
+                "provider": self.provider,
+                "model": self.model_name,
+                "started_at": self._started_at,
+                "workers": workers
+            }
+
+    def _supervise(self, stop_event):
+        try:
+            self._get_generator()
+        except Exception as e:
+            logger.error(f"Failed to initialize commentary generator: {e}")
+            with self._lock:
+                self._state, self._error = ERROR, str(e)
+            return
+
+        with self._lock:
+            if not stop_event.is_set():
+                self._state = RUNNING
+        logger.info(f"Commentary service running with {self.provider} provider and {self.model_name} model")
+
+        try:
+            while not stop_event.is_set():
+                live_match_ids = set(self.projection.try_get_snapshots().keys())
+                with self._lock:
+                    # Drop workers that have finished (match ended or error)
+                    for match_id, (thread, _, _) in list(self._workers.items()):
+                        if not thread.is_alive():
+                            self._workers.pop(match_id)
+
+                    # Start a worker for every newly live match
+                    for match_id in live_match_ids - self._workers.keys():
+                        self._start_worker(match_id)
+                stop_event.wait(MATCH_POLL_INTERVAL)
+        except Exception as e:
+            logger.exception(f"Commentary supervisor failed: {e}")
+            with self._lock:
+                self._error = str(e)
+        finally:
+            with self._lock:
+                for _, worker_stop_event, _ in self._workers.values():
+                    worker_stop_event.set()
+                workers = list(self._workers.values())
+            for thread, _, _ in workers:
+                thread.join()
+            with self._lock:
+                self._workers = {}
+                if self._state != ERROR:
+                    self._state = STOPPED
+            logger.info("Commentary service stopped")
+
+    def _start_worker(self, match_id):
+        """Start one match worker; caller holds the lock"""
+        worker_stop_event = threading.Event()
+        stats = {"commentaries": 0, "last_commentary_at": None, "last_error": None}
+        thread = threading.Thread(
+            target=run_match_commentary,
+            args=(match_id, self.projection, self._generator, worker_stop_event),
+            kwargs={"stats": stats},
+            name=f"commentary-{match_id}",
+            daemon=True
+        )
+        self._workers[match_id] = (thread, worker_stop_event, stats)
+        thread.start()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_commentary_service():
+    """Return the process-wide commentary service"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = CommentaryService()
+        return _service
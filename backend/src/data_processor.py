@@ -3,78 +3,72 @@ import json
 import logging
 import os
 
+from src.live_store import get_store
+from src.live_events import get_event_log
+
 logger = logging.getLogger("cricket_commentary.data_processor")
 
 class MatchDataProcessor:
     """Process and extract relevant data from the cricket match JSON"""
     
-    def __init__(self, match_id=None, data_file="data_live.json"):
-        self.data_file = data_file
+    def __init__(self, match_id=None, store=None):
+        self.store = store or get_store()
+        self.event_log = get_event_log(self.store.root)
         self.match_data = {}
-        self.previous_state = {}
+        # Only events logged from now on are new to this processor
+        self._last_event_seq = self.event_log.last_seq()
+        self._event_position = self.event_log.end_position()
         
-        # If match_id is not provided, use the first key from data_live.json
+        # If match_id is not provided, use the first live match in the store
         if match_id is None:
             self.match_id = self._get_first_match_id()
         else:
             self.match_id = match_id
     
     def _get_first_match_id(self):
-        """Get the first match ID from data file"""
+        """Get the first live match ID from the store manifest"""
         try:
-            file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), self.data_file)
-            with open(file_path, "r") as f:
-                data = json.loads(f.read())
-                if data:
-                    match_id = list(data.keys())[0]
-                    print(f"\033[91mExtracted match ID: {match_id}\033[0m")
-                    return match_id
-                else:
-                    logger.error(f"Data file {self.data_file} is empty or has no match IDs")
-                    match_id = "1473470"  # Default fallback ID
-                    print(f"\033[91mUsed default fallback: {match_id}\033[0m")
-                    return match_id
+            match_ids = self.store.match_ids()
+            if match_ids:
+                match_id = match_ids[0]
+                print(f"\033[91mExtracted match ID: {match_id}\033[0m")
+                return match_id
+            else:
+                logger.error(f"Live store {self.store.root} has no match IDs")
+                match_id = "1473470"  # Default fallback ID
+                print(f"\033[91mUsed default fallback: {match_id}\033[0m")
+                return match_id
         except Exception as e:
-            logger.error(f"Error getting match ID from {self.data_file}: {e}")
+            logger.error(f"Error getting match ID from {self.store.root}: {e}")
             return "1473470"  # Default fallback ID
     
     def load_data(self):
-        """Load match data from data.json"""
+        """Load this match's shard from the live store"""
         try:
-            # Use a relative path to the data file
-            file_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), self.data_file)
-            
-            with open(file_path, "r") as f:
-                data = json.loads(f.read())
-                self.match_data = data.get(self.match_id, {})
-                return self.match_data
+            self.match_data = self.store.read_match(self.match_id)
+            return self.match_data
+        except FileNotFoundError:
+            logger.error(f"No live data for match {self.match_id}")
+            self.match_data = {}
+            return {}
         except Exception as e:
             logger.error(f"Error loading match data: {e}")
             return {}
     
+    def get_new_events(self):
+        """Return delta-feed events logged for this match since the last call"""
+        events, self._event_position = self.event_log.read_since(self._last_event_seq, self.match_id, self._event_position)
+        if events:
+            self._last_event_seq = events[-1]["seq"]
+        return events
+    
     def check_for_updates(self):
-        """Check if there have been updates to the match data"""
-        current_data = self.load_data()
-        
-        # Simple check - compare live overs
-        current_overs = self._get_current_overs(current_data)
-        previous_overs = self._get_current_overs(self.previous_state)
-        
-        if current_overs != previous_overs:
-            self.previous_state = current_data
+        """Check if any new ball, wicket, etc. has happened in this match since the last check"""
+        if self.get_new_events():
+            self.load_data()
             return True
-        
         return False
     
-    def _get_current_overs(self, data):
-        """Extract current overs from match data"""
-        try:
-            if "live" in data and "innings" in data["live"]:
-                return data["live"]["innings"].get("overs", "0.0")
-            return "0.0"
-        except:
-            return "0.0"
-    
     def get_match_summary(self):
         """Get a summary of the current match state"""
         if not self.match_data:
@@ -240,7 +234,7 @@ def main():
     # Load match data
     match_data = processor.load_data()
     if not match_data:
-        logger.warning("No match data found. Check if data_live.json exists and contains valid data.")
+        logger.warning("No match data found. Check that jsonfileupdate.py is populating the live store.")
         return
     
     logger.info(f"Successfully loaded match data for match ID: {processor.match_id}")
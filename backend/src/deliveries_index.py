@@ -0,0 +1,332 @@
+#!/usr/bin/env python3
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from src.live_store import BACKEND_DIR
+
+logger = logging.getLogger("cricket_commentary.deliveries_index")
+
+DELIVERIES_CSV = os.environ.get("DELIVERIES_CSV", os.path.join(BACKEND_DIR, "chat", "deliveries.csv"))
+
+# Same definitions as the SQL in chat/stats_queries.py
+NOT_BOWLED = ("wides", "noballs")
+NOT_CHARGED_TO_BOWLER = ("byes", "legbyes", "penalty")
+NOT_BOWLER_WICKETS = ("run out", "retired hurt", "retired out", "obstructing the field")
+# Overs are 0-based in deliveries.csv: powerplay 1-6, middle 7-15, death 16-20
+PHASES = ("powerplay", "middle", "death")
+PHASE_SPLIT_ROLES = ("batter", "bowler", "batting_team", "bowling_team")
+
+
+def match_name(name, names, kind="player"):
+    """
+    Map a name as a user would write it to one of `names`.
+
+    Matches exactly (ignoring case), then on every word of the query appearing in
+    the name (so "Kohli" finds "V Kohli"), then on the query being part of the name.
+
+    Raises:
+        ValueError: If no name or more than one name matches.
+    """
+    query = name.strip().lower()
+    exact = [candidate for candidate in names if candidate.lower() == query]
+    if exact:
+        return exact[0]
+    words = query.split()
+    candidates = [candidate for candidate in names if all(word in candidate.lower().split() for word in words)]
+    if not candidates:
+        candidates = [candidate for candidate in names if query in candidate.lower()]
+    if len(candidates) == 1:
+        return candidates[0]
+    if not candidates:
+        raise ValueError(f"No {kind} named '{name}' in the deliveries data")
+    raise ValueError(f"'{name}' matches several {kind}s: {', '.join(sorted(candidates)[:5])}")
+
+
+def rate(numerator, denominator, scale=1):
+    return round(numerator * scale / denominator, 2) if denominator else None
+
+
+class OffsetIndex:
+    """
+    Row ids grouped by entity code: rows(code) is a slice of one sorted array,
+    so finding an entity's deliveries costs two lookups instead of a scan.
+    """
+
+    def __init__(self, codes, size):
+        self.order = np.argsort(codes, kind="stable").astype(np.int32)
+        # Rows without an entity (code -1) sort first and are never returned
+        counts = np.bincount(codes[codes >= 0], minlength=size)
+        self.offsets = np.zeros(size + 1, dtype=np.int64)
+        np.cumsum(counts, out=self.offsets[1:])
+        self.offsets += np.count_nonzero(codes < 0)
+
+    def rows(self, code):
+        return self.order[self.offsets[code]:self.offsets[code + 1]]
+
+
+class DeliveriesIndex:
+    """
+    Columnar in-memory copy of deliveries.csv for player and team aggregates.
+
+    Every column is a NumPy array; player and team names are stored as integer
+    codes into one vocabulary each, and the per-delivery flags the stats need
+    (ball faced, ball bowled, runs charged to the bowler, bowler's wicket, over
+    phase) are computed once at load. An OffsetIndex per batter, bowler, dismissed
+    player, batting team and bowling team gives each entity's row ids, so an
+    aggregate is a gather plus a few vectorized reductions over that entity's rows
+    only. Dismissals come from the dismissed-player index rather than the batter's
+    rows, since a non-striker can be run out off the partner's ball.
+
+    The stats methods return the same dictionaries as chat/stats_queries.py.
+    """
+
+    def __init__(self, frame):
+        import pandas as pd
+
+        self.size = len(frame)
+        self.players, player_codes = self._encode(pd, frame, ["batter", "bowler", "player_dismissed"])
+        self.teams, team_codes = self._encode(pd, frame, ["batting_team", "bowling_team"])
+        self.batter, self.bowler, self.player_dismissed = player_codes
+        self.batting_team, self.bowling_team = team_codes
+        self.player_codes = {name: code for code, name in enumerate(self.players)}
+        self.team_codes = {name: code for code, name in enumerate(self.teams)}
+
+        self.match_id = frame["match_id"].to_numpy(dtype=np.int32)
+        self.innings = self.match_id.astype(np.int64) * 4 + frame["inning"].to_numpy(dtype=np.int64)
+        over = frame["over"].to_numpy(dtype=np.int16)
+        self.phase = np.where(over < 6, 0, np.where(over < 15, 1, 2)).astype(np.int8)
+        self.batsman_runs = frame["batsman_runs"].to_numpy(dtype=np.int16)
+        self.total_runs = frame["total_runs"].to_numpy(dtype=np.int16)
+        self.is_wicket = frame["is_wicket"].to_numpy(dtype=bool)
+
+        extras = frame["extras_type"]
+        self.ball_faced = (extras != "wides").to_numpy()
+        self.ball_bowled = (~extras.isin(NOT_BOWLED)).to_numpy()
+        self.charged_runs = np.where(extras.isin(NOT_CHARGED_TO_BOWLER).to_numpy(), 0, self.total_runs).astype(np.int16)
+        self.bowler_wicket = self.is_wicket & ~frame["dismissal_kind"].isin(NOT_BOWLER_WICKETS).to_numpy()
+
+        self.by_batter = OffsetIndex(self.batter, len(self.players))
+        self.by_bowler = OffsetIndex(self.bowler, len(self.players))
+        self.by_dismissed = OffsetIndex(self.player_dismissed, len(self.players))
+        self.by_batting_team = OffsetIndex(self.batting_team, len(self.teams))
+        self.by_bowling_team = OffsetIndex(self.bowling_team, len(self.teams))
+
+    @staticmethod
+    def _encode(pd, frame, columns):
+        """Integer codes for several columns over one shared vocabulary (-1 for missing)"""
+        values = pd.concat([frame[column] for column in columns], ignore_index=True)
+        codes, uniques = pd.factorize(values)
+        return [str(name) for name in uniques], codes.astype(np.int32).reshape(len(columns), len(frame))
+
+    @classmethod
+    def from_csv(cls, csv_path=DELIVERIES_CSV):
+        import pandas as pd
+
+        start = time.perf_counter()
+        frame = pd.read_csv(csv_path)
+        index = cls(frame)
+        logger.info(f"Loaded {index.size} deliveries into the in-memory index in {time.perf_counter() - start:.2f}s")
+        return index
+
+    def nbytes(self):
+        """Memory held by the column and index arrays"""
+        return sum(value.nbytes for value in vars(self).values() if isinstance(value, np.ndarray)) + sum(
+            index.order.nbytes + index.offsets.nbytes
+            for index in (self.by_batter, self.by_bowler, self.by_dismissed, self.by_batting_team, self.by_bowling_team)
+        )
+
+    def _player(self, name):
+        name = match_name(name, self.players)
+        return name, self.player_codes[name]
+
+    def _team(self, name):
+        name = match_name(name, self.teams, "team")
+        return name, self.team_codes[name]
+
+    def _count(self, mask):
+        return int(np.count_nonzero(mask))
+
+    def player_batting_stats(self, player: str) -> dict:
+        """Career batting record of a player: innings, runs, balls, dismissals, average, strike rate, fours, sixes and dot ball percentage."""
+        player, code = self._player(player)
+        rows = self.by_batter.rows(code)
+        runs, faced = self.batsman_runs[rows], self.ball_faced[rows]
+        stats = {
+            "innings": len(np.unique(self.innings[rows])),
+            "runs": int(runs.sum()),
+            "balls": self._count(faced),
+            "dismissals": len(self.by_dismissed.rows(code)),
+            "fours": self._count(runs == 4),
+            "sixes": self._count(runs == 6),
+            "dot_balls": self._count((runs == 0) & faced)
+        }
+        stats.update(
+            player=player,
+            average=rate(stats["runs"], stats["dismissals"]),
+            strike_rate=rate(stats["runs"], stats["balls"], 100),
+            dot_ball_pct=rate(stats["dot_balls"], stats["balls"], 100)
+        )
+        return stats
+
+    def player_bowling_stats(self, player: str) -> dict:
+        """Career bowling record of a player: innings, balls, runs conceded, wickets, economy, average, strike rate and dot ball percentage."""
+        player, code = self._player(player)
+        rows = self.by_bowler.rows(code)
+        stats = {
+            "innings": len(np.unique(self.innings[rows])),
+            "balls": self._count(self.ball_bowled[rows]),
+            "runs_conceded": int(self.charged_runs[rows].sum()),
+            "wickets": self._count(self.bowler_wicket[rows]),
+            "dot_balls": self._count(self.total_runs[rows] == 0),
+            "boundaries_conceded": self._count(np.isin(self.batsman_runs[rows], (4, 6)))
+        }
+        stats.update(
+            player=player,
+            overs=f"{stats['balls'] // 6}.{stats['balls'] % 6}",
+            economy=rate(stats["runs_conceded"], stats["balls"], 6),
+            average=rate(stats["runs_conceded"], stats["wickets"]),
+            strike_rate=rate(stats["balls"], stats["wickets"]),
+            dot_ball_pct=rate(stats["dot_balls"], stats["balls"], 100)
+        )
+        return stats
+
+    def batter_vs_bowler_stats(self, batter: str, bowler: str) -> dict:
+        """Head-to-head record of a batter against a bowler: runs, balls, dismissals, strike rate, dot ball percentage, fours and sixes."""
+        batter, batter_code = self._player(batter)
+        bowler, bowler_code = self._player(bowler)
+        rows = self.by_batter.rows(batter_code)
+        rows = rows[self.bowler[rows] == bowler_code]
+        runs, faced = self.batsman_runs[rows], self.ball_faced[rows]
+        stats = {
+            "matches": len(np.unique(self.match_id[rows])),
+            "runs": int(runs.sum()),
+            "balls": self._count(faced),
+            "dismissals": self._count((self.player_dismissed[rows] == batter_code) & self.bowler_wicket[rows]),
+            "dot_balls": self._count((runs == 0) & faced),
+            "fours": self._count(runs == 4),
+            "sixes": self._count(runs == 6)
+        }
+        stats.update(
+            batter=batter,
+            bowler=bowler,
+            strike_rate=rate(stats["runs"], stats["balls"], 100),
+            dot_ball_pct=rate(stats["dot_balls"], stats["balls"], 100)
+        )
+        return stats
+
+    def team_vs_team_stats(self, team: str, opponent: str) -> dict:
+        """Head-to-head record between two teams: matches, and runs, balls, wickets lost and run rate for each side."""
+        team, team_code = self._team(team)
+        opponent, opponent_code = self._team(opponent)
+        team_rows = self.by_batting_team.rows(team_code)
+        team_rows = team_rows[self.bowling_team[team_rows] == opponent_code]
+        opponent_rows = self.by_batting_team.rows(opponent_code)
+        opponent_rows = opponent_rows[self.bowling_team[opponent_rows] == team_code]
+        stats = {
+            "matches": len(np.union1d(self.match_id[team_rows], self.match_id[opponent_rows])),
+            "team_runs": int(self.total_runs[team_rows].sum()),
+            "team_balls": self._count(self.ball_bowled[team_rows]),
+            "team_wickets_lost": self._count(self.is_wicket[team_rows]),
+            "opponent_runs": int(self.total_runs[opponent_rows].sum()),
+            "opponent_balls": self._count(self.ball_bowled[opponent_rows]),
+            "opponent_wickets_lost": self._count(self.is_wicket[opponent_rows])
+        }
+        stats.update(
+            team=team,
+            opponent=opponent,
+            team_run_rate=rate(stats["team_runs"], stats["team_balls"], 6),
+            opponent_run_rate=rate(stats["opponent_runs"], stats["opponent_balls"], 6)
+        )
+        return stats
+
+    def team_totals(self, team: str, first_match_id: int = 0, last_match_id: int = 2**31 - 1) -> dict:
+        """Batting and bowling totals of a team, optionally limited to a range of match ids (such as one season): matches, runs scored and conceded, wickets, run rates, fours and sixes."""
+        team, code = self._team(team)
+        batting = self.by_batting_team.rows(code)
+        bowling = self.by_bowling_team.rows(code)
+        batting = batting[(self.match_id[batting] >= first_match_id) & (self.match_id[batting] <= last_match_id)]
+        bowling = bowling[(self.match_id[bowling] >= first_match_id) & (self.match_id[bowling] <= last_match_id)]
+        runs = self.batsman_runs[batting]
+        stats = {
+            "matches": len(np.union1d(self.match_id[batting], self.match_id[bowling])),
+            "runs_scored": int(self.total_runs[batting].sum()),
+            "balls_faced": self._count(self.ball_bowled[batting]),
+            "wickets_lost": self._count(self.is_wicket[batting]),
+            "fours": self._count(runs == 4),
+            "sixes": self._count(runs == 6),
+            "runs_conceded": int(self.total_runs[bowling].sum()),
+            "balls_bowled": self._count(self.ball_bowled[bowling]),
+            "wickets_taken": self._count(self.is_wicket[bowling])
+        }
+        stats.update(
+            team=team,
+            run_rate=rate(stats["runs_scored"], stats["balls_faced"], 6),
+            economy=rate(stats["runs_conceded"], stats["balls_bowled"], 6)
+        )
+        return stats
+
+    def phase_splits(self, name: str, role: str = "batter") -> dict:
+        """Powerplay (overs 1-6), middle (7-15) and death (16-20) splits for a player or team. role is one of batter, bowler, batting_team, bowling_team."""
+        if role not in PHASE_SPLIT_ROLES:
+            raise ValueError(f"role must be one of {', '.join(PHASE_SPLIT_ROLES)}")
+        if role == "batter":
+            name, code = self._player(name)
+            rows = self.by_batter.rows(code)
+            runs, balls = self.batsman_runs[rows], self.ball_faced[rows]
+            wickets = np.bincount(self.phase[self.by_dismissed.rows(code)], minlength=3)
+        elif role == "bowler":
+            name, code = self._player(name)
+            rows = self.by_bowler.rows(code)
+            runs, balls = self.charged_runs[rows], self.ball_bowled[rows]
+            wickets = np.bincount(self.phase[rows], weights=self.bowler_wicket[rows], minlength=3)
+        else:
+            name, code = self._team(name)
+            rows = (self.by_batting_team if role == "batting_team" else self.by_bowling_team).rows(code)
+            runs, balls = self.total_runs[rows], self.ball_bowled[rows]
+            wickets = np.bincount(self.phase[rows], weights=self.is_wicket[rows], minlength=3)
+
+        phase = self.phase[rows]
+        totals = {
+            "runs": np.bincount(phase, weights=runs, minlength=3),
+            "balls": np.bincount(phase, weights=balls, minlength=3),
+            "wickets": wickets,
+            "dot_balls": np.bincount(phase, weights=(self.total_runs[rows] == 0) & balls, minlength=3),
+            "boundaries": np.bincount(phase, weights=np.isin(self.batsman_runs[rows], (4, 6)), minlength=3)
+        }
+        splits = {}
+        for position, phase_name in enumerate(PHASES):
+            row = {key: int(values[position]) for key, values in totals.items()}
+            row.update(
+                run_rate=rate(row["runs"], row["balls"], 6),
+                dot_ball_pct=rate(row["dot_balls"], row["balls"], 100)
+            )
+            splits[phase_name] = row
+        return {"name": name, "role": role, "phases": splits}
+
+    def stats_functions(self):
+        """The stats methods, named like the chat/stats_queries.py functions they replace"""
+        return (
+            self.player_batting_stats,
+            self.player_bowling_stats,
+            self.batter_vs_bowler_stats,
+            self.team_vs_team_stats,
+            self.team_totals,
+            self.phase_splits,
+        )
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_deliveries_index(csv_path=DELIVERIES_CSV):
+    """Return the process-wide index, loading it on first use"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = DeliveriesIndex.from_csv(csv_path)
+        return _index
@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+import json
+import logging
+import os
+import threading
+import time
+
+from src.live_store import get_store, DEFAULT_STORE_DIR
+
+logger = logging.getLogger("cricket_commentary.live_events")
+
+BOUNDARY_EVENTS = {"FOUR": 4, "SIX": 6}
+BATTER_MILESTONES = (50, 100, 150)
+TEAM_MILESTONE_STEP = 50
+# Size at which events.jsonl is rotated to events.jsonl.1
+EVENT_LOG_MAX_BYTES = int(os.environ.get("EVENT_LOG_MAX_BYTES", str(32 * 1024 * 1024)))
+TAIL_CHUNK_BYTES = 64 * 1024  # Read backwards in chunks of this size to find the newest event
+
+# Event types
+BALL = "ball"
+WICKET = "wicket"
+BOUNDARY = "boundary"
+BOWLER_CHANGE = "bowler_change"
+INNINGS_BREAK = "innings_break"
+MILESTONE = "milestone"
+
+
+def _balls(match_data):
+    """All balls in the commentary feed, oldest first"""
+    balls = [ball for over in match_data.get("comms", []) for ball in over.get("ball", [])]
+    return sorted(balls, key=lambda ball: (str(ball.get("innings_number", "")), float(ball.get("overs_unique") or 0)))
+
+
+def _current_bowler(match_data):
+    for bowler in match_data.get("centre", {}).get("bowling", []):
+        if bowler.get("live_current_name") == "current bowler":
+            return bowler
+    return None
+
+
+def _live_innings(match_data):
+    return match_data.get("live", {}).get("innings", {})
+
+
+def _crossed(before, after, thresholds):
+    """Thresholds reached by going from `before` to `after` runs"""
+    return [t for t in thresholds if int(before) < t <= int(after)]
+
+
+def diff_snapshots(previous, current):
+    """
+    Compare two consecutive payloads of the same match and describe what happened.
+
+    Returns a list of (type, data) tuples in the order they happened. An empty
+    previous payload yields no events: the first snapshot is only a baseline.
+    """
+    if not previous:
+        return []
+
+    events = []
+
+    # Balls, wickets and boundaries come from new entries in the ball-by-ball feed
+    seen = {ball.get("comms_id") for ball in _balls(previous)}
+    for ball in _balls(current):
+        if ball.get("comms_id") in seen:
+            continue
+        ball_data = {
+            "comms_id": ball.get("comms_id"),
+            "innings_number": ball.get("innings_number"),
+            "over": ball.get("overs_actual"),
+            "players": ball.get("players", ""),
+            "result": ball.get("event", ""),
+            "text": ball.get("text", "")
+        }
+        events.append((BALL, ball_data))
+        if ball.get("event") in BOUNDARY_EVENTS:
+            events.append((BOUNDARY, dict(ball_data, runs=BOUNDARY_EVENTS[ball["event"]])))
+        if ball.get("dismissal") or ball.get("event") == "OUT":
+            events.append((WICKET, dict(ball_data, dismissal=ball.get("dismissal", ""))))
+
+    # Innings break: the live innings number moved on
+    previous_innings = _live_innings(previous)
+    current_innings = _live_innings(current)
+    if previous_innings.get("innings_number") and current_innings.get("innings_number") != previous_innings.get("innings_number"):
+        events.append((INNINGS_BREAK, {
+            "completed_innings": previous_innings.get("innings_number"),
+            "score": f"{previous_innings.get('runs', 0)}/{previous_innings.get('wickets', 0)}",
+            "overs": previous_innings.get("overs", "0.0"),
+            "next_innings": current_innings.get("innings_number"),
+            "target": current_innings.get("target")
+        }))
+    else:
+        # Team milestones within the same innings
+        for runs in _crossed(previous_innings.get("runs", 0) or 0, current_innings.get("runs", 0) or 0,
+                             range(TEAM_MILESTONE_STEP, 1000, TEAM_MILESTONE_STEP)):
+            events.append((MILESTONE, {
+                "kind": "team_runs",
+                "team_id": current_innings.get("batting_team_id"),
+                "runs": runs,
+                "over": current_innings.get("overs")
+            }))
+
+    # Bowler change
+    previous_bowler = _current_bowler(previous)
+    current_bowler = _current_bowler(current)
+    if current_bowler and (not previous_bowler or previous_bowler.get("player_id") != current_bowler.get("player_id")):
+        events.append((BOWLER_CHANGE, {
+            "bowler": current_bowler.get("known_as", ""),
+            "player_id": current_bowler.get("player_id"),
+            "previous_bowler": previous_bowler.get("known_as", "") if previous_bowler else None,
+            "figures": f"{current_bowler.get('wickets', 0)}/{current_bowler.get('conceded', 0)} ({current_bowler.get('overs', '0.0')})"
+        }))
+
+    # Batter milestones
+    previous_runs = {
+        str(batter.get("player_id")): batter.get("runs", 0)
+        for batter in previous.get("centre", {}).get("batting", [])
+    }
+    for batter in current.get("centre", {}).get("batting", []):
+        before = previous_runs.get(str(batter.get("player_id")), 0) or 0
+        for runs in _crossed(before, batter.get("runs", 0) or 0, BATTER_MILESTONES):
+            events.append((MILESTONE, {
+                "kind": "batter_runs",
+                "batter": batter.get("known_as", ""),
+                "player_id": batter.get("player_id"),
+                "runs": runs,
+                "balls": batter.get("balls_faced")
+            }))
+
+    return events
+
+
+class EventLog:
+    """
+    Append-only JSON-lines log of match events with a monotonically increasing seq.
+
+    One line per event: {"seq", "match_id", "type", "timestamp", "data"}.
+    Once the log passes max_bytes it is rotated to <path>.1, replacing the
+    previous rotated file, so at most two files of history are kept.
+
+    Readers keep the position returned by read_since() or end_position(), a
+    (file id, byte offset) pair, so each poll only parses lines appended since the
+    previous one. A file is identified by the seq of its first event, which,
+    unlike an inode, is never reused. A position in a file that has since been rotated is read to
+    the end of the rotated file before the new log is read from its start.
+    """
+
+    def __init__(self, path, max_bytes=EVENT_LOG_MAX_BYTES):
+        self.path = path
+        self.rotated_path = path + ".1"
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._last_seq = None
+
+    @staticmethod
+    def _tail_seq(path):
+        """Seq of the last complete line of a log file, reading only its tail (None if it has none)"""
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            size = f.seek(0, os.SEEK_END)
+            start = max(0, size - TAIL_CHUNK_BYTES)
+            while True:
+                f.seek(start)
+                # Text after the last newline is a partially written line
+                lines = f.read(size - start).split(b"\n")[:-1]
+                if start > 0:
+                    lines = lines[1:]  # May start mid-line
+                for line in reversed(lines):
+                    if line.strip():
+                        return json.loads(line)["seq"]
+                if start == 0:
+                    return None
+                start = max(0, start - TAIL_CHUNK_BYTES)
+
+    def last_seq(self):
+        """Seq of the newest event in the log (0 if empty)"""
+        if self._last_seq is None:
+            seq = self._tail_seq(self.path)
+            if seq is None:
+                seq = self._tail_seq(self.rotated_path)
+            self._last_seq = seq or 0
+        return self._last_seq
+
+    @staticmethod
+    def _file_id(f):
+        """Seq of the first event of an open log file (0 while it has none)"""
+        f.seek(0)
+        line = f.readline()
+        return json.loads(line)["seq"] if line.endswith(b"\n") and line.strip() else 0
+
+    def _path_id(self, path):
+        try:
+            with open(path, "rb") as f:
+                return self._file_id(f)
+        except FileNotFoundError:
+            return None
+
+    def end_position(self):
+        """Position just past the last complete line, for a reader that only wants events from now on"""
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return 0, 0
+        with f:
+            file_id = self._file_id(f)
+            size = f.seek(0, os.SEEK_END)
+            start = max(0, size - TAIL_CHUNK_BYTES)
+            f.seek(start)
+            return file_id, start + f.read(size - start).rfind(b"\n") + 1
+
+    def _rotate(self):
+        try:
+            if os.path.getsize(self.path) < self.max_bytes:
+                return
+        except FileNotFoundError:
+            return
+        os.replace(self.path, self.rotated_path)
+        logger.info(f"Rotated event log {self.path} at seq {self._last_seq}")
+
+    def append(self, match_id, events):
+        """Append (type, data) events for one match; returns the stored event dicts"""
+        if not events:
+            return []
+        with self._lock:
+            seq = self.last_seq()
+            if self.max_bytes:
+                self._rotate()
+            timestamp = time.time()
+            records = []
+            for event_type, data in events:
+                seq += 1
+                records.append({
+                    "seq": seq,
+                    "match_id": match_id,
+                    "type": event_type,
+                    "timestamp": timestamp,
+                    "data": data
+                })
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(record) + "\n" for record in records))
+                f.flush()
+                os.fsync(f.fileno())
+            self._last_seq = seq
+        return records
+
+    @staticmethod
+    def _read_file(path, offset, seq, match_id, events):
+        """Collect matching events of one file from byte `offset`; returns its (file id, next offset), or None if missing"""
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        with f:
+            file_id = EventLog._file_id(f)
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record["seq"] > seq and (match_id is None or record["match_id"] == str(match_id)):
+                    events.append(record)
+        return file_id, offset
+
+    def read_since(self, seq=0, match_id=None, position=None):
+        """
+        Return (events, next_position) for events with seq > `seq`, from `position`
+        (None reads all retained history, rotated file included).
+
+        A partially written last line is left for the next call.
+        """
+        events = []
+        file_id, offset = position or (None, 0)
+        if file_id is None or file_id != self._path_id(self.path):
+            # The position is in the rotated file, or before all retained history: finish that first
+            rotated_id = self._path_id(self.rotated_path)
+            if rotated_id is not None and file_id in (None, rotated_id):
+                self._read_file(self.rotated_path, offset if file_id is not None else 0, seq, match_id, events)
+            offset = 0
+        next_position = self._read_file(self.path, offset, seq, match_id, events)
+        return events, next_position or position
+
+
+class DeltaFeed:
+    """Diff each scrape against the previous one and append the resulting events to the log"""
+
+    def __init__(self, store, event_log):
+        self.store = store
+        self.event_log = event_log
+        self._previous = {}
+
+    def _previous_payload(self, match_id):
+        if match_id not in self._previous:
+            # First sight of this match in this process: the stored shard is the baseline
+            try:
+                self._previous[match_id] = self.store.read_match(match_id)
+            except FileNotFoundError:
+                self._previous[match_id] = None
+        return self._previous[match_id]
+
+    def process(self, data):
+        """Emit events for {match_id: payload}; call before the store is overwritten"""
+        records = []
+        for match_id, match_data in data.items():
+            events = diff_snapshots(self._previous_payload(match_id), match_data)
+            records.extend(self.event_log.append(match_id, events))
+            self._previous[match_id] = match_data
+        for match_id in list(self._previous):
+            if match_id not in data:
+                self._previous.pop(match_id)
+        return records
+
+
+_event_logs = {}
+_event_logs_lock = threading.Lock()
+
+
+def get_event_log(store_dir=DEFAULT_STORE_DIR):
+    """Return the shared event log that lives next to a live store"""
+    store = get_store(store_dir)
+    with _event_logs_lock:
+        if store.root not in _event_logs:
+            _event_logs[store.root] = EventLog(os.path.join(store.root, "events.jsonl"))
+        return _event_logs[store.root]
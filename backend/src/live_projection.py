@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+import json
+import logging
+import os
+import threading
+from datetime import datetime
+
+from src.data_processor import MatchDataProcessor
+from src.live_store import get_store, DEFAULT_STORE_DIR
+
+logger = logging.getLogger("cricket_commentary.live_projection")
+
+PLAYER_IMAGE_URL = "https://img1.hscicdn.com/image/upload/f_auto,t_ds_square_w_320,q_50/lsci/db/PICTURES/CMS/{prefix}/{image_id}.png"
+
+
+def format_innings_score(runs, wickets, overs):
+    """Format an innings score the way the scoreboard shows it"""
+    return f"{runs}/{wickets} ({overs} ov)"
+
+
+def determine_batting_team(match_data):
+    """Work out whether team1 or team2 of the match is currently batting"""
+    match_info = match_data.get("match", {})
+    common_data = match_data.get("centre", {}).get("common", {})
+    current_innings = common_data.get("innings", {})
+    innings_list = common_data.get("innings_list", [])
+    team1_id = match_info.get("team1_id")
+    team2_id = match_info.get("team2_id")
+
+    # Method 1: the current innings in centre.common
+    current_batting_team_id = current_innings.get("batting_team_id") if current_innings else None
+
+    # Method 2: the innings_list entry flagged as current
+    if not current_batting_team_id and innings_list:
+        current_innings_item = next((inn for inn in innings_list if inn.get("current") == 1), None)
+        if current_innings_item:
+            current_batting_team_id = current_innings_item.get("team_id")
+
+    # Method 3: the live innings block
+    if not current_batting_team_id:
+        current_batting_team_id = match_data.get("live", {}).get("innings", {}).get("batting_team_id")
+
+    if current_batting_team_id:
+        if str(current_batting_team_id) == str(team1_id):
+            return "team1"
+        if str(current_batting_team_id) == str(team2_id):
+            return "team2"
+
+    # Fall back to who batted first and which innings we are in
+    batting_first_team_id = match_info.get("batting_first_team_id")
+    if batting_first_team_id:
+        is_first_innings = current_innings.get("innings_number", "1") == "1"
+        if str(batting_first_team_id) == str(team1_id):
+            return "team1" if is_first_innings else "team2"
+        if str(batting_first_team_id) == str(team2_id):
+            return "team2" if is_first_innings else "team1"
+
+    return "team2"
+
+
+def _player_image_url(image_id):
+    """Build the player headshot URL from a Cricinfo image id"""
+    if not image_id:
+        return ""
+    prefix = image_id[:4] + "00" if len(image_id) >= 4 else ""
+    return PLAYER_IMAGE_URL.format(prefix=prefix, image_id=image_id)
+
+
+def build_scoreboard(match_id, match_data):
+    """Build the /api/live-scores entry for a single match"""
+    match_info = match_data.get("match", {})
+    common_data = match_data.get("centre", {}).get("common", {})
+    current_innings = common_data.get("innings", {})
+
+    team1_name = match_info.get("team1_name", "Team 1")
+    team2_name = match_info.get("team2_name", "Team 2")
+    team1_id = match_info.get("team1_id")
+    team2_id = match_info.get("team2_id")
+    team_batting = determine_batting_team(match_data)
+
+    team1_score = "Yet to bat"
+    team2_score = "Yet to bat"
+
+    # Completed innings first (event=5 is "complete" in cricket data)
+    for inning in match_data.get("innings", []):
+        if inning.get("event", "") == 5 or inning.get("event_name", "") == "complete":
+            formatted_score = format_innings_score(
+                inning.get("runs", "0"), inning.get("wickets", "0"), inning.get("overs", "0.0")
+            )
+            batting_team_id = inning.get("batting_team_id", "")
+            if str(batting_team_id) == str(team1_id):
+                team1_score = formatted_score
+            elif str(batting_team_id) == str(team2_id):
+                team2_score = formatted_score
+
+    # The current innings carries the most up-to-date score
+    if current_innings:
+        current_batting_team_id = current_innings.get("batting_team_id")
+        if not current_batting_team_id:
+            current_batting_team_id = team1_id if team_batting == "team1" else team2_id
+        if current_batting_team_id:
+            formatted_score = format_innings_score(
+                current_innings.get("runs", 0), current_innings.get("wickets", 0), current_innings.get("overs", "0.0")
+            )
+            if str(current_batting_team_id) == str(team1_id):
+                team1_score = formatted_score
+            elif str(current_batting_team_id) == str(team2_id):
+                team2_score = formatted_score
+
+    # The scoreboard always lists team2 first and team1 second
+    response_team1_name, response_team2_name = team2_name, team1_name
+    response_team1_score, response_team2_score = team2_score, team1_score
+    response_team1_obj_id = match_info.get("team2_object_id", "0")
+    response_team2_obj_id = match_info.get("team1_object_id", "0")
+
+    match_status = ""
+    required_info = ""
+    innings_number = current_innings.get("innings_number") if current_innings else None
+    target = current_innings.get("target") if current_innings else None
+    if innings_number == "2" and target:
+        remaining_runs = int(target) - int(current_innings.get("runs", 0))
+        remaining_balls = current_innings.get("remaining_balls")
+        remaining_overs = current_innings.get("remaining_overs")
+        if remaining_runs > 0 and remaining_balls:
+            match_status = f"{response_team2_name} require {remaining_runs} runs from {remaining_overs} overs"
+            required_info = f"RRR: {current_innings.get('required_run_rate', 0)}"
+        elif remaining_runs <= 0:
+            match_status = f"{response_team2_name} won by {10 - int(current_innings.get('wickets', 0))} wickets"
+
+    result = common_data.get("match", {}).get("result_string", "")
+    if result:
+        match_status = result
+
+    status_info = {
+        "match_status": match_data.get("live", {}).get("status", "") or match_status,
+        "required_info": required_info
+    }
+
+    # Build player_id -> image_id mapping
+    player_id_to_image = {}
+    for team in match_data.get("team", []):
+        for player in team.get("player", []):
+            pid = str(player.get("player_id", ""))
+            imgid = player.get("image_id", "")
+            if pid and imgid:
+                player_id_to_image[pid] = str(imgid)
+
+    batsmen = []
+    for player in match_data.get("centre", {}).get("batting", []):
+        if player.get("live_current_name") in ["striker", "non-striker"]:
+            batsmen.append({
+                "name": player.get("known_as", ""),
+                "runs": int(player.get("runs", 0)),
+                "balls": int(player.get("balls_faced", 0)),
+                "image_url": _player_image_url(player_id_to_image.get(str(player.get("player_id", "")), ""))
+            })
+
+    bowler = {}
+    for player in match_data.get("centre", {}).get("bowling", []):
+        if player.get("live_current_name") == "current bowler":
+            bowler = {
+                "name": player.get("known_as", ""),
+                "overs": player.get("overs", "0.0"),
+                "wickets": int(player.get("wickets", 0)),
+                "image_url": _player_image_url(player_id_to_image.get(str(player.get("player_id", "")), ""))
+            }
+            break
+
+    # Format present_datetime_local to 12-hr IST
+    last_updated = ""
+    try:
+        raw_time = match_info.get("present_datetime_local")
+        if raw_time:
+            last_updated = datetime.strptime(raw_time, "%Y-%m-%d %H:%M:%S").strftime("%I:%M:%S %p")
+    except Exception as e:
+        logger.error(f"Error formatting datetime: {e}")
+
+    return {
+        "id": match_id,
+        "team1": response_team1_name,
+        "team1Score": response_team1_score,
+        "team1ObjectId": response_team1_obj_id,
+        "team2": response_team2_name,
+        "team2Score": response_team2_score,
+        "team2ObjectId": response_team2_obj_id,
+        "result": result,
+        "batsmen": batsmen,
+        "bowler": bowler,
+        "stadium": match_info.get("ground_name", "Unknown Stadium"),
+        "last_updated": last_updated,
+        "status_info": status_info
+    }
+
+
+def build_snapshot(match_id, match_data, store=None):
+    """Compute every derived view of one match from its raw data"""
+    processor = MatchDataProcessor(match_id, store)
+    processor.match_data = match_data
+    return {
+        "match_id": match_id,
+        "match_data": match_data,
+        "scoreboard": build_scoreboard(match_id, match_data),
+        "prompt_data": processor.format_match_data_for_prompt()
+    }
+
+
+class LiveMatchProjection:
+    """Read the live store once per change and publish per-match views in memory"""
+
+    def __init__(self, store):
+        self.store = store
+        self._lock = threading.Lock()
+        self._manifest_version = None
+        self._snapshots = {}
+
+    def get_snapshots(self):
+        """
+        Return {match_id: snapshot} for every live match, recomputing only on change.
+
+        Nothing is read unless the store manifest changed, and then only the shards
+        of matches whose hash moved are opened and rebuilt, so the work per refresh
+        is proportional to the matches that actually changed.
+        """
+        manifest_version = self.store.manifest_version()
+        with self._lock:
+            if manifest_version != self._manifest_version:
+                manifest = self.store.read_manifest()
+                snapshots = {}
+                for match_id, entry in manifest.get("matches", {}).items():
+                    previous = self._snapshots.get(match_id)
+                    if previous is not None and previous["hash"] == entry["hash"]:
+                        snapshots[match_id] = previous
+                        continue
+                    try:
+                        match_data = self.store.read_match(match_id)
+                    except FileNotFoundError:
+                        # Match ended between reading the manifest and its shard
+                        continue
+                    snapshots[match_id] = build_snapshot(match_id, match_data, self.store)
+                    snapshots[match_id]["hash"] = entry["hash"]
+                    snapshots[match_id]["sequence"] = entry["sequence"]
+                    logger.info(f"Live projection refreshed for match ID: {match_id}")
+                self._snapshots = snapshots
+                self._manifest_version = manifest_version
+            return self._snapshots
+
+    def get_snapshot(self, match_id=None):
+        """
+        Return the snapshot for one match (the first live match if match_id is None).
+
+        Returns None if there is no such match.
+        """
+        snapshots = self.get_snapshots()
+        if match_id is None:
+            return next(iter(snapshots.values()), None)
+        return snapshots.get(str(match_id))
+
+    def get_match_ids(self):
+        """Return the ids of all live matches"""
+        return list(self.get_snapshots().keys())
+
+    def try_get_snapshots(self):
+        """Like get_snapshots, but logs errors and returns {} instead of raising"""
+        try:
+            return self.get_snapshots()
+        except Exception as e:
+            logger.error(f"Error reading live match data: {e}")
+            return {}
+
+    def try_get_snapshot(self, match_id=None):
+        """Like get_snapshot, but logs errors and returns None instead of raising"""
+        try:
+            return self.get_snapshot(match_id)
+        except Exception as e:
+            logger.error(f"Error reading live match data: {e}")
+            return None
+
+
+_projections = {}
+_projections_lock = threading.Lock()
+
+
+def get_projection(store_dir=DEFAULT_STORE_DIR):
+    """Return the shared projection for a live store directory"""
+    store = get_store(store_dir)
+    with _projections_lock:
+        if store.root not in _projections:
+            _projections[store.root] = LiveMatchProjection(store)
+        return _projections[store.root]
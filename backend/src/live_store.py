@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger("cricket_commentary.live_store")
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUNDLED_STORE_DIR = os.path.join(BACKEND_DIR, "live_data")
+# LIVE_STORE_DIR points every component at another store, e.g. one fed by replay.py
+DEFAULT_STORE_DIR = os.environ.get("LIVE_STORE_DIR", BUNDLED_STORE_DIR)
+# The old single-file layout; used to seed an empty bundled store
+LEGACY_DATA_FILE = os.path.join(BACKEND_DIR, "data_live.json")
+
+
+def payload_hash(match_data):
+    """Stable content hash of one match payload"""
+    canonical = json.dumps(match_data, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def atomic_write_json(path, data, **dump_kwargs):
+    """Write JSON to a temp file in the same directory and os.replace it over path"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp_", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, **dump_kwargs)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class LiveStore:
+    """
+    Live match data sharded one JSON file per match, plus a small manifest.
+
+    Layout of the store directory:
+        manifest.json     {"sequence": int, "updated_at": float,
+                           "matches": {match_id: {"hash": str, "sequence": int}}}
+        <match_id>.json   the raw Cricinfo payload for one match
+
+    Shards are written before the manifest that references them and removed
+    after the manifest that drops them, each with an atomic replace, so a
+    reader that goes manifest -> shard never sees a half-written file.
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    @property
+    def manifest_path(self):
+        return os.path.join(self.root, "manifest.json")
+
+    def shard_path(self, match_id):
+        return os.path.join(self.root, f"{match_id}.json")
+
+    def manifest_version(self):
+        """Stat-based marker of the manifest; lets readers skip even reading it"""
+        try:
+            stat = os.stat(self.manifest_path)
+            return (stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            return None
+
+    def read_manifest(self):
+        """Return the manifest (sequence 0 and no matches if none has been written yet)"""
+        try:
+            with open(self.manifest_path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {"sequence": 0, "updated_at": None, "matches": {}}
+
+    def read_sequence(self):
+        return self.read_manifest().get("sequence", 0)
+
+    def match_ids(self):
+        """Ids of the matches that are currently live"""
+        return list(self.read_manifest().get("matches", {}).keys())
+
+    def read_match(self, match_id):
+        """Load one match payload; raises FileNotFoundError if it is not in the store"""
+        with open(self.shard_path(match_id), "r") as f:
+            return json.load(f)
+
+    def read_all(self):
+        """Load every live match as {match_id: payload}"""
+        data = {}
+        for match_id in self.match_ids():
+            try:
+                data[match_id] = self.read_match(match_id)
+            except FileNotFoundError:
+                # Match ended between reading the manifest and its shard
+                continue
+        return data
+
+    def write_matches(self, data):
+        """
+        Make `data` ({match_id: payload}) the set of live matches.
+
+        Only shards whose hash changed are rewritten, matches no longer present are
+        removed, and the manifest is bumped only if something changed.
+        Returns the list of match ids that changed or were removed.
+        """
+        manifest = self.read_manifest()
+        previous = manifest.get("matches", {})
+        sequence = manifest.get("sequence", 0) + 1
+
+        matches = {}
+        changed = []
+        for match_id, match_data in data.items():
+            digest = payload_hash(match_data)
+            entry = previous.get(match_id)
+            if entry and entry["hash"] == digest and os.path.exists(self.shard_path(match_id)):
+                matches[match_id] = entry
+            else:
+                atomic_write_json(self.shard_path(match_id), match_data)
+                matches[match_id] = {"hash": digest, "sequence": sequence}
+                changed.append(match_id)
+
+        removed = [match_id for match_id in previous if match_id not in data]
+        if not changed and not removed:
+            return []
+
+        atomic_write_json(self.manifest_path, {
+            "sequence": sequence,
+            "updated_at": time.time(),
+            "matches": matches
+        }, indent=2)
+        for match_id in removed:
+            try:
+                os.remove(self.shard_path(match_id))
+            except FileNotFoundError:
+                pass
+        logger.info(f"Live store sequence {sequence}: changed={changed} removed={removed}")
+        return changed + removed
+
+    def seed_from_file(self, data_file=LEGACY_DATA_FILE):
+        """Import a monolithic data_live.json into an empty store"""
+        if self.manifest_version() is not None or not os.path.exists(data_file):
+            return []
+        try:
+            with open(data_file, "r") as f:
+                data = json.load(f)
+        except json.JSONDecodeError as e:
+            logger.error(f"Could not seed live store from {data_file}: {e}")
+            return []
+        logger.info(f"Seeding live store {self.root} from {data_file}")
+        return self.write_matches(data)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(root=DEFAULT_STORE_DIR):
+    """Return the shared store for a directory, seeding the bundled one from data_live.json"""
+    root = os.path.abspath(root)
+    with _stores_lock:
+        if root not in _stores:
+            store = LiveStore(root)
+            if root == os.path.abspath(BUNDLED_STORE_DIR):
+                store.seed_from_file(LEGACY_DATA_FILE)
+            _stores[root] = store
+        return _stores[root]
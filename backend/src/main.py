@@ -3,7 +3,6 @@ import time
 import logging
 import os
 import sys
-import json
 from datetime import datetime
 from colorama import init, Fore, Style
 import threading
@@ -13,34 +12,23 @@ from dotenv import load_dotenv
 
 load_dotenv(override=True)
     
-from data_processor import MatchDataProcessor
-from commentary_generator import CommentaryGenerator
-from elevenlabs import stream, ElevenLabs
+from src.commentary_files import commentary_file_for
 
 # Initialize colorama
 init()
 
-# Function to get the first match ID from data_live.json
-def get_match_id():
-    try:
-        data_file = os.path.join(os.path.dirname(os.path.dirname(__file__)), "data_live.json")
-        with open(data_file, "r") as f:
-            data = json.load(f)
-        return list(data.keys())[0]
-    except Exception as e:
-        logging.error(f"Error getting match ID from data_live.json: {e}")
-        return "1473470"  # Fallback to default ID if there's an error
-
-# Get match ID from the first key in data_live.json
-MATCH_ID = get_match_id()
 COMMENTARY_FILE = "commentary_history.json"
 DEFAULT_INTERVAL = 10  # Default seconds between commentary generation
 MIN_INTERVAL = 0  # Minimum interval between commentaries
+MATCH_POLL_INTERVAL = 5  # Seconds between checks for matches starting or ending
 
 # Commentary provider and model settings - get from environment or use defaults
 PROVIDER = os.environ.get("COMMENTARY_PROVIDER", "openai")  # Default to OpenAI
 MODEL_NAME = os.environ.get("COMMENTARY_MODEL", "gpt-4o-mini")  # Default to GPT-4o-mini
 
+# Text-to-speech backend: "elevenlabs", or "stub" to skip audio (replays and benchmarks)
+TTS_PROVIDER = os.environ.get("COMMENTARY_TTS", "elevenlabs")
+
 # Eleven Labs API key - Use environment variable from .env or fallback
 ELEVEN_API_KEY = os.environ.get("ELEVEN_API_KEY")
 VOICE_ID = "JJQDkHrp6uKU5Vk0WKhY"  # Default voice ID
@@ -58,31 +46,52 @@ logging.basicConfig(
 )
 logger = logging.getLogger("cricket_commentary")
 
-# Initialize ElevenLabs client
-try:
-    eleven = ElevenLabs(api_key=ELEVEN_API_KEY)
-    logger.info("ElevenLabs client initialized")
-except Exception as e:
-    logger.error(f"Error initializing ElevenLabs client: {e}")
-    logger.warning("Text-to-speech functionality may not work properly")
-    eleven = None
+# ElevenLabs client, created on first use and shared by every match worker
+eleven = None
+eleven_lock = threading.Lock()
+
+def get_eleven_client():
+    """Return the shared ElevenLabs client, or None if it cannot be created"""
+    global eleven
+    with eleven_lock:
+        if eleven is None:
+            try:
+                from elevenlabs import ElevenLabs
+                eleven = ElevenLabs(api_key=ELEVEN_API_KEY)
+                logger.info("ElevenLabs client initialized")
+            except Exception as e:
+                logger.error(f"Error initializing ElevenLabs client: {e}")
+                logger.warning("Text-to-speech functionality may not work properly")
+                eleven = False  # Don't retry on every commentary
+        return eleven or None
 
-def display_commentary(commentary, timestamp):
+def display_commentary(commentary, timestamp, match_id=""):
     """Display commentary with colorful formatting"""
     print("\n" + "="*80)
-    print(f"\n{Fore.YELLOW}[{timestamp}]{Style.RESET_ALL} {Fore.CYAN}COMMENTARY:{Style.RESET_ALL}")
+    print(f"\n{Fore.YELLOW}[{timestamp}]{Style.RESET_ALL} {Fore.CYAN}COMMENTARY {match_id}:{Style.RESET_ALL}")
     print(f"{Fore.WHITE}{commentary}{Style.RESET_ALL}")
     print("\n" + "="*80 + "\n")
 
 def play_audio_in_thread(audio_stream):
     """Play audio in a separate thread"""
     try:
+        from elevenlabs import stream
         stream(audio_stream)
     except Exception as e:
         logger.error(f"Error during audio streaming: {e}")
 
+def estimate_speech_duration(commentary):
+    """Approximate audio length, assuming an average speaking rate of 150 words per minute"""
+    words = len(commentary.split())
+    return (words / 150) * 60  # in seconds
+
 def speak_commentary(commentary):
     """Convert text to speech and start playing it in a thread"""
+    if TTS_PROVIDER == "stub":
+        # Pace the loop as if the audio had played, without any network call
+        return estimate_speech_duration(commentary)
+    
+    eleven = get_eleven_client()
     if not eleven:
         logger.warning("ElevenLabs client not available, skipping TTS")
         return DEFAULT_INTERVAL
@@ -95,10 +104,7 @@ def speak_commentary(commentary):
             model_id=MODEL_ID,
         )
         
-        # Calculate audio duration (approximate)
-        # Assuming average speaking rate of 150 words per minute
-        words = len(commentary.split())
-        estimated_duration = (words / 150) * 60  # in seconds
+        estimated_duration = estimate_speech_duration(commentary)
         
         # Start streaming the audio in a separate thread
         logger.info(f"Starting audio playback (estimated duration: {estimated_duration:.1f}s)")
@@ -111,78 +117,87 @@ def speak_commentary(commentary):
         logger.error(f"Error in text-to-speech: {e}")
         return DEFAULT_INTERVAL
 
-def main():
-    """Main function to run the commentary generator"""
-    logger.info(f"Starting cricket commentary generator with TTS using {PROVIDER} provider and {MODEL_NAME} model")
+def generate_match_commentary(match_id, projection, generator, commentary_file, display=True):
+    """
+    One commentary step for a match: read its snapshot, generate, display and save.
     
-    # Initialize the data processor and commentary generator
-    try:
-        data_processor = MatchDataProcessor(MATCH_ID)
-    except Exception as e:
-        logger.error(f"Failed to initialize data processor: {e}")
-        return
+    Returns the commentary, or None if the match is no longer live.
+    """
+    # Read the shared live snapshot (only re-parsed when the store changes)
+    snapshot = projection.try_get_snapshot(match_id)
+    if not snapshot:
+        return None
     
-    # Get OpenAI API key from environment if using OpenAI
-    openai_api_key = None
-    if PROVIDER == "openai":
-        openai_api_key = os.environ.get("OPENAI_API_KEY")
-        if not openai_api_key or openai_api_key == "your_openai_api_key_here":
-            logger.error("OpenAI API key not properly set in .env file or environment")
-            logger.error("Please set a valid API key in the .env file or environment")
-            return
+    # Generate new commentary from the match data already formatted for the LLM prompt
+    logger.info(f"Generating new commentary for match {match_id}...")
+    commentary = generator.generate_commentary(snapshot["prompt_data"], commentary_file=commentary_file)
     
-    # Initialize the commentary generator with the appropriate provider and model
-    try:
-        generator = CommentaryGenerator(
-            model_name=MODEL_NAME, 
-            commentary_file=COMMENTARY_FILE,
-            provider=PROVIDER,
-            openai_api_key=openai_api_key
-        )
-        logger.info(f"Commentary generator initialized with {PROVIDER} provider")
-    except Exception as e:
-        logger.error(f"Failed to initialize commentary generator: {e}")
-        return
+    # Display the commentary
+    if display:
+        current_time = datetime.now().strftime('%H:%M:%S')
+        display_commentary(commentary, current_time, match_id)
     
-    try:
-        while True:
-            # Load the latest match data
-            match_data = data_processor.load_data()
-            if not match_data:
-                logger.error("Failed to load match data, retrying in 10 seconds")
-                time.sleep(DEFAULT_INTERVAL)
-                continue
-            
-            # Format match data for LLM prompt
-            prompt_data = data_processor.format_match_data_for_prompt()
-            
-            # Generate new commentary
-            logger.info("Generating new commentary...")
-            commentary = generator.generate_commentary(prompt_data)
-            
-            # Display the commentary
-            current_time = datetime.now().strftime('%H:%M:%S')
-            display_commentary(commentary, current_time)
-            
-            # Save the commentary
-            generator.save_commentary(commentary)
+    # Save the commentary
+    generator.save_commentary(commentary, commentary_file=commentary_file)
+    return commentary
+
+def run_match_commentary(match_id, projection, generator, stop_event, stats=None):
+    """
+    Commentary loop for a single match; runs until the match leaves the live feed or stop_event is set.
+    
+    If given, `stats` is updated with the commentary count, last commentary time and last error.
+    """
+    stats = stats if stats is not None else {}
+    commentary_file = commentary_file_for(match_id)
+    logger.info(f"Commentary worker started for match {match_id}")
+    
+    while not stop_event.is_set():
+        try:
+            commentary = generate_match_commentary(match_id, projection, generator, commentary_file)
+            if commentary is None:
+                logger.info(f"Match {match_id} is no longer live, stopping its commentary")
+                break
+            stats["commentaries"] = stats.get("commentaries", 0) + 1
+            stats["last_commentary_at"] = time.time()
             
             # Start speaking the commentary and get estimated duration
             audio_duration = speak_commentary(commentary)
             
-            # Calculate wait time (audio duration minus 1 second, with minimum threshold)
-            wait_time = max(audio_duration, MIN_INTERVAL)
-            
             # Wait before generating the next commentary
             # We immediately start preparing the next commentary without waiting for audio to finish
-            logger.info(f"Waiting for {wait_time:.1f} seconds before next commentary")
-            time.sleep(wait_time)
+            wait_time = max(audio_duration, MIN_INTERVAL)
+            logger.info(f"Match {match_id}: waiting for {wait_time:.1f} seconds before next commentary")
+            stop_event.wait(wait_time)
+        except Exception as e:
+            logger.error(f"Unexpected error in commentary for match {match_id}: {e}")
+            stats["last_error"] = str(e)
+            stop_event.wait(DEFAULT_INTERVAL)
     
+    logger.info(f"Commentary worker stopped for match {match_id}")
+
+def main():
+    """Main function to run the commentary generator for every live match"""
+    from src.commentary_service import get_commentary_service, STOPPED, ERROR
+    
+    logger.info(f"Starting cricket commentary generator with TTS using {PROVIDER} provider and {MODEL_NAME} model")
+    
+    # Same service the API manages, run in the foreground until interrupted
+    service = get_commentary_service()
+    status, message = service.start()
+    if status != "started":
+        logger.error(message)
+        return
+    
+    try:
+        while service.status() not in (STOPPED, ERROR):
+            time.sleep(MATCH_POLL_INTERVAL)
+        health = service.health()
+        if health["error"]:
+            logger.error(f"Commentary service failed: {health['error']}")
     except KeyboardInterrupt:
         logger.info("Commentary generator stopped by user")
-    except Exception as e:
-        logger.error(f"Unexpected error: {e}")
-        logger.exception("Full traceback:")
+    finally:
+        service.stop()
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
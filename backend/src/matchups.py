@@ -0,0 +1,334 @@
+#!/usr/bin/env python3
+import hashlib
+import io
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+
+from src.deliveries_index import DELIVERIES_CSV, NOT_BOWLED, NOT_BOWLER_WICKETS, PHASES, match_name, rate
+
+logger = logging.getLogger("cricket_commentary.matchups")
+
+MATCHUP_REFRESH_INTERVAL = 5  # Seconds between checks of the CSV for new deliveries
+FINGERPRINT_BYTES = 64  # Bytes before the read offset hashed to detect a rewritten CSV
+MATCHUP_COLUMNS = [
+    "over", "batter", "bowler", "batting_team", "bowling_team", "batsman_runs",
+    "total_runs", "extras_type", "is_wicket", "player_dismissed", "dismissal_kind"
+]
+# Counters kept per matchup; "dismissals" are the batter's dismissals credited to the
+# bowler for batter-vs-bowler, and all wickets for team-vs-team
+METRICS = ("runs", "balls", "dismissals", "dot_balls", "fours", "sixes")
+
+
+class MatchupTable:
+    """
+    Counters per (a, b) pair of entity codes, overall and per over phase.
+
+    counts[row] has shape (1 + len(PHASES), len(METRICS)): the first line is the
+    whole matchup, the others the powerplay/middle/death splits. rows maps a pair
+    to its row, so a lookup is one dict access; by_first / by_second list the rows
+    of every pair an entity is part of.
+    """
+
+    def __init__(self, capacity=1024):
+        self.rows = {}
+        self.pairs = []
+        self.by_first = {}
+        self.by_second = {}
+        self.counts = np.zeros((capacity, 1 + len(PHASES), len(METRICS)), dtype=np.int64)
+
+    def add(self, first, second, phase, values):
+        """Add a batch of deliveries: entity codes, phase index and one column of `values` per metric"""
+        keys = (first.astype(np.int64) << 32) | second.astype(np.int64)
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        batch = np.zeros((len(unique_keys), 1 + len(PHASES), len(METRICS)), dtype=np.int64)
+        for metric in range(len(METRICS)):
+            weights = values[:, metric]
+            batch[:, 0, metric] = np.bincount(inverse, weights=weights, minlength=len(unique_keys))
+            by_phase = np.bincount(inverse * len(PHASES) + phase, weights=weights, minlength=len(unique_keys) * len(PHASES))
+            batch[:, 1:, metric] = by_phase.reshape(-1, len(PHASES))
+
+        rows = np.empty(len(unique_keys), dtype=np.int64)
+        for position, key in enumerate(unique_keys.tolist()):
+            row = self.rows.get(key)
+            if row is None:
+                row = self._new_row(key >> 32, key & 0xFFFFFFFF, key)
+            rows[position] = row
+        self.counts[rows] += batch
+
+    def _new_row(self, first, second, key):
+        row = len(self.pairs)
+        if row == len(self.counts):
+            self.counts = np.concatenate([self.counts, np.zeros_like(self.counts)])
+        self.rows[key] = row
+        self.pairs.append((first, second))
+        self.by_first.setdefault(first, []).append(row)
+        self.by_second.setdefault(second, []).append(row)
+        return row
+
+    def get(self, first, second):
+        row = self.rows.get((first << 32) | second)
+        return None if row is None else self.counts[row]
+
+
+def summarize(counts, dismissal_key="dismissals"):
+    """Figures of one matchup row, with rates, overall and per phase"""
+    def figures(line):
+        stats = dict(zip(METRICS, (int(value) for value in line)))
+        stats[dismissal_key] = stats.pop("dismissals")
+        stats.update(
+            strike_rate=rate(stats["runs"], stats["balls"], 100),
+            run_rate=rate(stats["runs"], stats["balls"], 6),
+            dot_ball_pct=rate(stats["dot_balls"], stats["balls"], 100),
+            average=rate(stats["runs"], stats[dismissal_key])
+        )
+        return stats
+
+    stats = figures(counts[0])
+    stats["phases"] = {phase: figures(counts[position + 1]) for position, phase in enumerate(PHASES)}
+    return stats
+
+
+class MatchupTables:
+    """
+    Precomputed batter-vs-bowler and team-vs-team tables over deliveries.csv.
+
+    Built once from the CSV, then kept current by reading only the rows appended
+    since the last refresh (checked at most every MATCHUP_REFRESH_INTERVAL seconds,
+    when the file has changed). Every lookup is a dict access into the tables.
+
+    As in vector_updater.py/csv_tail.py, a refresh seeks to the byte offset past
+    the last complete line it parsed, so a half-written last row is left for the
+    next refresh. The file's inode and a fingerprint of the bytes before the
+    offset detect a replaced, truncated or rewritten CSV, which is rebuilt.
+    """
+
+    def __init__(self, csv_path=DELIVERIES_CSV):
+        self.csv_path = csv_path
+        self._lock = threading.RLock()
+        self._reset()
+
+    def _reset(self):
+        self.players, self.player_codes = [], {}
+        self.teams, self.team_codes = [], {}
+        self.batter_vs_bowler = MatchupTable()
+        self.team_vs_team = MatchupTable()
+        self.rows_loaded = 0
+        self._file_state = None
+        self._checked_at = 0
+        self._offset = 0
+        self._inode = None
+        self._fingerprint = None
+        self._header = None
+
+    def _codes(self, series, names, codes):
+        """Map a column of names to codes, extending the vocabulary with new names"""
+        import pandas as pd
+
+        local_codes, uniques = pd.factorize(series)
+        lookup = np.empty(len(uniques) + 1, dtype=np.int64)
+        for position, name in enumerate(uniques):
+            name = str(name)
+            if name not in codes:
+                codes[name] = len(names)
+                names.append(name)
+            lookup[position] = codes[name]
+        lookup[-1] = -1  # Missing values (factorize code -1)
+        return lookup[local_codes]
+
+    def add_deliveries(self, frame):
+        """Add a batch of deliveries (rows of deliveries.csv) to both tables"""
+        if frame.empty:
+            return
+        batter = self._codes(frame["batter"], self.players, self.player_codes)
+        bowler = self._codes(frame["bowler"], self.players, self.player_codes)
+        dismissed = self._codes(frame["player_dismissed"], self.players, self.player_codes)
+        batting_team = self._codes(frame["batting_team"], self.teams, self.team_codes)
+        bowling_team = self._codes(frame["bowling_team"], self.teams, self.team_codes)
+
+        over = frame["over"].to_numpy()
+        phase = np.where(over < 6, 0, np.where(over < 15, 1, 2))
+        batsman_runs = frame["batsman_runs"].to_numpy(dtype=np.int64)
+        total_runs = frame["total_runs"].to_numpy(dtype=np.int64)
+        is_wicket = frame["is_wicket"].to_numpy(dtype=bool)
+        extras = frame["extras_type"]
+        ball_faced = (extras != "wides").to_numpy()
+        ball_bowled = (~extras.isin(NOT_BOWLED)).to_numpy()
+        bowler_wicket = is_wicket & ~frame["dismissal_kind"].isin(NOT_BOWLER_WICKETS).to_numpy()
+
+        self.batter_vs_bowler.add(batter, bowler, phase, np.column_stack([
+            batsman_runs,
+            ball_faced,
+            (dismissed == batter) & bowler_wicket,
+            (batsman_runs == 0) & ball_faced,
+            batsman_runs == 4,
+            batsman_runs == 6
+        ]).astype(np.int64))
+        self.team_vs_team.add(batting_team, bowling_team, phase, np.column_stack([
+            total_runs,
+            ball_bowled,
+            is_wicket,
+            (total_runs == 0) & ball_bowled,
+            batsman_runs == 4,
+            batsman_runs == 6
+        ]).astype(np.int64))
+        self.rows_loaded += len(frame)
+
+    def _stat_csv(self):
+        stat = os.stat(self.csv_path)
+        return stat.st_mtime_ns, stat.st_size
+
+    @staticmethod
+    def _fingerprint_at(f, offset):
+        start = max(0, offset - FINGERPRINT_BYTES)
+        f.seek(start)
+        return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+    def _read_appended(self):
+        """
+        Parse the complete lines past the read offset into a frame, or None if the
+        file was replaced, truncated or rewritten before the offset
+        """
+        import pandas as pd
+
+        with open(self.csv_path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if self._offset and (stat.st_ino != self._inode or stat.st_size < self._offset
+                                 or self._fingerprint_at(f, self._offset) != self._fingerprint):
+                return None
+            self._inode = stat.st_ino
+            f.seek(self._offset)
+            data = f.read()
+            # deliveries.csv has no quoted newlines: a row is complete at its newline
+            length = data.rfind(b"\n") + 1
+            if self._header is None and length:
+                header_end = data.index(b"\n") + 1
+                self._header = data[:header_end].decode("utf-8").strip().split(",")
+                data, length, self._offset = data[header_end:], length - header_end, header_end
+            if not length:
+                return pd.DataFrame(columns=MATCHUP_COLUMNS)
+            frame = pd.read_csv(io.BytesIO(data[:length]), header=None, names=self._header, usecols=MATCHUP_COLUMNS)
+            self._offset += length
+            self._fingerprint = self._fingerprint_at(f, self._offset)
+        return frame
+
+    def load(self):
+        """Build the tables from the whole CSV"""
+        start = time.perf_counter()
+        with self._lock:
+            self._file_state = self._stat_csv()
+            self.add_deliveries(self._read_appended())
+            self._checked_at = time.monotonic()
+        logger.info(
+            f"Built {len(self.batter_vs_bowler.pairs)} batter-vs-bowler and {len(self.team_vs_team.pairs)} "
+            f"team-vs-team matchups from {self.rows_loaded} deliveries in {time.perf_counter() - start:.2f}s"
+        )
+        return self
+
+    def refresh(self):
+        """Add the rows appended to the CSV since the last load/refresh; returns how many were added"""
+        with self._lock:
+            self._checked_at = time.monotonic()
+            file_state = self._stat_csv()
+            if file_state == self._file_state:
+                return 0
+            self._file_state = file_state
+            frame = self._read_appended()
+            if frame is None:
+                # Rewritten rather than appended to: rebuild from scratch
+                logger.info(f"{self.csv_path} was rewritten; rebuilding the matchup tables")
+                self._reset()
+                self.load()
+                return self.rows_loaded
+            self.add_deliveries(frame)
+        if len(frame):
+            logger.info(f"Added {len(frame)} new deliveries to the matchup tables")
+        return len(frame)
+
+    def _fresh(self):
+        if time.monotonic() - self._checked_at >= MATCHUP_REFRESH_INTERVAL:
+            try:
+                self.refresh()
+            except (OSError, ValueError) as e:
+                logger.warning(f"Could not refresh matchup tables: {e}")
+
+    def _player(self, name):
+        name = match_name(name, self.players)
+        return name, self.player_codes[name]
+
+    def _team(self, name):
+        name = match_name(name, self.teams, "team")
+        return name, self.team_codes[name]
+
+    def batter_vs_bowler_matchup(self, batter: str, bowler: str) -> dict:
+        """Batter against bowler: runs, balls, dismissals, strike rate, average, dot ball percentage, fours and sixes, overall and per over phase (powerplay, middle, death)."""
+        self._fresh()
+        with self._lock:
+            batter, batter_code = self._player(batter)
+            bowler, bowler_code = self._player(bowler)
+            counts = self.batter_vs_bowler.get(batter_code, bowler_code)
+            stats = summarize(counts if counts is not None else np.zeros((1 + len(PHASES), len(METRICS)), dtype=np.int64))
+        return dict(stats, batter=batter, bowler=bowler)
+
+    def bowlers_faced(self, batter: str, limit: int = 10, order_by: str = "balls") -> list:
+        """Bowlers a batter has faced most, with the full matchup figures. order_by is one of balls, runs, dismissals."""
+        return self._matchups_of(batter, limit, order_by, by_batter=True)
+
+    def batters_bowled_to(self, bowler: str, limit: int = 10, order_by: str = "balls") -> list:
+        """Batters a bowler has bowled to most, with the full matchup figures. order_by is one of balls, runs, dismissals."""
+        return self._matchups_of(bowler, limit, order_by, by_batter=False)
+
+    def _matchups_of(self, name, limit, order_by, by_batter):
+        if order_by not in ("balls", "runs", "dismissals"):
+            raise ValueError("order_by must be one of balls, runs, dismissals")
+        self._fresh()
+        table = self.batter_vs_bowler
+        with self._lock:
+            name, code = self._player(name)
+            rows = np.array((table.by_first if by_batter else table.by_second).get(code, []), dtype=np.int64)
+            if not len(rows):
+                return []
+            key = table.counts[rows, 0, METRICS.index(order_by)]
+            top = rows[np.argsort(-key, kind="stable")[:limit]]
+            matchups = []
+            for row in top:
+                batter_code, bowler_code = table.pairs[row]
+                stats = summarize(table.counts[row])
+                matchups.append(dict(stats, batter=self.players[batter_code], bowler=self.players[bowler_code]))
+        return matchups
+
+    def team_matchup(self, team: str, opponent: str) -> dict:
+        """Team against team: runs, balls, wickets, run rate and dot ball percentage for each side batting, overall and per over phase."""
+        self._fresh()
+        with self._lock:
+            team, team_code = self._team(team)
+            opponent, opponent_code = self._team(opponent)
+            empty = np.zeros((1 + len(PHASES), len(METRICS)), dtype=np.int64)
+            team_batting = self.team_vs_team.get(team_code, opponent_code)
+            opponent_batting = self.team_vs_team.get(opponent_code, team_code)
+            return {
+                "team": team,
+                "opponent": opponent,
+                f"{team} batting": summarize(team_batting if team_batting is not None else empty, "wickets"),
+                f"{opponent} batting": summarize(opponent_batting if opponent_batting is not None else empty, "wickets")
+            }
+
+    def matchup_functions(self):
+        """The lookups offered to the chat agent as tools"""
+        return (self.batter_vs_bowler_matchup, self.bowlers_faced, self.batters_bowled_to, self.team_matchup)
+
+
+_tables = None
+_tables_lock = threading.Lock()
+
+
+def get_matchup_tables(csv_path=DELIVERIES_CSV):
+    """Return the process-wide matchup tables, building them on first use"""
+    global _tables
+    with _tables_lock:
+        if _tables is None:
+            _tables = MatchupTables(csv_path).load()
+        return _tables
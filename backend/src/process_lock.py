@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:
+    # No flock on Windows; there the API only runs as a single process
+    fcntl = None
+
+
+class ProcessLock:
+    """
+    Exclusive lock shared by every process on the machine, backed by flock on a file.
+
+    The OS drops the lock when the holding process exits, so a crashed holder never
+    leaves it stuck. Without fcntl the lock always succeeds (single process only).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+        self._thread_lock = threading.Lock()
+
+    @property
+    def held(self):
+        return self._file is not None
+
+    def acquire(self, blocking=True):
+        """Take the lock; returns False if blocking is False and another process holds it"""
+        with self._thread_lock:
+            if self._file is not None:
+                return True
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            lock_file = open(self.path, "a")
+            if fcntl is not None:
+                try:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | (0 if blocking else fcntl.LOCK_NB))
+                except BlockingIOError:
+                    lock_file.close()
+                    return False
+            self._file = lock_file
+            return True
+
+    def release(self):
+        with self._thread_lock:
+            if self._file is None:
+                return
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.release()
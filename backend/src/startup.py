@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+import logging
+import threading
+import time
+
+logger = logging.getLogger("cricket_commentary.startup")
+
+# Subsystem states
+PENDING = "pending"
+INITIALIZING = "initializing"
+READY = "ready"
+FAILED = "failed"
+
+
+class StartupManager:
+    """
+    Initialize slow subsystems in background threads and report readiness per subsystem.
+
+    Each subsystem is a name, an init function and the names it depends on. start()
+    launches one thread per subsystem; a thread waits for its dependencies, runs the
+    init function and stores the result. A subsystem whose dependency failed is marked
+    failed without running. Request handlers check is_ready()/get() instead of the
+    server blocking on all of this before accepting connections.
+    """
+
+    def __init__(self, started_at=None):
+        # perf_counter() reading taken as early as possible in the process, for cold-start timing
+        self.started_at = started_at if started_at is not None else time.perf_counter()
+        self._lock = threading.Lock()
+        self._subsystems = {}
+        self._serving_at = None
+        self._all_ready_at = None
+
+    def register(self, name, init, depends_on=()):
+        self._subsystems[name] = {
+            "init": init,
+            "depends_on": tuple(depends_on),
+            "state": PENDING,
+            "error": None,
+            "result": None,
+            "duration_s": None,
+            "ready_after_s": None,
+            "done": threading.Event()
+        }
+
+    def start(self):
+        """Launch every registered subsystem; returns immediately"""
+        self._serving_at = time.perf_counter()
+        logger.info(f"Serving requests {self._serving_at - self.started_at:.2f}s after process start")
+        for name in self._subsystems:
+            threading.Thread(target=self._run, args=(name,), name=f"startup-{name}", daemon=True).start()
+
+    def _run(self, name):
+        subsystem = self._subsystems[name]
+        for dependency in subsystem["depends_on"]:
+            self._subsystems[dependency]["done"].wait()
+            if self._subsystems[dependency]["state"] != READY:
+                self._finish(name, FAILED, error=f"Dependency '{dependency}' is not available")
+                return
+
+        with self._lock:
+            subsystem["state"] = INITIALIZING
+        start = time.perf_counter()
+        try:
+            result = subsystem["init"]()
+        except (Exception, SystemExit) as e:
+            # SystemExit too: some setup modules call sys.exit() when a dependency is down
+            logger.exception(f"Startup of '{name}' failed: {e}")
+            self._finish(name, FAILED, error=str(e), duration=time.perf_counter() - start)
+            return
+        self._finish(name, READY, result=result, duration=time.perf_counter() - start)
+
+    def _finish(self, name, state, result=None, error=None, duration=None):
+        subsystem = self._subsystems[name]
+        now = time.perf_counter()
+        with self._lock:
+            subsystem.update(state=state, result=result, error=error, duration_s=duration,
+                             ready_after_s=now - self.started_at)
+            if all(s["state"] in (READY, FAILED) for s in self._subsystems.values()):
+                self._all_ready_at = now
+        subsystem["done"].set()
+        if state == READY:
+            logger.info(f"Subsystem '{name}' ready in {duration:.2f}s ({now - self.started_at:.2f}s after process start)")
+        else:
+            logger.warning(f"Subsystem '{name}' unavailable: {error}")
+        if self._all_ready_at == now:
+            logger.info(f"Startup complete {now - self.started_at:.2f}s after process start")
+
+    def is_ready(self, name):
+        return self._subsystems[name]["state"] == READY
+
+    def state(self, name):
+        return self._subsystems[name]["state"]
+
+    def get(self, name):
+        """Result of a ready subsystem's init function (None otherwise)"""
+        subsystem = self._subsystems[name]
+        return subsystem["result"] if subsystem["state"] == READY else None
+
+    def wait(self, name, timeout=None):
+        """Block until a subsystem has finished initializing; returns True if it is ready"""
+        self._subsystems[name]["done"].wait(timeout)
+        return self.is_ready(name)
+
+    def report(self):
+        """Readiness of every subsystem plus cold-start timings in seconds"""
+        def since_start(moment):
+            return round(moment - self.started_at, 3) if moment is not None else None
+
+        with self._lock:
+            subsystems = {
+                name: {
+                    "state": s["state"],
+                    "error": s["error"],
+                    "depends_on": list(s["depends_on"]),
+                    "duration_s": round(s["duration_s"], 3) if s["duration_s"] is not None else None,
+                    "ready_after_s": round(s["ready_after_s"], 3) if s["ready_after_s"] is not None else None
+                }
+                for name, s in self._subsystems.items()
+            }
+            return {
+                "serving_after_s": since_start(self._serving_at),
+                "all_ready_after_s": since_start(self._all_ready_at),
+                "subsystems": subsystems
+            }
@@ -0,0 +1,94 @@
+import asyncio
+import time
+
+import httpx
+import pytest
+
+import jsonfileupdate
+from jsonfileupdate import HostRateLimiter, LiveScraper
+from src.live_store import LiveStore
+
+URL = "https://feeds.example.com/match/1.json"
+
+
+class Server:
+  """httpx.MockTransport handler that replays scripted responses and records requests"""
+
+  def __init__(self, *responses):
+    self.responses = list(responses)
+    self.requests = []
+
+  def __call__(self, request):
+    self.requests.append(request)
+    respond = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+    return respond(request) if callable(respond) else respond
+
+
+def fetch(server, tmp_path, url=URL, rate_limiter=None):
+  async def run():
+    async with httpx.AsyncClient(transport=httpx.MockTransport(server)) as client:
+      scraper = LiveScraper(client, rate_limiter=rate_limiter or HostRateLimiter(0), store=LiveStore(str(tmp_path)))
+      return await scraper.fetch_text(url), await scraper.fetch_text(url)
+  return asyncio.run(run())
+
+
+@pytest.fixture(autouse=True)
+def fast_backoff(monkeypatch):
+  monkeypatch.setattr(jsonfileupdate, "BACKOFF_BASE", 0.001)
+  monkeypatch.setattr(jsonfileupdate, "BACKOFF_MAX", 0.001)
+
+
+def test_unchanged_document_is_served_from_cache_on_304(tmp_path):
+  def conditional(request):
+    if request.headers.get("if-none-match") == '"v1"':
+      return httpx.Response(304)
+    return httpx.Response(200, text='{"ball": 1}', headers={"etag": '"v1"', "last-modified": "Sat, 01 Jun 2024 10:00:00 GMT"})
+
+  server = Server(conditional)
+  assert fetch(server, tmp_path) == ('{"ball": 1}', '{"ball": 1}')
+  first, second = server.requests
+  assert "if-none-match" not in first.headers
+  assert second.headers["if-none-match"] == '"v1"'
+  assert second.headers["if-modified-since"] == "Sat, 01 Jun 2024 10:00:00 GMT"
+
+
+def test_retryable_statuses_and_transport_errors_are_retried(tmp_path):
+  def connection_reset(request):
+    raise httpx.ConnectError("connection reset", request=request)
+
+  server = Server(httpx.Response(503), connection_reset, httpx.Response(429), httpx.Response(200, text="ok"))
+  assert fetch(server, tmp_path) == ("ok", "ok")
+  assert len(server.requests) == 5
+
+
+def test_gives_up_after_max_retries(tmp_path, monkeypatch):
+  monkeypatch.setattr(jsonfileupdate, "MAX_RETRIES", 2)
+  server = Server(httpx.Response(500))
+  with pytest.raises(RuntimeError, match="after 3 attempts: HTTP 500"):
+    fetch(server, tmp_path)
+  assert len(server.requests) == 3
+
+
+def test_client_errors_are_not_retried(tmp_path):
+  server = Server(httpx.Response(404))
+  with pytest.raises(httpx.HTTPStatusError):
+    fetch(server, tmp_path)
+  assert len(server.requests) == 1
+
+
+def test_rate_limiter_spaces_requests_to_the_same_host():
+  limiter = HostRateLimiter(min_interval=0.05)
+
+  async def run():
+    async def timed(host):
+      await limiter.wait(host)
+      return host, time.monotonic()
+    start = time.monotonic()
+    done = await asyncio.gather(*(timed(host) for host in ("a.example", "a.example", "a.example", "b.example")))
+    return [(host, at - start) for host, at in done]
+
+  done = asyncio.run(run())
+  same_host = sorted(at for host, at in done if host == "a.example")
+  assert same_host[1] - same_host[0] >= 0.04
+  assert same_host[2] - same_host[1] >= 0.04
+  assert dict(done)["b.example"] < 0.04
@@ -5,9 +5,12 @@ load_dotenv(override=True)  # override=True ensures .env values take precedence
 import csv
 import os
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
 import random
 from langchain_openai import ChatOpenAI
+from langchain_core.rate_limiters import InMemoryRateLimiter
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import HumanMessage
 from langchain_core.tools import Tool
@@ -16,13 +19,42 @@ from langchain.agents import AgentExecutor, create_openai_tools_agent
 from langchain_core.prompts import MessagesPlaceholder
 from tavily import TavilyClient
 
-# Initialize Tavily client
-tavily_client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+# Q&A chains run at once (see generate_qa_set)
+QA_MAX_WORKERS = int(os.getenv("QA_MAX_WORKERS", "4"))
+# Shared by every LLM and Tavily request of the generator, across all chains
+QA_REQUESTS_PER_SECOND = float(os.getenv("QA_REQUESTS_PER_SECOND", "2"))
+
+rate_limiter = InMemoryRateLimiter(
+    requests_per_second=QA_REQUESTS_PER_SECOND,
+    check_every_n_seconds=0.05,
+    max_bucket_size=QA_MAX_WORKERS
+)
+
+# Clients are created on first use and shared by all chains
+_clients_lock = threading.Lock()
+_tavily_client = None
+_llm = None
+_search_agent = None
+
+def get_tavily_client():
+    global _tavily_client
+    with _clients_lock:
+        if _tavily_client is None:
+            _tavily_client = TavilyClient(api_key=os.getenv("TAVILY_API_KEY"))
+        return _tavily_client
+
+def get_llm():
+    global _llm
+    with _clients_lock:
+        if _llm is None:
+            _llm = ChatOpenAI(model="gpt-4o-mini", temperature=1.0, rate_limiter=rate_limiter)
+        return _llm
 
 # Define Tavily search tool
 def tavily_search(query):
     """Search the web with Tavily Search API."""
-    response = tavily_client.search(query=query)
+    rate_limiter.acquire()
+    response = get_tavily_client().search(query=query)
     return response
 
 tavily_search_tool = Tool(
@@ -34,7 +66,8 @@ tavily_search_tool = Tool(
 # Define Tavily extract tool
 def tavily_extract(url):
     """Extract content from a webpage using Tavily Extract API."""
-    response = tavily_client.extract(urls=[url])
+    rate_limiter.acquire()
+    response = get_tavily_client().extract(urls=[url])
     return response
 
 tavily_extract_tool = Tool(
@@ -43,6 +76,35 @@ tavily_extract_tool = Tool(
     func=tavily_extract
 )
 
+def get_search_agent():
+    """The web research agent, built once; the date is filled in on each call"""
+    global _search_agent
+    if _search_agent is not None:
+        return _search_agent
+    tools = [tavily_search_tool, tavily_extract_tool]
+    agent_llm = get_llm()
+
+    # Set up Prompt with 'agent_scratchpad'
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", """You are a cricket research assistant, you will be given a query about cricket 
+        (especially IPL matches) and you will need to search the web for the most relevant information.
+        The date today is {today}. Keep your searches focused on gathering factual information about 
+        cricket matches, team/player performances, statistics, and turning points in matches."""),
+        MessagesPlaceholder(variable_name="messages"),
+        MessagesPlaceholder(variable_name="agent_scratchpad"),  # Required for tool calls
+    ])
+
+    agent = create_openai_tools_agent(
+        llm=agent_llm,
+        tools=tools,
+        prompt=prompt
+    )
+
+    with _clients_lock:
+        if _search_agent is None:
+            _search_agent = AgentExecutor(agent=agent, tools=tools, verbose=True)
+        return _search_agent
+
 def web_search(question):
     """
     Perform web search for cricket information
@@ -50,29 +112,8 @@ def web_search(question):
     print(f"---PERFORMING WEB SEARCH FOR: {question}---")
     
     try:
-        tools = [tavily_search_tool, tavily_extract_tool]
-        agent_llm = ChatOpenAI(model="gpt-4o-mini", temperature=1.0)
-
-        # Set up Prompt with 'agent_scratchpad'
         today = datetime.today().strftime("%B %d, %Y")
-        prompt = ChatPromptTemplate.from_messages([
-            ("system", f"""You are a cricket research assistant, you will be given a query about cricket 
-            (especially IPL matches) and you will need to search the web for the most relevant information.
-            The date today is {today}. Keep your searches focused on gathering factual information about 
-            cricket matches, team/player performances, statistics, and turning points in matches."""),
-            MessagesPlaceholder(variable_name="messages"),
-            MessagesPlaceholder(variable_name="agent_scratchpad"),  # Required for tool calls
-        ])
-
-        agent = create_openai_tools_agent(
-            llm=agent_llm,
-            tools=tools,
-            prompt=prompt
-        )
-
-        agent_executor = AgentExecutor(agent=agent, tools=tools, verbose=True)
-
-        response = agent_executor.invoke({"messages": [HumanMessage(content=question)]})
+        response = get_search_agent().invoke({"messages": [HumanMessage(content=question)], "today": today})
         print("Search completed successfully")
 
         return response.get("output", "")
@@ -83,7 +124,7 @@ def web_search(question):
 
 def generate_base_question():
     """Generate a base question about recent IPL matches"""
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=1.0)
+    llm = get_llm()
     
     prompt = ChatPromptTemplate.from_messages([
         ("system", """You are an expert cricket researcher focusing on IPL. 
@@ -102,7 +143,7 @@ def get_answer(question):
 
 def generate_followup_question(base_question, base_answer):
     """Generate a follow-up question based on the base question and answer"""
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=1.0)
+    llm = get_llm()
     
     prompt = ChatPromptTemplate.from_messages([
         ("system", """You are an expert cricket analyst focusing on IPL.
@@ -123,7 +164,7 @@ def generate_followup_question(base_question, base_answer):
 
 def generate_final_question(base_question, base_answer, followup_question, followup_answer):
     """Generate a third question based on the previous questions and answers"""
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=1.0)
+    llm = get_llm()
     
     prompt = ChatPromptTemplate.from_messages([
         ("system", """You are an expert cricket analyst focusing on IPL.
@@ -160,27 +201,47 @@ def save_to_csv(question_answers, filename="cricket_qa.csv"):
     
     print(f"Saved {len(question_answers)} question-answer pairs to {filename}")
 
-def generate_qa_set():
-    """Generate a set of 5 question-answer pairs about cricket"""
-    qa_pairs = []
-    
-    # First generate a base question and its answer
-    base_question = generate_base_question()
-    print(f"Base question: {base_question}")
-    base_answer = get_answer(base_question)
-    qa_pairs.append(f"{base_question} : {base_answer}")
-    
-    # Generate follow-up question based on the base Q&A
-    followup_question = generate_followup_question(base_question, base_answer)
-    print(f"Follow-up question: {followup_question}")
-    followup_answer = get_answer(followup_question)
-    qa_pairs.append(f"{followup_question} : {followup_answer}")
-    
-    # Generate third question based on previous Q&As
-    final_question = generate_final_question(base_question, base_answer, followup_question, followup_answer)
-    print(f"Final question: {final_question}")
-    final_answer = get_answer(final_question)
-    qa_pairs.append(f"{final_question} : {final_answer}")
+def run_dag(tasks, max_workers=QA_MAX_WORKERS):
+    """
+    Run tasks {name: (function, [dependency names])} on a thread pool, each one as
+    soon as its dependencies have finished. A task's function is called with the
+    results of its dependencies, in order. Returns {name: result}.
+    """
+    results = {}
+    pending = dict(tasks)
+    running = {}
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="qa") as executor:
+        while pending or running:
+            for name, (function, dependencies) in list(pending.items()):
+                if all(dependency in results for dependency in dependencies):
+                    del pending[name]
+                    running[executor.submit(function, *(results[dependency] for dependency in dependencies))] = name
+            if not running:
+                raise ValueError(f"Tasks with missing or circular dependencies: {sorted(pending)}")
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                results[running.pop(future)] = future.result()
+    return results
+
+def generate_qa_set(max_workers=QA_MAX_WORKERS):
+    """
+    Generate a set of 5 question-answer pairs about cricket
+
+    The base, follow-up and final questions form one chain, each built from the
+    answers before it; the two random questions are independent of it and of
+    each other, so they run alongside.
+    """
+    tasks = {
+        # First generate a base question and its answer
+        "base_question": (generate_base_question, []),
+        "base_answer": (get_answer, ["base_question"]),
+        # Generate follow-up question based on the base Q&A
+        "followup_question": (generate_followup_question, ["base_question", "base_answer"]),
+        "followup_answer": (get_answer, ["followup_question"]),
+        # Generate third question based on previous Q&As
+        "final_question": (generate_final_question, ["base_question", "base_answer", "followup_question", "followup_answer"]),
+        "final_answer": (get_answer, ["final_question"]),
+    }
     
     # Generate two more random cricket questions for variety
     cricket_topics = [
@@ -194,12 +255,21 @@ def generate_qa_set():
         "best bowling figures in IPL"
     ]
     
-    for _ in range(2):
+    for number in (1, 2):
         topic = random.choice(cricket_topics)
-        random_question = generate_base_question() if random.random() > 0.5 else f"Tell me about {topic}"
-        print(f"Random question: {random_question}")
-        random_answer = get_answer(random_question)
-        qa_pairs.append(f"{random_question} : {random_answer}")
+        question_task = generate_base_question if random.random() > 0.5 else (lambda topic=topic: f"Tell me about {topic}")
+        tasks[f"random_{number}_question"] = (question_task, [])
+        tasks[f"random_{number}_answer"] = (get_answer, [f"random_{number}_question"])
+    
+    start = time.perf_counter()
+    results = run_dag(tasks, max_workers)
+    
+    qa_pairs = []
+    for label, name in [("Base", "base"), ("Follow-up", "followup"), ("Final", "final"), ("Random", "random_1"), ("Random", "random_2")]:
+        question, answer = results[f"{name}_question"], results[f"{name}_answer"]
+        print(f"{label} question: {question}")
+        qa_pairs.append(f"{question} : {answer}")
+    print(f"Generated {len(qa_pairs)} question-answer pairs in {time.perf_counter() - start:.1f}s")
     
     return qa_pairs
 
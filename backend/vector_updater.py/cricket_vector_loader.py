@@ -6,7 +6,6 @@ This script loads cricket Q&A pairs from a CSV file and streams them to the
 vector store database running on localhost:8000.
 """
 
-import csv
 import os
 import time
 import threading
@@ -18,6 +17,12 @@ from pathlib import Path
 # For vector store client connection
 from pathway.xpacks.llm.vector_store import VectorStoreClient
 
+# Shared embedding backend and cache (backend/chat/embedding.py)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "chat"))
+from embedding import get_embedder
+from qa_dedup import DedupIndex
+from csv_tail import CSVTail, FileWatcher
+
 # Configuration
 VECTOR_DB_HOST = "localhost"
 VECTOR_DB_PORT = 8000
@@ -29,57 +34,88 @@ CSV_FILE = "cricket_qa.csv"
 DATA_PATH = "./data"
 os.makedirs(DATA_PATH, exist_ok=True)
 
-# Keep track of processed entries
+# Q&A pairs are written as JSONL shards, one record per pair, which the vector
+# store server reads with a jsonlines connector (see vector_store_server.py)
+SHARD_PATH = Path(DATA_PATH) / "qa_shards"
+SHARD_PATH.mkdir(parents=True, exist_ok=True)
+BATCH_SIZE = int(os.getenv("QA_BATCH_SIZE", "256"))  # Q&A pairs per shard
+
+# Content hashes and MinHash buckets of the ingested entries (see qa_dedup.py)
+DEDUP_PATH = Path(DATA_PATH) / "qa_dedup_index"
+# Entries processed before the dedup index existed (first 50 characters of each question)
 PROCESSED_FILE = Path(DATA_PATH) / "processed_qa_entries.txt"
+# CSV read position and shards written, updated after every shard
+CHECKPOINT_FILE = Path(DATA_PATH) / "qa_checkpoint.json"
+# Longest wait for a change event before checking the CSV anyway
+WATCH_TIMEOUT = 60
 
-def get_processed_entries():
-    """Get list of already processed entries to avoid duplicates"""
-    if not PROCESSED_FILE.exists():
-        return set()
-    
-    with open(PROCESSED_FILE, "r", encoding="utf-8") as f:
-        return set(line.strip() for line in f.readlines())
+_dedup_index = None
+
+def get_dedup_index():
+    """The dedup index, opened on first use"""
+    global _dedup_index
+    if _dedup_index is None:
+        _dedup_index = DedupIndex(str(DEDUP_PATH))
+    return _dedup_index
+
+def load_checkpoint():
+    """Ingestion progress: CSV read position (see csv_tail.py), shards and entries written"""
+    if not CHECKPOINT_FILE.exists():
+        return {"offset": 0, "csv_rows": 0, "shards": 0, "entries": 0}
+    with open(CHECKPOINT_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_checkpoint(checkpoint):
+    """Write the checkpoint atomically, so a crash leaves the previous one intact"""
+    checkpoint["updated_at"] = datetime.now().isoformat(timespec="seconds")
+    tmp_path = CHECKPOINT_FILE.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(checkpoint, f, indent=2)
+    os.replace(tmp_path, CHECKPOINT_FILE)
+
+def parse_qa_pair(qa_pair):
+    """Split a "question : answer" CSV cell into its cleaned parts, or None if malformed"""
+    parts = qa_pair.split(" : ", 1)
+    if len(parts) != 2:
+        print(f"Invalid format for QA pair: {qa_pair[:100]}...")
+        return None
+    question, answer = parts
+    return question.strip('"').strip(), answer.strip('"').strip()
+
+def format_document(question, answer):
+    """Text of a Q&A pair as indexed by the vector store"""
+    return f"# Question\n{question}\n\n# Answer\n{answer}"
 
-def mark_as_processed(entry_hash):
-    """Mark an entry as processed"""
-    with open(PROCESSED_FILE, "a", encoding="utf-8") as f:
-        f.write(f"{entry_hash}\n")
+def write_shard(records, shard_number):
+    """
+    Write a batch of Q&A records as one JSONL shard.
 
-def calculate_entry_hash(qa_pair):
-    """Calculate a simple hash for a QA pair to identify it"""
-    # Just use the first 50 chars of question as identifier
-    return qa_pair.split(" : ")[0][:50].strip('"').strip()
+    The shard is written under a temporary name and renamed into place, so the
+    server's streaming reader only ever sees complete files.
+    """
+    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
+    shard_path = SHARD_PATH / f"cricket_qa_{timestamp}_{shard_number:05d}.jsonl"
+    tmp_path = shard_path.with_suffix(".jsonl.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp_path, shard_path)
+    return shard_path
 
-def save_to_text_file(qa_pair, index):
-    """Save a Q&A pair to a text file for vector store indexing"""
+def warm_embeddings(texts):
+    """
+    Embed a batch of documents in one backend call.
+
+    This fills the shared embedding cache, so the server's per-chunk embedding
+    of the new shard is served from the cache instead of one request per pair.
+    Failure only costs the warm-up; the server still embeds the documents itself.
+    """
     try:
-        # Extract question and answer
-        parts = qa_pair.split(" : ", 1)
-        if len(parts) != 2:
-            print(f"Invalid format for QA pair: {qa_pair[:100]}...")
-            return None
-        
-        question, answer = parts
-        # Clean up the parts
-        question = question.strip('"').strip()
-        answer = answer.strip('"').strip()
-        
-        # Create a filename based on the question
-        timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-        safe_name = "".join(c if c.isalnum() else "_" for c in question[:30])
-        filename = f"cricket_qa_{timestamp}_{safe_name}_{index}.txt"
-        file_path = os.path.join(DATA_PATH, filename)
-        
-        # Write the content to the file
-        with open(file_path, "w", encoding="utf-8") as f:
-            f.write(f"# Question\n{question}\n\n# Answer\n{answer}")
-        
-        print(f"Saved Q&A to file: {filename}")
-        return file_path
-    
+        start = time.perf_counter()
+        get_embedder().embed_documents(texts)
+        print(f"Embedded {len(texts)} documents in {time.perf_counter() - start:.2f}s")
     except Exception as e:
-        print(f"Error saving Q&A to file: {e}")
-        return None
+        print(f"Could not pre-embed the batch, leaving it to the server: {e}")
 
 def check_server_running():
     """Check if the vector store server is running"""
@@ -105,74 +141,144 @@ def check_server_running():
         print(f"No running server found at {VECTOR_DB_HOST}:{VECTOR_DB_PORT}: {e}")
         return False
 
+def seed_dedup_index(dedup, checkpoint):
+    """
+    Fill an empty dedup index with the entries ingested before it existed: CSV
+    rows behind the checkpoint, or listed in the legacy processed_qa_entries.txt.
+    Runs once; the checkpoint records that seeding was done.
+    """
+    if checkpoint.get("dedup_seeded"):
+        return
+    if len(dedup) or not (checkpoint["csv_rows"] or PROCESSED_FILE.exists()):
+        checkpoint["dedup_seeded"] = True
+        save_checkpoint(checkpoint)
+        return
+    legacy_entries = set()
+    if PROCESSED_FILE.exists():
+        with open(PROCESSED_FILE, "r", encoding="utf-8") as f:
+            legacy_entries = set(line.strip() for line in f)
+    
+    for index, row in CSVTail(CSV_FILE).read_new():
+        qa_pair = row[0]
+        if index >= checkpoint["csv_rows"] and qa_pair.split(" : ")[0][:50].strip('"').strip() not in legacy_entries:
+            continue
+        parsed = parse_qa_pair(qa_pair)
+        if parsed is None:
+            continue
+        key, signature, duplicate = dedup.check(*parsed)
+        if duplicate is None:
+            dedup.add(key, signature, parsed[0], index)
+    dedup.commit()
+    dedup.exact_duplicates = dedup.near_duplicates = 0
+    checkpoint["dedup_seeded"] = True
+    save_checkpoint(checkpoint)
+    print(f"Seeded the dedup index with {len(dedup)} previously ingested entries.")
+
+def ingest_batch(batch, checkpoint, dedup):
+    """Write one shard for a batch of (row number, question, answer), then commit it to the dedup index and checkpoint"""
+    records = [
+        {
+            "text": format_document(question, answer),
+            "metadata": {"source": "cricket_qa", "csv_row": row_number, "question": question}
+        }
+        for row_number, question, answer in batch
+    ]
+    warm_embeddings([record["text"] for record in records])
+    shard_path = write_shard(records, checkpoint["shards"])
+    dedup.commit()
+    
+    # The read position is saved once the whole read is ingested; rows of a read
+    # interrupted after this shard are read again and skipped by the dedup index
+    checkpoint["shards"] += 1
+    checkpoint["entries"] += len(batch)
+    save_checkpoint(checkpoint)
+    print(f"Wrote {len(batch)} Q&A pairs to {shard_path.name}")
+
 def process_csv_file():
-    """Process the CSV file and load new entries to the vector database"""
+    """Ingest the rows appended to the CSV file since the last call; returns how many entries were ingested"""
     if not os.path.exists(CSV_FILE):
         print(f"Error: CSV file '{CSV_FILE}' not found.")
-        return
+        return 0
     
-    # Get already processed entries
-    processed_entries = get_processed_entries()
-    print(f"Found {len(processed_entries)} previously processed entries.")
+    checkpoint = load_checkpoint()
+    dedup = get_dedup_index()
+    # Checkpoints from before byte offsets were kept only count rows: read from the top once and skip those
+    skip_rows = checkpoint["csv_rows"] if not checkpoint.get("offset") else 0
+    tail = CSVTail(CSV_FILE, checkpoint)
     
-    # Read all entries from CSV
-    entries_to_process = []
     try:
-        with open(CSV_FILE, 'r', encoding='utf-8') as csvfile:
-            csv_reader = csv.reader(csvfile)
-            next(csv_reader)  # Skip header row
-            
-            for i, row in enumerate(csv_reader):
-                if not row:
-                    continue
-                
-                qa_pair = row[0]
-                entry_hash = calculate_entry_hash(qa_pair)
-                
-                if entry_hash not in processed_entries:
-                    entries_to_process.append((qa_pair, entry_hash, i))
-    
+        seed_dedup_index(dedup, checkpoint)
+        rows = [(index, row[0]) for index, row in tail.read_new() if index >= skip_rows]
     except Exception as e:
         print(f"Error reading CSV file: {e}")
-        return
+        return 0
     
-    print(f"Found {len(entries_to_process)} new entries to process.")
+    if not rows:
+        position = tail.position()
+        if any(checkpoint.get(key) != value for key, value in position.items()):
+            # Nothing to ingest, but the position moved (blank or skipped rows, a restart from the top)
+            checkpoint.update(position)
+            save_checkpoint(checkpoint)
+        return 0
+    print(f"Found {len(rows)} new rows ({len(dedup)} entries already processed), up to CSV row {rows[-1][0]}.")
     
-    # Process new entries
-    for qa_pair, entry_hash, index in entries_to_process:
-        # Save to text file
-        file_path = save_to_text_file(qa_pair, index)
-        if file_path:
-            # Mark as processed
-            mark_as_processed(entry_hash)
-            print(f"Processed entry: {entry_hash[:30]}...")
-            
-            # Give the vector store server time to detect and index the new file
-            time.sleep(1)
-        else:
-            print(f"Failed to process entry: {entry_hash[:30]}...")
+    # Parse and deduplicate the new rows, writing a shard whenever a batch is full
+    start = time.perf_counter()
+    ingested = 0
+    batch = []
+    try:
+        for index, qa_pair in rows:
+            parsed = parse_qa_pair(qa_pair)
+            if parsed is None:
+                continue
+            question, answer = parsed
+            key, signature, duplicate = dedup.check(question, answer)
+            if duplicate is not None:
+                print(f"Skipping {duplicate['kind']} duplicate ({duplicate['similarity']:.2f}) of row {duplicate['csv_row']}: {question[:60]}...")
+                continue
+            dedup.add(key, signature, question, index)
+            batch.append((index, question, answer))
+            if len(batch) == BATCH_SIZE:
+                ingest_batch(batch, checkpoint, dedup)
+                ingested += len(batch)
+                batch = []
+        if batch:
+            ingest_batch(batch, checkpoint, dedup)
+            ingested += len(batch)
+    except Exception:
+        # Entries staged for a shard that was never written must not count as
+        # ingested; the rows are read again on the next pass
+        dedup.discard()
+        dedup.exact_duplicates = dedup.near_duplicates = 0
+        raise
+    
+    checkpoint["exact_duplicates"] = checkpoint.get("exact_duplicates", 0) + dedup.exact_duplicates
+    checkpoint["near_duplicates"] = checkpoint.get("near_duplicates", 0) + dedup.near_duplicates
+    dedup.exact_duplicates = dedup.near_duplicates = 0
+    
+    # Also records trailing rows that were duplicates or malformed as read
+    checkpoint.update(tail.position())
+    save_checkpoint(checkpoint)
+    
+    print(f"Ingested {ingested} new entries in {time.perf_counter() - start:.2f}s "
+          f"({checkpoint['exact_duplicates']} exact and {checkpoint['near_duplicates']} near duplicates skipped so far).")
+    return ingested
 
 def watch_for_changes():
-    """Continuously watch for new entries in the CSV file"""
+    """Ingest new CSV rows as they are appended, woken by file system events (or polling without watchdog)"""
     print("Starting to watch for changes in the CSV file...")
     
-    last_modified = os.path.getmtime(CSV_FILE) if os.path.exists(CSV_FILE) else 0
-    
+    watcher = FileWatcher(CSV_FILE)
     while True:
         try:
-            # Check if the file has been modified
-            if os.path.exists(CSV_FILE):
-                current_modified = os.path.getmtime(CSV_FILE)
-                if current_modified > last_modified:
-                    print(f"CSV file has been modified. Processing new entries...")
-                    process_csv_file()
-                    last_modified = current_modified
-            
-            # Sleep for a while before checking again
-            time.sleep(10)
+            # Each pass reads only the bytes appended since the last one; the
+            # timeout is a safety net for missed events
+            process_csv_file()
+            watcher.wait(WATCH_TIMEOUT)
         
         except KeyboardInterrupt:
             print("Stopping watch for changes...")
+            watcher.stop()
             break
         
         except Exception as e:
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+Tail-follow reading of an append-only CSV file.
+
+CSVTail remembers the byte offset just past the last complete record it
+returned, so each read seeks there and parses only what was appended since.
+Quoted fields may span lines (the generated answers do), so a record counts as
+complete only at a newline outside quotes; a half-written record is left for
+the next read. The position also stores the file's inode and a fingerprint of
+the bytes before the offset. If the file was truncated, rotated or rewritten in
+place, reading starts again from the top.
+
+FileWatcher blocks until the file changes, using watchdog (inotify on Linux)
+where it is installed and stat polling otherwise.
+"""
+
+import csv
+import hashlib
+import io
+import os
+import threading
+import time
+
+FINGERPRINT_BYTES = 64
+POLL_INTERVAL = 2  # Seconds between stat calls when watchdog is not available
+
+
+def _fingerprint(f, offset):
+    """Hash of the bytes just before offset in the open binary file f"""
+    start = max(0, offset - FINGERPRINT_BYTES)
+    f.seek(start)
+    return hashlib.sha1(f.read(offset - start)).hexdigest()
+
+
+def complete_length(data):
+    """Length of the prefix of data made of complete CSV records (ending in a newline outside quotes)"""
+    end = 0
+    quotes = 0
+    position = 0
+    while True:
+        newline = data.find(b"\n", position)
+        if newline < 0:
+            return end
+        quotes += data.count(b'"', position, newline)
+        if quotes % 2 == 0:
+            end = newline + 1
+        position = newline + 1
+
+
+class CSVTail:
+    """
+    Reader of the records appended to a CSV file since the last read.
+
+    position() is a JSON-serializable dict to store in a checkpoint and pass
+    back as `position` to resume. Row numbers count data rows from 0, as
+    enumerate() over a csv.reader past the header would.
+    """
+
+    def __init__(self, path, position=None):
+        self.path = path
+        position = position or {}
+        self.offset = position.get("offset", 0)
+        self.rows = position.get("csv_rows", 0) if self.offset else 0
+        self.inode = position.get("inode")
+        self.fingerprint = position.get("fingerprint")
+        self.resets = 0
+
+    def position(self):
+        return {"offset": self.offset, "csv_rows": self.rows, "inode": self.inode, "fingerprint": self.fingerprint}
+
+    def _restart(self, reason):
+        print(f"{self.path} was {reason}; reading it again from the start.")
+        self.offset, self.rows = 0, 0
+        self.resets += 1
+
+    def read_new(self):
+        """Complete records appended since the last read, as (row number, record)"""
+        with open(self.path, "rb") as f:
+            stat = os.fstat(f.fileno())
+            if self.offset:
+                if self.inode is not None and stat.st_ino != self.inode:
+                    self._restart("replaced")
+                elif stat.st_size < self.offset:
+                    self._restart("truncated")
+                elif self.fingerprint is not None and _fingerprint(f, self.offset) != self.fingerprint:
+                    self._restart("rewritten")
+            self.inode = stat.st_ino
+            if stat.st_size == self.offset:
+                return []
+
+            f.seek(self.offset)
+            data = f.read()
+            length = complete_length(data)
+            if not length:
+                return []
+            reader = csv.reader(io.StringIO(data[:length].decode("utf-8"), newline=""))
+            if self.offset == 0:
+                next(reader, None)  # Skip header row
+            records = []
+            for row in reader:
+                if row:
+                    records.append((self.rows, row))
+                self.rows += 1
+            self.offset += length
+            self.fingerprint = _fingerprint(f, self.offset)
+        return records
+
+
+class FileWatcher:
+    """Waits for changes to one file: created, modified, moved into place or replaced"""
+
+    def __init__(self, path):
+        self.path = os.path.abspath(path)
+        self._changed = threading.Event()
+        self._observer = None
+        self._last_stat = self._stat()
+        try:
+            from watchdog.events import FileSystemEventHandler
+            from watchdog.observers import Observer
+        except ImportError:
+            print("watchdog is not installed; polling for changes instead")
+            return
+
+        watcher = self
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                paths = (getattr(event, "src_path", None), getattr(event, "dest_path", None))
+                if watcher.path in (os.path.abspath(path) for path in paths if path):
+                    watcher._changed.set()
+
+        self._observer = Observer()
+        self._observer.schedule(Handler(), os.path.dirname(self.path), recursive=False)
+        self._observer.daemon = True
+        self._observer.start()
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+            return stat.st_ino, stat.st_size, stat.st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def wait(self, timeout):
+        """Block until the file changes or timeout seconds pass; returns True on a change"""
+        if self._observer is not None:
+            changed = self._changed.wait(timeout)
+            self._changed.clear()
+            return changed
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            current = self._stat()
+            if current != self._last_stat:
+                self._last_stat = current
+                return True
+            time.sleep(min(POLL_INTERVAL, max(0, deadline - time.monotonic())))
+        return False
+
+    def stop(self):
+        if self._observer is not None:
+            self._observer.stop()
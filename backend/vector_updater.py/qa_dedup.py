@@ -0,0 +1,140 @@
+# -*- coding: utf-8 -*-
+"""
+Deduplication index for the cricket Q&A loader.
+
+Exact duplicates are found by a content hash of the normalized question and
+answer. Near duplicates, such as paraphrased questions with the same answer or
+answers that differ in a few words, are found with MinHash signatures over
+word shingles. Signatures are bucketed by LSH bands, so a lookup only compares
+against the entries that share a band with it. The index lives in a diskcache
+store next to the shards; checking an entry is a few key lookups, however many
+entries have been ingested.
+"""
+
+import hashlib
+import os
+import random
+import re
+
+import diskcache
+
+NUM_PERM = 64  # MinHash signature length
+BANDS = 8  # 8 bands of 8 rows: pairs above ~0.77 estimated Jaccard similarity share a band with high probability
+SHINGLE_WORDS = 3
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("QA_NEAR_DUPLICATE_THRESHOLD", "0.8"))
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_rng = random.Random(20250418)  # Fixed seed: signatures must stay comparable across runs
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def words(text):
+    return _WORD_PATTERN.findall(text.lower())
+
+
+def content_hash(question, answer):
+    """Identity of a Q&A pair: both parts, ignoring case, punctuation and spacing"""
+    text = " ".join(words(question)) + "\0" + " ".join(words(answer))
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def shingles(text, size=SHINGLE_WORDS):
+    tokens = words(text)
+    if len(tokens) <= size:
+        return {" ".join(tokens)}
+    return {" ".join(tokens[start:start + size]) for start in range(len(tokens) - size + 1)}
+
+
+def minhash(text):
+    """MinHash signature of the word shingles of text"""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=4).digest(), "little")
+        for shingle in shingles(text)
+    ]
+    return tuple(min((a * value + b) % _PRIME & _MAX_HASH for value in hashes) for a, b in _PERMUTATIONS)
+
+
+def similarity(first, second):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(first, second) if x == y) / NUM_PERM
+
+
+def bands(signature):
+    rows = NUM_PERM // BANDS
+    return [(band, hash(signature[band * rows:(band + 1) * rows])) for band in range(BANDS)]
+
+
+class DedupIndex:
+    """
+    Content hashes and MinHash LSH buckets of the ingested Q&A pairs.
+
+    add() stages an entry in memory, where later check() calls already see it;
+    commit() writes staged entries to disk once their shard has been written, so
+    a crash in between does not mark unwritten entries as ingested.
+    """
+
+    def __init__(self, directory):
+        self.store = diskcache.Cache(directory)
+        self._pending = {}
+        self.exact_duplicates = 0
+        self.near_duplicates = 0
+
+    def __len__(self):
+        return self.store.get(("meta", "entries"), 0) + sum(1 for key in self._pending if key[0] == "entry")
+
+    def _get(self, key, default=None):
+        if key in self._pending:
+            return self._pending[key]
+        return self.store.get(key, default)
+
+    def check(self, question, answer):
+        """
+        Look up a Q&A pair. Returns (key, signature, duplicate): duplicate is None
+        for a new pair, otherwise the matching entry with its kind ("exact" or
+        "near") and similarity.
+        """
+        key = content_hash(question, answer)
+        entry = self._get(("entry", key))
+        if entry is not None:
+            self.exact_duplicates += 1
+            return key, None, dict(entry, kind="exact", similarity=1.0)
+
+        signature = minhash(f"{question} {answer}")
+        best, best_similarity = None, 0.0
+        candidates = set()
+        for band, bucket in bands(signature):
+            candidates.update(self._get(("band", band, bucket), ()))
+        for candidate in candidates:
+            entry = self._get(("entry", candidate))
+            score = similarity(signature, entry["signature"])
+            if score > best_similarity:
+                best, best_similarity = entry, score
+        if best is not None and best_similarity >= NEAR_DUPLICATE_THRESHOLD:
+            self.near_duplicates += 1
+            return key, signature, dict(best, kind="near", similarity=best_similarity)
+        return key, signature, None
+
+    def add(self, key, signature, question, csv_row):
+        """Stage a new entry (key and signature from check())"""
+        self._pending[("entry", key)] = {"question": question, "csv_row": csv_row, "signature": signature}
+        for band, bucket in bands(signature):
+            members = list(self._get(("band", band, bucket), ()))
+            members.append(key)
+            self._pending[("band", band, bucket)] = members
+
+    def commit(self):
+        """Write the staged entries to disk"""
+        if not self._pending:
+            return
+        with self.store.transact():
+            added = sum(1 for key in self._pending if key[0] == "entry")
+            for key, value in self._pending.items():
+                self.store.set(key, value)
+            self.store.set(("meta", "entries"), self.store.get(("meta", "entries"), 0) + added)
+        self._pending.clear()
+
+    def discard(self):
+        """Drop the staged entries"""
+        self._pending.clear()